@@ -1,120 +1,109 @@
 #!/usr/bin/env python3
 """
-快速添加新API的脚本
+快速添加新API的脚本：生成接口声明并追加到 apis/endpoints.py
+
+注册后自动出现在菜单、参数收集、无界面运行器和常驻服务中，
+重试/缓存/限速策略也按声明生效，不需要再写API类和菜单方法。
+
+示例:
+    python add_api.py video_list GET /video/list --module 视频模块 --title 获取视频列表 \\
+        -p page:int=1 -p limit:int=10 --items-path data.list --cache-ttl 5
 """
 
-import os
 import re
+import sys
+import argparse
+from pathlib import Path
 
-def create_api_template(api_name: str, base_url: str, auth_type: str = "bearer"):
-    """创建新API的模板文件"""
-    
-    # 1. 创建API类文件
-    api_class_content = f'''"""
-{api_name.title()} API客户端
-"""
+ENDPOINTS_FILE = Path(__file__).parent / "apis" / "endpoints.py"
 
-from typing import Dict, Optional
-from api_client import BaseAPIClient
+PARAM_TYPES = ("str", "int", "float", "bool")
 
-class {api_name.title()}API(BaseAPIClient):
-    """{api_name.title()} API客户端"""
-    
-    def __init__(self):
-        super().__init__("{api_name}")
-    
-    # 示例方法1: 登录
-    def login(self, username: str, password: str) -> Dict:
-        """登录"""
-        endpoint = "/auth/login"
-        data = {{
-            "username": username,
-            "password": password
-        }}
-        return self.post(endpoint, data)
+def parse_param(text: str) -> str:
+    """把 名称[:类型][=默认值] 转成 Param(...) 源码"""
+    match = re.fullmatch(r"(\w+)(?::(\w+))?(?:=(.*))?", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"参数格式应为 名称[:类型][=默认值]: {text}")
+    name, type_name, default = match.group(1), match.group(2) or "str", match.group(3)
+    if type_name not in PARAM_TYPES:
+        raise argparse.ArgumentTypeError(f"参数类型应为 {'/'.join(PARAM_TYPES)}: {type_name}")
     
-    # 示例方法2: 获取数据
-    def get_data(self, page: int = 1, limit: int = 10) -> Dict:
-        """获取数据"""
-        endpoint = "/data"
-        params = {{
-            "page": page,
-            "limit": limit
-        }}
-        return self.get(endpoint, params=params)
-    
-    # 添加更多方法...
-'''
+    if default is None:
+        return f'Param("{name}", {type_name})'
+    if type_name == "str":
+        return f'Param("{name}", str, {default!r})'
+    if type_name == "bool":
+        return f'Param("{name}", bool, {default.strip().lower() in ("1", "true", "yes", "y", "on")})'
+    # 校验数值默认值
+    value = {"int": int, "float": float}[type_name](default)
+    return f'Param("{name}", {type_name}, {value!r})'
 
-    # 2. 更新__init__.py
-    init_file = "apis/__init__.py"
-    with open(init_file, 'r', encoding='utf-8') as f:
-        init_content = f.read()
+def render_endpoint(args) -> str:
+    """生成 register(Endpoint(...)) 源码"""
+    lines = [f'register(Endpoint(', f'    "{args.name}", "{args.method.upper()}", "{args.path}",']
+    if args.params:
+        lines.append("    params=[")
+        lines.extend(f"        {param}," for param in args.params)
+        lines.append("    ],")
+    if args.module:
+        title = args.title or args.name
+        lines.append(f'    module="{args.module}", title="{title}", description="{args.description}",')
     
-    # 添加import
-    new_import = f"from .{api_name}_api import {api_name.title()}API"
-    if new_import not in init_content:
-        # 找到import部分，在最后添加
-        lines = init_content.split('\n')
-        import_end = 0
-        for i, line in enumerate(lines):
-            if line.startswith("from .") or line.startswith("import "):
-                import_end = i
-            elif import_end > 0 and not line.startswith("from .") and not line.startswith("import "):
-                break
-        
-        lines.insert(import_end + 1, new_import)
-        init_content = '\n'.join(lines)
+    options = []
+    if args.idempotent is not None:
+        options.append(f"idempotent={args.idempotent}")
+    if args.cache_ttl:
+        options.append(f"cache_ttl={args.cache_ttl:g}")
+    if args.rate_class:
+        options.append(f'rate_class="{args.rate_class}"')
+    if args.items_path:
+        options.append(f'items_path="{args.items_path}"')
+    if args.no_auth:
+        options.append("auth=False")
+    if options:
+        lines.append(f"    {', '.join(options)},")
+    lines.append("))")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="快速添加新API（生成接口声明）")
+    parser.add_argument("name", help="接口名称（英文，如: article_list）")
+    parser.add_argument("method", choices=["GET", "POST", "PUT", "DELETE", "get", "post", "put", "delete"], help="请求方式")
+    parser.add_argument("path", help="接口路径，如 /article/list")
+    parser.add_argument("-p", "--param", dest="params", action="append", type=parse_param, default=[],
+                        help="参数 名称[:类型][=默认值]，类型为 str/int/float/bool，没有默认值表示必填（可重复）")
+    parser.add_argument("--module", help="菜单模块（不指定则不出现在菜单中）")
+    parser.add_argument("--title", help="菜单中显示的名称（默认为接口名称）")
+    parser.add_argument("--description", default="", help="菜单中显示的描述")
+    parser.add_argument("--idempotent", action="store_true", default=None, help="POST接口可以安全重发")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="GET响应缓存秒数")
+    parser.add_argument("--rate-class", help="限速类别（见 Config.RATE_CLASSES）")
+    parser.add_argument("--items-path", help="列表接口响应中数组的位置，如 data.list（用于分页遍历）")
+    parser.add_argument("--no-auth", action="store_true", help="请求不携带token")
+    parser.add_argument("--dry-run", action="store_true", help="只打印声明，不写入文件")
     
-    # 添加API_CLIENTS
-    if f'"{api_name}": {api_name.title()}API' not in init_content:
-        # 找到API_CLIENTS字典
-        pattern = r'API_CLIENTS = \{([^}]+)\}'
-        match = re.search(pattern, init_content, re.DOTALL)
-        if match:
-            clients_content = match.group(1)
-            new_clients = clients_content.rstrip() + f'\n    "{api_name}": {api_name.title()}API,'
-            init_content = init_content.replace(clients_content, new_clients)
+    args = parser.parse_args(argv)
+    source = render_endpoint(args)
     
-    # 3. 保存文件
-    api_file_path = f"apis/{api_name}_api.py"
-    with open(api_file_path, 'w', encoding='utf-8') as f:
-        f.write(api_class_content)
+    if args.dry_run:
+        print(source, end="")
+        return 0
     
-    with open(init_file, 'w', encoding='utf-8') as f:
-        f.write(init_content)
+    content = ENDPOINTS_FILE.read_text(encoding="utf-8")
+    if re.search(rf'^register\(Endpoint\(\s*"{re.escape(args.name)}"', content, re.MULTILINE):
+        print(f"接口已存在: {args.name}", file=sys.stderr)
+        return 1
+    with open(ENDPOINTS_FILE, "a", encoding="utf-8") as f:
+        f.write("\n" + source)
     
-    # 4. 更新配置文件示例
-    print("\n" + "="*60)
-    print(f"API模板创建完成！")
-    print("="*60)
-    print(f"\n1. API类文件已创建: {api_file_path}")
-    print(f"\n2. 请在 config.py 中添加配置:")
-    print(f"""
-    APIS = {{
-        "{api_name}": {{
-            "base_url": "{base_url}",
-            "auth_type": "{auth_type}",
-            "accept_encoding": "gzip, deflate"
-        }}
-    }}
-    """)
-    print(f"\n3. 使用方法:")
-    print(f"    from apis import get_api_client")
-    print(f"    api = get_api_client('{api_name}')")
-    print(f"    result = api.login('username', 'password')")
-    print("\n4. 请根据实际API文档修改模板中的方法")
+    print(source, end="")
+    print(f"\n已追加到 {ENDPOINTS_FILE}")
+    print("使用方法:")
+    print(f"    client.call(\"{args.name}\", ...)")
+    if not args.module:
+        print("    （指定 --module 后会出现在菜单中）")
+    print("需要特殊处理请求数据或结果时，可在声明中加 prepare= 或 handler=")
+    return 0
 
 if __name__ == "__main__":
-    import argparse
-    
-    parser = argparse.ArgumentParser(description="快速创建新API模板")
-    parser.add_argument("name", help="API名称（英文，如: github, twitter）")
-    parser.add_argument("url", help="API基础URL")
-    parser.add_argument("--auth", default="bearer", 
-                       choices=["bearer", "token_direct", "basic"],
-                       help="认证类型")
-    
-    args = parser.parse_args()
-    
-    create_api_template(args.name, args.url, args.auth)
\ No newline at end of file
+    sys.exit(main())
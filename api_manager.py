@@ -1,50 +1,80 @@
 # api_manager.py
+import time
 import logging
-from typing import Dict, List, Tuple, Any, Callable  # 添加 Any 和 Callable
-from mfuns_client import MFunsClient
+import threading
+from typing import TYPE_CHECKING, Dict, List, Tuple, Any, Callable, Optional  # 添加 Any 和 Callable
+from config import Config
+from utils.metrics import get_metrics
+from utils.deadline import request_deadline
+from apis.endpoints import Endpoint, MODULES, menu, find_by_title
+
+if TYPE_CHECKING:
+    # 只用于类型标注，运行时在首次执行API时才导入
+    from mfuns_client import MFunsClient
 
 logger = logging.getLogger(__name__)
 
 class APIManager:
     """API管理器 - 管理MFuns网站的所有API接口"""
     
-    def __init__(self):
-        self.client = MFunsClient()
-        self.api_modules = self._init_api_modules()
+    def __init__(self, client: Optional["MFunsClient"] = None):
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._api_modules: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    @property
+    def client(self) -> "MFunsClient":
+        """MFuns客户端（首次执行API时才创建，只列出API时不加载token和请求组件）"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from mfuns_client import MFunsClient
+                    self._client = MFunsClient()
+        return self._client
+    
+    @client.setter
+    def client(self, client: "MFunsClient"):
+        self._client = client
+    
+    @property
+    def api_modules(self) -> Dict[str, Dict[str, Any]]:
+        """API模块列表（首次访问时构建）"""
+        if self._api_modules is None:
+            self._api_modules = self._init_api_modules()
+        return self._api_modules
     
     def _init_api_modules(self) -> Dict[str, Dict[str, Any]]:
-        """初始化API模块列表"""
-        return {
-            "认证模块": {
-                "description": "用户认证相关接口",
-                "apis": [
-                    ("登录", self._test_login, "测试用户登录"),
-                    ("登出", self._test_logout, "测试用户登出"),
-                    ("检查登录状态", self._test_login_status, "检查用户登录状态"),
-                ]
-            },
-            "内容模块": {
-                "description": "内容操作相关接口",
-                "apis": [
-                    ("点赞", self._test_like, "测试点赞功能"),
-                    ("取消点赞", self._test_unlike, "测试取消点赞功能"),
-                    ("获取点赞状态", self._test_get_like_status, "获取内容点赞状态"),
-                ]
-            },
-            "用户模块": {
-                "description": "用户信息相关接口",
-                "apis": [
-                    ("获取用户信息", self._test_get_user_info, "获取当前用户信息"),
-                ]
-            },
-            "文章模块": {  # 新增文章模块
-                "description": "文章管理相关接口",
-                "apis": [
-                    ("更新文章", self._test_update_article, "创建或更新文章"),
-                ]
+        """按 apis/endpoints.py 中的接口声明生成API模块列表"""
+        modules = {}
+        for module_name, endpoints in menu().items():
+            apis = []
+            for endpoint in endpoints:
+                func = getattr(self, endpoint.handler) if endpoint.handler else self._endpoint_api(endpoint)
+                apis.append((endpoint.title, func, endpoint.description))
+            modules[module_name] = {"description": MODULES[module_name], "apis": apis}
+        return modules
+    
+    def _endpoint_api(self, endpoint: Endpoint) -> Callable[..., Dict[str, Any]]:
+        """没有自定义方法的接口：按声明发送请求，签名与声明的参数一致"""
+        signature = endpoint.signature()
+        
+        def run(**kwargs) -> Dict[str, Any]:
+            # 补上示例值等默认值，缺少必填参数时抛出TypeError
+            bound = signature.bind(**kwargs)
+            bound.apply_defaults()
+            result = self.client.call(endpoint.name, **bound.arguments)
+            data = result.get("data") or {}
+            return {
+                "success": result["success"],
+                "code": data.get("code"),
+                "message": data.get("msg", "") or result.get("error", ""),
+                "data": data.get("data", {})
             }
-            
-        }
+        
+        run.__name__ = f"_call_{endpoint.name}"
+        run.__doc__ = endpoint.description
+        run.__signature__ = signature
+        return run
     
     def list_api_modules(self) -> List[str]:
         """列出所有API模块"""
@@ -64,33 +94,76 @@ class APIManager:
             return self.api_modules[module_name]["description"]
         return ""
     
+    def find_api(self, module_name: str, api_name: str) -> Optional[Tuple[int, Callable, str]]:
+        """按名称查找API，返回 (索引, 函数, 描述)，不存在返回None"""
+        module = self.api_modules.get(module_name)
+        if not module:
+            return None
+        for index, (name, func, description) in enumerate(module["apis"]):
+            if name == api_name:
+                return index, func, description
+        return None
+    
+    def execute_api_by_name(self, module_name: str, api_name: str, **kwargs) -> Dict[str, Any]:
+        """按名称执行API"""
+        if module_name not in self.api_modules:
+            return {"success": False, "error": "unknown_module", "message": f"模块 '{module_name}' 不存在"}
+        found = self.find_api(module_name, api_name)
+        if found is None:
+            return {"success": False, "error": "unknown_api", "message": f"API '{api_name}' 不存在"}
+        return self.execute_api(module_name, found[0], **kwargs)
+    
     def execute_api(self, module_name: str, api_index: int, **kwargs) -> Dict[str, Any]:
-        """执行指定的API"""
+        """
+        执行指定的API
+        总时限为 Config.API_DEADLINE（含登录检查、排队、重试），
+        调用方可以在外层用 request_deadline 设置更短的时限
+        """
         if module_name not in self.api_modules:
-            return {"success": False, "message": f"模块 '{module_name}' 不存在"}
+            return {"success": False, "error": "unknown_module", "message": f"模块 '{module_name}' 不存在"}
         
         module = self.api_modules[module_name]
         if api_index < 0 or api_index >= len(module["apis"]):
-            return {"success": False, "message": f"API索引 {api_index} 无效"}
+            return {"success": False, "error": "unknown_api", "message": f"API索引 {api_index} 无效"}
         
         api_name, api_func, api_desc = module["apis"][api_index]
         
+        start = time.perf_counter()
         try:
-            # 确保已登录（需要登录的API）
-            if api_name not in ["登录"]:
-                if not self.client.is_logged_in():
-                    return {"success": False, "message": "请先登录"}
-            
-            result = api_func(**kwargs)
+            with request_deadline(Config.API_DEADLINE):
+                # 确保已登录（接口声明为需要登录，自定义API默认需要）
+                endpoint = find_by_title(api_name)
+                if endpoint is None or endpoint.auth:
+                    if not self.client.is_logged_in():
+                        return {"success": False, "error": "not_logged_in", "message": "请先登录"}
+                
+                result = api_func(**kwargs)
+            elapsed_ms = self._record_api_time(module_name, api_name, start, result)
             return {
                 "success": True,
                 "api_name": api_name,
                 "description": api_desc,
-                "result": result
+                "result": result,
+                "elapsed_ms": elapsed_ms
             }
         except Exception as e:
             logger.error(f"执行API失败: {e}")
-            return {"success": False, "message": f"执行失败: {str(e)}"}
+            self._record_api_time(module_name, api_name, start, None)
+            return {"success": False, "error": "exception", "message": f"执行失败: {str(e)}"}
+    
+    def _record_api_time(self, module_name: str, api_name: str, start: float, result: Any) -> float:
+        """记录单个API的总耗时（毫秒）"""
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        if Config.METRICS_ENABLED:
+            if result is None:
+                outcome = "error"
+            else:
+                outcome = "success" if isinstance(result, dict) and result.get("success") else "failed"
+            labels = {"module": module_name, "api": api_name}
+            metrics = get_metrics()
+            metrics.observe("api_duration_ms", labels, elapsed_ms, help_text="API执行耗时（毫秒）")
+            metrics.inc("api_calls_total", {**labels, "outcome": outcome}, help_text="API执行次数")
+        return elapsed_ms
     
     # 以下是具体的API测试方法
     def _test_login(self, account: str = "", password: str = "") -> Dict[str, Any]:
@@ -109,27 +182,25 @@ class APIManager:
     def _test_login_status(self) -> Dict[str, Any]:
         """测试登录状态"""
         if self.client.is_logged_in():
-            # 测试token是否有效
-            token_valid = self.client.test_token_with_like()
+            # 通过只读接口校验token是否有效
+            token_valid = self.client.validate_token(force=True)
+            expires_in = self.client.token_lifecycle.expires_in()
+            if token_valid is None:
+                message = "已登录，但无法校验token（请求失败）"
+            else:
+                message = "已登录" + ("，token有效" if token_valid else "，但token无效")
+            if expires_in is not None:
+                message += f"，{max(0, int(expires_in // 60))}分钟后过期"
             return {
                 "success": True,
                 "logged_in": True,
                 "token_valid": token_valid,
-                "message": "已登录" + ("，token有效" if token_valid else "，但token无效")
+                "expires_in": None if expires_in is None else int(expires_in),
+                "message": message
             }
         else:
             return {"success": True, "logged_in": False, "message": "未登录"}
     
-    def _test_like(self, target_id: int = 113180, like_type: int = 0) -> Dict[str, Any]:
-        """测试点赞"""
-        result = self.client.content.like(target_id, like_type)
-        return {
-            "success": result["success"],
-            "code": result["data"].get("code"),
-            "message": result["data"].get("msg", ""),
-            "data": result["data"].get("data", {})
-        }
-    
     def _test_unlike(self, target_id: int = 113180, like_type: int = 0) -> Dict[str, Any]:
         """测试取消点赞"""
         return {"success": False, "message": "取消点赞功能暂未实现"}
@@ -158,7 +229,7 @@ class APIManager:
         
         self.api_modules[module_name]["apis"].append((api_name, api_func, description))
         logger.info(f"已添加自定义API: {module_name}/{api_name}")
-
+        
         # api_manager.py 中添加以下方法
     def _test_update_article(self, **kwargs) -> Dict[str, Any]:
         """测试更新文章"""        
@@ -2,15 +2,18 @@
 import logging
 from typing import Dict, Optional
 from utils.request_handler import RequestHandler
+from utils.async_request_handler import AsyncRequestHandler
+from apis.endpoints import call, call_async
 
 logger = logging.getLogger(__name__)
 
 class ContentPublishingAPI:
     """内容发布相关API"""
     
-    def __init__(self, request_handler: RequestHandler):
+    def __init__(self, request_handler: RequestHandler, async_request_handler: Optional[AsyncRequestHandler] = None):
         self.request_handler = request_handler
-
+        self.async_request_handler = async_request_handler
+    
     def update_article(
         self, 
         title: str, 
@@ -35,24 +38,29 @@ class ContentPublishingAPI:
             draft: 是否为草稿
             contribute_id: 内容ID（更新已有文章时使用）
         """
-        endpoint = "/contribute/article/update"
-        
-        data = {
-            "title": title,
-            "cid": cid,
-            "content": content,
-            "cover": cover,
-            "tags": tags,
-            "copyright": copyright,
-            "draft": draft,
-        }
-        
-        # 如果有内容ID，添加到数据中
-        if contribute_id:
-            data["contribute_id"] = contribute_id
-        
         logger.info(f"更新文章: {title}, 频道ID: {cid}")
-        return self.request_handler.post(endpoint, data)
+        return call(
+            self.request_handler, "update_article", title=title, cid=cid, content=content, cover=cover,
+            tags=tags, copyright=copyright, draft=draft, contribute_id=contribute_id
+        )
+    
+    async def update_article_async(
+        self, 
+        title: str, 
+        cid: int, 
+        content: str, 
+        cover: str = "", 
+        tags: str = "", 
+        copyright: int = 2, 
+        draft: bool = False, 
+        contribute_id: Optional[int] = None
+    ) -> Dict:
+        """更新文章（异步），参数同 update_article"""
+        logger.info(f"更新文章: {title}, 频道ID: {cid}")
+        return await call_async(
+            self.async_request_handler, "update_article", title=title, cid=cid, content=content, cover=cover,
+            tags=tags, copyright=copyright, draft=draft, contribute_id=contribute_id
+        )
     
     # def get_article(self, contribute_id: int) -> Dict:
     #     """获取文章信息"""
@@ -1,19 +1,7 @@
 # apis/__init__.py
-from .auth import AuthAPI
-
-# 注册所有可用的API客户端
-API_CLIENTS = {
-    "auth": AuthAPI,
-    # 在这里添加新的API客户端
-}
-
-def get_api_client(api_name: str):
-    """获取API客户端实例"""
-    if api_name in API_CLIENTS:
-        return API_CLIENTS[api_name]()
-    else:
-        raise ValueError(f"未知的API: {api_name}")
+# 接口在 apis/endpoints.py 中声明，API类（auth、content等）由 MFunsClient 按需创建
+from apis.endpoints import list_endpoints
 
 def list_available_apis() -> list:
-    """列出所有可用的API"""
-    return list(API_CLIENTS.keys())
\ No newline at end of file
+    """列出所有已声明的接口"""
+    return list_endpoints()
@@ -1,61 +1,75 @@
 # apis/auth.py
 import time
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from services.token_service import TokenService
 from utils.request_handler import RequestHandler
+from utils.async_request_handler import AsyncRequestHandler
+from apis.endpoints import call, call_async
 
 logger = logging.getLogger(__name__)
 
 class AuthAPI:
     """认证相关API"""
     
-    def __init__(self, request_handler: RequestHandler, token_manager: TokenService):
+    def __init__(
+        self,
+        request_handler: RequestHandler,
+        token_manager: TokenService,
+        async_request_handler: Optional[AsyncRequestHandler] = None,
+        token_name: str = "mfuns"
+    ):
         self.request_handler = request_handler
         self.token_manager = token_manager
+        self.async_request_handler = async_request_handler
+        self.token_name = token_name
     
     def login(self, account: str, password: str) -> bool:
         """用户登录"""
-        endpoint = "/auth/login"
-        data = {
-            "account": account,
-            "password": password
-        }
-        
         logger.info(f"登录: {account}")
         
-        # 移除认证token（登录请求不需要）
-        original_auth = self.request_handler.session.headers.get("Authorization")
-        self.request_handler.remove_auth_token()
+        # 登录接口声明为不携带认证token（只作用于本次请求，不修改共享session的请求头，
+        # 避免与同一session上并发的其它请求互相干扰）
+        result = call(self.request_handler, "login", account=account, password=password)
+        return self._handle_login_result(account, result)
+    
+    async def login_async(self, account: str, password: str) -> bool:
+        """用户登录（异步）"""
+        logger.info(f"登录: {account}")
         
-        try:
-            result = self.request_handler.post(endpoint, data)
+        # 登录接口声明为不携带认证token（只作用于本次请求，不修改共享请求头）
+        result = await call_async(self.async_request_handler, "login", account=account, password=password)
+        return self._handle_login_result(account, result)
+    
+    def _handle_login_result(self, account: str, result: Dict) -> bool:
+        """处理登录响应：保存并设置token"""
+        if result["success"]:
+            response_data = result["data"]
             
-            if result["success"]:
-                response_data = result["data"]
+            if response_data.get("code") == 1:
+                token = response_data["data"]["access_token"]
+                token_data = {
+                    "access_token": token,
+                    "account": account,
+                    "login_time": int(time.time())
+                }
+                # 服务器给出有效期时一并保存，用于判断过期
+                if response_data["data"].get("expires_in"):
+                    token_data["expires_in"] = response_data["data"]["expires_in"]
                 
-                if response_data.get("code") == 1:
-                    token = response_data["data"]["access_token"]
-                    
-                    # 保存token
-                    self.token_manager.save_token("mfuns", {
-                        "access_token": token,
-                        "account": account,
-                        "login_time": int(time.time())
-                    })
-                    
-                    # 设置认证token
-                    self.request_handler.set_auth_token(token)
-                    
-                    logger.info("登录成功")
-                    return True
-                else:
-                    logger.error(f"登录失败: {response_data.get('msg')}")
+                # 保存token
+                self.token_manager.save_token(self.token_name, token_data)
+                
+                # 设置认证token
+                self.request_handler.set_auth_token(token)
+                if self.async_request_handler:
+                    self.async_request_handler.set_auth_token(token)
+                
+                logger.info("登录成功")
+                return True
             else:
-                logger.error(f"请求失败: {result.get('error')}")
-            
-            return False
-        finally:
-            # 恢复原来的认证token
-            if original_auth:
-                self.request_handler.session.headers["Authorization"] = original_auth
\ No newline at end of file
+                logger.error(f"登录失败: {response_data.get('msg')}")
+        else:
+            logger.error(f"请求失败: {result.get('error')}")
+        
+        return False
\ No newline at end of file
@@ -1,23 +1,25 @@
 # apis/contentAccess.py
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from utils.request_handler import RequestHandler
+from utils.async_request_handler import AsyncRequestHandler
+from apis.endpoints import call, call_async
 
 logger = logging.getLogger(__name__)
 
 class ContentAccessAPI:
     """内容访问相关API"""
     
-    def __init__(self, request_handler: RequestHandler):
+    def __init__(self, request_handler: RequestHandler, async_request_handler: Optional[AsyncRequestHandler] = None):
         self.request_handler = request_handler
+        self.async_request_handler = async_request_handler
     
     def like(self, target_id: int, like_type: int = 0) -> Dict:
         """点赞"""
-        endpoint = "/like/like"
-        data = {
-            "id": target_id,
-            "type": like_type
-        }
-        
         logger.info(f"点赞: ID={target_id}, Type={like_type}")
-        return self.request_handler.post(endpoint, data)
\ No newline at end of file
+        return call(self.request_handler, "like", target_id=target_id, like_type=like_type)
+    
+    async def like_async(self, target_id: int, like_type: int = 0) -> Dict:
+        """点赞（异步）"""
+        logger.info(f"点赞: ID={target_id}, Type={like_type}")
+        return await call_async(self.async_request_handler, "like", target_id=target_id, like_type=like_type)
\ No newline at end of file
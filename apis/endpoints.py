@@ -0,0 +1,377 @@
+# apis/endpoints.py
+import inspect
+import logging
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 必填参数的默认值标记
+REQUIRED = inspect.Parameter.empty
+
+_TRUE_STRINGS = ("1", "true", "yes", "y", "on")
+_FALSE_STRINGS = ("0", "false", "no", "n", "off", "")
+
+class Param:
+    """接口参数声明"""
+    
+    __slots__ = ("name", "type", "default", "field", "description", "sample", "omit_empty")
+    
+    def __init__(
+        self,
+        name: str,
+        type: type = str,
+        default: Any = REQUIRED,
+        field: Optional[str] = None,
+        description: str = "",
+        sample: Any = None,
+        omit_empty: bool = False
+    ):
+        self.name = name
+        self.type = type
+        self.default = default
+        self.field = field or name  # 请求中的字段名
+        self.description = description
+        self.sample = sample  # 必填参数在菜单/测试所有API中缺省使用的示例值
+        self.omit_empty = omit_empty  # 值为空时不放进请求
+    
+    @property
+    def required(self) -> bool:
+        return self.default is REQUIRED
+    
+    def convert(self, value: Any) -> Any:
+        """按声明的类型转换参数值，转换失败抛出ValueError"""
+        if value is None or (isinstance(value, self.type) and not (self.type is int and isinstance(value, bool))):
+            return value
+        if self.type is bool and isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+            raise ValueError(f"参数 {self.name} 应为布尔值: {value!r}")
+        try:
+            return self.type(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"参数 {self.name} 应为 {self.type.__name__}: {value!r}")
+
+class Endpoint:
+    """
+    接口声明：请求方式、路径、参数和策略写在一处，加载时用于
+        - 生成请求（参数校验、类型转换、字段映射），见 call / call_async
+        - APIManager 菜单项和参数收集器
+        - 重试（idempotent）、GET缓存（cache_ttl）和限速（rate_class）策略
+        - 列表接口的分页遍历（items_path），见 services/paginator.py
+    path 为None的是本地操作（登出等），只注册菜单项，由 handler 指定 APIManager 的方法。
+    """
+    
+    __slots__ = (
+        "name", "method", "path", "params", "module", "title", "description",
+        "idempotent", "cache_ttl", "rate_class", "max_concurrent", "connect_timeout", "read_timeout",
+        "items_path", "auth", "handler", "collector", "prepare"
+    )
+    
+    def __init__(
+        self,
+        name: str,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        params: Iterable[Param] = (),
+        module: Optional[str] = None,
+        title: Optional[str] = None,
+        description: str = "",
+        idempotent: Optional[bool] = None,
+        cache_ttl: float = 0,
+        rate_class: Optional[str] = None,
+        max_concurrent: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        items_path: Optional[str] = None,
+        auth: bool = True,
+        handler: Optional[str] = None,
+        collector: Optional[str] = None,
+        prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        self.name = name
+        self.method = method.upper() if method else None
+        self.path = "/" + path.lstrip('/') if path else None
+        self.params: Tuple[Param, ...] = tuple(params)
+        self.module = module  # 所属菜单模块，None表示不出现在菜单中
+        self.title = title or name  # 菜单中显示的API名称
+        self.description = description
+        # 未声明时按请求方式判断：GET等可以安全重发，POST不能
+        self.idempotent = self.method != "POST" if idempotent is None else idempotent
+        self.cache_ttl = cache_ttl  # GET响应缓存秒数，0表示不缓存
+        self.rate_class = rate_class  # 限速类别，见 Config.RATE_CLASSES
+        self.max_concurrent = max_concurrent  # 同时进行的请求数上限，None取 Config.BULKHEAD_DEFAULT_LIMIT
+        # 超时秒数，None取 Config.CONNECT_TIMEOUT / Config.DEFAULT_TIMEOUT
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # 列表接口响应中数组的位置（如 "data.list"），分页遍历时按需逐个解码元素
+        self.items_path = items_path
+        self.auth = auth  # 是否需要登录（携带token）
+        self.handler = handler  # APIManager 中自定义的菜单方法名
+        self.collector = collector  # 参数收集器 "模块:类名"
+        self.prepare = prepare  # 发送前调整请求数据
+    
+    @property
+    def is_local(self) -> bool:
+        return self.path is None
+    
+    def build(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """校验并转换参数，返回请求数据（字段名 -> 值）"""
+        known = {p.name for p in self.params}
+        unknown = [name for name in params if name not in known]
+        if unknown:
+            raise ValueError(f"{self.name} 未知参数: {', '.join(unknown)}")
+        
+        data = {}
+        for param in self.params:
+            if param.name in params:
+                value = param.convert(params[param.name])
+            elif param.required:
+                raise ValueError(f"{self.name} 缺少参数: {param.name}")
+            else:
+                value = param.default
+            if param.omit_empty and not value:
+                continue
+            data[param.field] = value
+        return self.prepare(data) if self.prepare else data
+    
+    def request_args(self, params: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
+        """生成请求处理器 request() 的参数: (方法, 路径, 关键字参数)"""
+        if self.is_local:
+            raise ValueError(f"{self.name} 是本地操作，不发送请求")
+        data = self.build(params)
+        if self.method == "GET":
+            kwargs: Dict[str, Any] = {"params": data} if data else {}
+        else:
+            kwargs = {"json": data}
+        if not self.auth:
+            # 只作用于本次请求，不修改共享的请求头
+            kwargs["headers"] = {"Authorization": None}
+        return self.method, self.path, kwargs
+    
+    def signature(self) -> inspect.Signature:
+        """菜单项的函数签名（必填参数有示例值时以示例值为默认值）"""
+        parameters = []
+        for param in self.params:
+            default = param.default
+            if param.required and param.sample is not None:
+                default = param.sample
+            parameters.append(inspect.Parameter(
+                param.name, inspect.Parameter.KEYWORD_ONLY, default=default, annotation=param.type
+            ))
+        return inspect.Signature(parameters)
+    
+    def describe(self) -> Dict[str, Any]:
+        """接口信息（用于列表展示）"""
+        return {
+            "name": self.name,
+            "method": self.method,
+            "path": self.path,
+            "params": [
+                {"name": p.name, "type": p.type.__name__, "required": p.required,
+                 "default": None if p.required else p.default, "description": p.description}
+                for p in self.params
+            ],
+            "idempotent": self.idempotent,
+            "cache_ttl": self.cache_ttl,
+            "rate_class": self.rate_class,
+            "max_concurrent": self.max_concurrent,
+            "timeout": [self.connect_timeout or Config.CONNECT_TIMEOUT, self.read_timeout or Config.DEFAULT_TIMEOUT],
+            "items_path": self.items_path,
+        }
+
+# 菜单模块: 名称 -> 描述（按注册顺序显示）
+MODULES: Dict[str, str] = {}
+# 已注册的接口: 名称 -> 声明（按注册顺序）
+ENDPOINTS: Dict[str, Endpoint] = {}
+_by_path: Dict[str, Endpoint] = {}
+_by_title: Dict[str, Endpoint] = {}
+
+def register_module(name: str, description: str = ""):
+    """注册菜单模块"""
+    MODULES.setdefault(name, description)
+
+def register(endpoint: Endpoint) -> Endpoint:
+    """注册接口声明，名称或路径重复时抛出ValueError"""
+    if endpoint.name in ENDPOINTS:
+        raise ValueError(f"接口已注册: {endpoint.name}")
+    if endpoint.path and endpoint.path in _by_path:
+        raise ValueError(f"路径已注册: {endpoint.path}（{_by_path[endpoint.path].name}）")
+    if endpoint.rate_class and endpoint.rate_class not in Config.RATE_CLASSES:
+        raise ValueError(f"未知的限速类别: {endpoint.rate_class}")
+    if endpoint.module:
+        register_module(endpoint.module)
+        _by_title[endpoint.title] = endpoint
+    ENDPOINTS[endpoint.name] = endpoint
+    if endpoint.path:
+        _by_path[endpoint.path] = endpoint
+    return endpoint
+
+def get_endpoint(name: str) -> Endpoint:
+    """按名称获取接口声明，不存在抛出ValueError"""
+    endpoint = ENDPOINTS.get(name)
+    if endpoint is None:
+        raise ValueError(f"未知的接口: {name}")
+    return endpoint
+
+def find_by_path(path: str) -> Optional[Endpoint]:
+    """按路径查找接口声明"""
+    return _by_path.get("/" + path.lstrip('/'))
+
+def find_by_title(title: str) -> Optional[Endpoint]:
+    """按菜单名称查找接口声明"""
+    return _by_title.get(title)
+
+def list_endpoints() -> List[str]:
+    """所有接口名称"""
+    return list(ENDPOINTS)
+
+def menu() -> Dict[str, List[Endpoint]]:
+    """按模块分组的菜单项（模块和接口都按注册顺序）"""
+    grouped: Dict[str, List[Endpoint]] = {name: [] for name in MODULES}
+    for endpoint in ENDPOINTS.values():
+        if endpoint.module:
+            grouped[endpoint.module].append(endpoint)
+    return grouped
+
+def idempotent_paths() -> List[str]:
+    """声明为幂等的POST接口，加上 Config.IDEMPOTENT_ENDPOINTS"""
+    paths = [e.path for e in ENDPOINTS.values() if e.path and e.method == "POST" and e.idempotent]
+    return paths + [p for p in Config.IDEMPOTENT_ENDPOINTS if p not in paths]
+
+def rate_limits() -> Dict[str, Tuple[float, float]]:
+    """各接口的限速 (每秒速率, 突发容量)：按限速类别，Config.RATE_LIMITS 可以单独覆盖"""
+    limits = {
+        e.path: Config.RATE_CLASSES[e.rate_class]
+        for e in ENDPOINTS.values() if e.path and e.rate_class
+    }
+    limits.update(Config.RATE_LIMITS)
+    return limits
+
+def cache_ttls() -> Dict[str, float]:
+    """各GET接口的缓存秒数，Config.CACHE_TTLS 可以单独覆盖"""
+    ttls = {e.path: e.cache_ttl for e in ENDPOINTS.values() if e.path and e.method == "GET" and e.cache_ttl}
+    ttls.update(Config.CACHE_TTLS)
+    return ttls
+
+def bulkhead_limits() -> Dict[str, int]:
+    """各接口的并发上限，Config.BULKHEAD_LIMITS 可以单独覆盖"""
+    limits = {e.path: e.max_concurrent for e in ENDPOINTS.values() if e.path and e.max_concurrent is not None}
+    limits.update(Config.BULKHEAD_LIMITS)
+    return limits
+
+def timeouts() -> Dict[str, Tuple[float, float]]:
+    """各接口的 (连接超时, 读超时)，Config.TIMEOUTS 可以单独覆盖"""
+    result = {
+        e.path: (e.connect_timeout or Config.CONNECT_TIMEOUT, e.read_timeout or Config.DEFAULT_TIMEOUT)
+        for e in ENDPOINTS.values() if e.path and (e.connect_timeout or e.read_timeout)
+    }
+    result.update(Config.TIMEOUTS)
+    return result
+
+def call(handler, name: str, **params) -> Dict[str, Any]:
+    """按接口声明发送请求（handler 为 RequestHandler）"""
+    method, path, kwargs = get_endpoint(name).request_args(params)
+    return handler.request(method, path, **kwargs)
+
+async def call_async(handler, name: str, **params) -> Dict[str, Any]:
+    """按接口声明发送请求（handler 为 AsyncRequestHandler）"""
+    method, path, kwargs = get_endpoint(name).request_args(params)
+    return await handler.request(method, path, **kwargs)
+
+def _prepare_article(data: Dict[str, Any]) -> Dict[str, Any]:
+    """合并相邻同属性的op并紧凑序列化；不是有效的Delta时原样发送，由服务端判断"""
+    from utils import delta
+    
+    # 调用方已处理过（如批量发布时预先序列化）
+    if isinstance(data["content"], delta.NormalizedDelta):
+        return data
+    try:
+        data["content"] = delta.normalize(data["content"])
+    except delta.DeltaError as e:
+        logger.warning(f"文章内容不是有效的Delta文档，原样发送: {e}")
+    return data
+
+# ---------------------------------------------------------------------------
+# 接口声明（菜单按这里的顺序显示）
+# 新增接口只需在此注册，见 add_api.py
+# ---------------------------------------------------------------------------
+
+register_module("认证模块", "用户认证相关接口")
+register_module("内容模块", "内容操作相关接口")
+register_module("用户模块", "用户信息相关接口")
+register_module("文章模块", "文章管理相关接口")
+
+register(Endpoint(
+    "login", "POST", "/auth/login",
+    params=[
+        Param("account", str, description="账号"),
+        Param("password", str, description="密码"),
+    ],
+    module="认证模块", title="登录", description="测试用户登录",
+    rate_class="login", read_timeout=15, auth=False,
+    handler="_test_login", collector="params.login_collector:LoginParamCollector",
+))
+register(Endpoint(
+    "logout", module="认证模块", title="登出", description="测试用户登出", handler="_test_logout",
+))
+register(Endpoint(
+    "login_status", module="认证模块", title="检查登录状态", description="检查用户登录状态",
+    handler="_test_login_status",
+))
+
+register(Endpoint(
+    "like", "POST", "/like/like",
+    params=[
+        Param("target_id", int, field="id", description="目标ID", sample=113180),
+        Param("like_type", int, 0, field="type", description="类型 (0=文章, 1=视频, ...)"),
+    ],
+    module="内容模块", title="点赞", description="测试点赞功能",
+    rate_class="interaction", read_timeout=10, collector="params.like_collector:LikeParamCollector",
+))
+register(Endpoint(
+    "unlike", module="内容模块", title="取消点赞", description="测试取消点赞功能",
+    handler="_test_unlike", collector="params.like_collector:LikeParamCollector",
+))
+register(Endpoint(
+    "like_status", module="内容模块", title="获取点赞状态", description="获取内容点赞状态",
+    handler="_test_get_like_status", collector="params.like_collector:LikeParamCollector",
+))
+
+register(Endpoint(
+    "user_info", "GET", "/user/info",
+    module="用户模块", title="获取用户信息", description="获取当前用户信息",
+    # 也用于校验token，读超时较短，接口异常时尽快失败
+    cache_ttl=2, read_timeout=10, handler="_test_get_user_info",
+))
+
+register(Endpoint(
+    "update_article", "POST", "/contribute/article/update",
+    params=[
+        Param("title", str, description="文章标题"),
+        Param("cid", int, description="频道ID"),
+        Param("content", str, description="文章内容（Delta JSON）"),
+        Param("cover", str, "", description="封面图片URL"),
+        Param("tags", str, "", description="标签，多个用逗号分隔"),
+        Param("copyright", int, 2, description="版权类型 (1=原创, 2=转载, 3=未定义)"),
+        Param("draft", bool, False, description="是否为草稿"),
+        Param("contribute_id", int, None, description="内容ID（更新已有文章时使用）", omit_empty=True),
+    ],
+    module="文章模块", title="更新文章", description="创建或更新文章",
+    # 发布接口较慢，限制并发，变慢时不占满所有工作线程
+    rate_class="write", max_concurrent=4, handler="_test_update_article",
+    collector="params.article_params:UpdateArticleParamCollector", prepare=_prepare_article,
+))
+# 分页遍历（services/paginator.py）的示例目标：路径未经确认，不加入菜单，API巡检也不会调用
+register(Endpoint(
+    "list_articles", "GET", "/article/list",
+    params=[
+        Param("page", int, 1, description="页码"),
+        Param("limit", int, 10, description="每页数量"),
+    ],
+    description="分页获取文章列表（示例，路径未确认）", items_path="data.list",
+))
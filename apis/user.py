@@ -1,19 +1,25 @@
 # apis/user.py
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from utils.request_handler import RequestHandler
+from utils.async_request_handler import AsyncRequestHandler
+from apis.endpoints import call, call_async
 
 logger = logging.getLogger(__name__)
 
 class UserAPI:
     """用户相关API"""
     
-    def __init__(self, request_handler: RequestHandler):
+    def __init__(self, request_handler: RequestHandler, async_request_handler: Optional[AsyncRequestHandler] = None):
         self.request_handler = request_handler
+        self.async_request_handler = async_request_handler
     
     def get_user_info(self) -> Dict:
         """获取用户信息"""
-        endpoint = "/user/info"
-        
         logger.info("获取用户信息")
-        return self.request_handler.get(endpoint)
\ No newline at end of file
+        return call(self.request_handler, "user_info")
+    
+    async def get_user_info_async(self) -> Dict:
+        """获取用户信息（异步）"""
+        logger.info("获取用户信息")
+        return await call_async(self.async_request_handler, "user_info")
\ No newline at end of file
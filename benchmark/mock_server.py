@@ -0,0 +1,237 @@
+# benchmark/mock_server.py
+import sys
+import gzip
+import json
+import time
+import zlib
+import random
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/v1"
+MOCK_TOKEN = "mock-token-0123456789abcdef"
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """模拟 MFuns API 的请求处理"""
+    
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出，不关闭Nagle会叠加约40ms的延迟确认
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _read_body(self) -> Any:
+        """读取并解码请求体（支持 gzip/deflate 压缩）"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        return json.loads(body) if body else None
+    
+    def _send(self, status: int, payload: Dict[str, Any]):
+        """发送JSON响应"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _handle(self, method: str):
+        server: MockMFunsServer = self.server.mock
+        path = self.path.split("?")[0]
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        
+        try:
+            data = self._read_body()
+        except (ValueError, OSError):
+            server.count(path, "bad_request")
+            self._send(400, {"code": 0, "msg": "请求体格式错误"})
+            return
+        
+        server.record_headers(path, self.headers)
+        server.sleep()
+        if server.should_fail():
+            server.count(path, "injected_error")
+            self._send(503, {"code": 0, "msg": "服务暂时不可用"})
+            return
+        
+        route = server.routes.get((method, path))
+        if route is None:
+            server.count(path, "not_found")
+            self._send(404, {"code": 0, "msg": "接口不存在"})
+            return
+        
+        if path != "/auth/login" and self.headers.get("Authorization") != MOCK_TOKEN:
+            server.count(path, "unauthorized")
+            self._send(200, {"code": -1, "msg": "请先登录"})
+            return
+        
+        server.count(path, "ok")
+        self._send(200, route(data or {}))
+    
+    def do_GET(self):
+        self._handle("GET")
+    
+    def do_POST(self):
+        self._handle("POST")
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    """并发连接较多时默认的监听队列（5）会导致连接超时重传"""
+    
+    daemon_threads = True
+    request_queue_size = 128
+
+class MockMFunsServer:
+    """
+    本地模拟服务器，实现 /auth/login、/like/like、/user/info、/contribute/article/update
+    
+    可配置固定延迟+抖动、错误率（返回503）和响应填充大小，用于基准测试。
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        payload_bytes: int = 0,
+        seed: Optional[int] = None
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.payload_bytes = payload_bytes
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        # 各接口最近一次请求的请求头（测试用）
+        self.last_headers: Dict[str, Dict[str, str]] = {}
+        self._article_id = 100000
+        self._server: Optional[_MockHTTPServer] = None
+        
+        self.routes = {
+            ("POST", "/auth/login"): self._login,
+            ("POST", "/like/like"): self._like,
+            ("GET", "/user/info"): self._user_info,
+            ("POST", "/contribute/article/update"): self._update_article,
+        }
+    
+    @property
+    def base_url(self) -> str:
+        """客户端使用的基础URL"""
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+    
+    def sleep(self):
+        """模拟服务端处理耗时"""
+        with self._lock:
+            delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+    
+    def should_fail(self) -> bool:
+        """按错误率决定是否注入错误"""
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+    
+    def count(self, path: str, outcome: str):
+        """累计请求统计"""
+        with self._lock:
+            counts = self._counts.setdefault(path, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+    
+    def record_headers(self, path: str, headers: Any):
+        """记录最近一次请求的请求头"""
+        with self._lock:
+            self.last_headers[path] = dict(headers)
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各接口请求统计"""
+        with self._lock:
+            return {path: dict(counts) for path, counts in self._counts.items()}
+    
+    def _padding(self) -> str:
+        """响应填充内容"""
+        return "x" * self.payload_bytes
+    
+    def _login(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data.get("account") or not data.get("password"):
+            return {"code": 0, "msg": "账号或密码为空"}
+        return {"code": 1, "msg": "登录成功", "data": {"access_token": MOCK_TOKEN, "expires_in": 86400}}
+    
+    def _like(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"code": 1, "msg": "点赞成功", "data": {"id": data.get("id"), "type": data.get("type"), "extra": self._padding()}}
+    
+    def _user_info(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"code": 1, "msg": "", "data": {"uid": 1, "name": "benchmark", "sign": self._padding()}}
+    
+    def _update_article(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data.get("title") or not data.get("content"):
+            return {"code": 0, "msg": "标题或内容为空"}
+        with self._lock:
+            self._article_id += 1
+            article_id = data.get("contribute_id") or self._article_id
+        return {"code": 1, "msg": "保存成功", "data": {"id": article_id, "extra": self._padding()}}
+    
+    def start(self) -> "MockMFunsServer":
+        """在后台线程中启动"""
+        self._server = _MockHTTPServer((self.host, self.port), _MockHandler)
+        self._server.mock = self
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name="mock-mfuns", daemon=True).start()
+        logger.info(f"模拟服务器已启动: {self.base_url}")
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口：单独运行模拟服务器"""
+    parser = argparse.ArgumentParser(description="本地模拟 MFuns API 服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="固定延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动（毫秒，±）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的比例 (0~1)")
+    parser.add_argument("--payload", type=int, default=0, help="响应中额外填充的字节数")
+    
+    args = parser.parse_args(argv)
+    server = MockMFunsServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.payload).start()
+    print(f"模拟服务器: {server.base_url}  (账号密码任意，Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats(), ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+# benchmark/runner.py
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录内存峰值
+    resource = None
+
+from config import Config
+from api_manager import APIManager
+from mfuns_client import MFunsClient
+from benchmark.mock_server import MockMFunsServer
+from utils.metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS = Path("benchmark_results.jsonl")
+
+def _ok(result: Dict[str, Any]) -> bool:
+    """接口调用是否成功（HTTP 200 且 code == 1）"""
+    return bool(result.get("success")) and (result.get("data") or {}).get("code") == 1
+
+class BenchEnv:
+    """一次基准测试的运行环境：已登录的客户端、API管理器和文章内容"""
+    
+    def __init__(self, base_url: str):
+        self.client = MFunsClient(base_url=base_url)
+        self.manager = APIManager(self.client)
+        if not self.client.login("benchmark", "benchmark"):
+            raise RuntimeError(f"登录模拟服务器失败: {base_url}")
+        
+        article = Config.BASE_DIR / "ai.json"
+        self.article_content = article.read_text(encoding='utf-8') if article.exists() else '{"ops":[{"insert":"benchmark\\n"}]}'
+
+# 场景: 名称 -> (类型, 调用函数, 说明)；调用函数返回是否成功
+SCENARIOS: Dict[str, tuple] = {
+    "login": (
+        "sync", lambda env, i: env.client.login("benchmark", "benchmark"),
+        "登录（POST /auth/login）"
+    ),
+    "like": (
+        "sync", lambda env, i: _ok(env.client.content.like(i, 0)),
+        "点赞（POST /like/like）"
+    ),
+    "user_info": (
+        "sync", lambda env, i: _ok(env.client.user.get_user_info()),
+        "获取用户信息（GET /user/info，受响应缓存影响）"
+    ),
+    "publish": (
+        "sync", lambda env, i: _ok(env.client.content_publishing.update_article(f"基准测试 {i}", 44, env.article_content)),
+        "发布文章（POST /contribute/article/update，ai.json内容）"
+    ),
+    "api_manager": (
+        "sync", lambda env, i: bool(env.manager.execute_api("内容模块", 0, target_id=i)["result"]["success"]),
+        "通过 APIManager.execute_api 点赞"
+    ),
+    "like_async": (
+        "async", lambda env, i: env.client.content.like_async(i, 0),
+        "异步点赞（aiohttp）"
+    ),
+}
+
+def _percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    """延迟分位数（毫秒）"""
+    result = {}
+    for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)):
+        value = percentile(latencies, p)
+        result[name] = round(value, 3) if value is not None else None
+    result["avg"] = round(sum(latencies) / len(latencies), 3) if latencies else None
+    return result
+
+def _max_rss_mb() -> Optional[float]:
+    """进程内存峰值（MB）"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+def _run_sync(func: Callable, env: BenchEnv, indexes: range, concurrency: int) -> List[tuple]:
+    """线程池并发执行同步调用，返回 (耗时毫秒, 是否成功) 列表"""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            ok = func(env, i)
+        except Exception as e:
+            logger.warning(f"调用异常: {e}")
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(timed, indexes))
+
+def _run_async(func: Callable, env: BenchEnv, indexes: range, concurrency: int) -> List[tuple]:
+    """asyncio 并发执行异步调用"""
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def timed(i):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    ok = _ok(await func(env, i))
+                except Exception as e:
+                    logger.warning(f"调用异常: {e}")
+                    ok = False
+                return (time.perf_counter() - start) * 1000, ok
+        
+        try:
+            return await asyncio.gather(*(timed(i) for i in indexes))
+        finally:
+            await env.client.aclose()
+    
+    return asyncio.run(main())
+
+def run_scenario(name: str, env: BenchEnv, requests: int, concurrency: int, warmup: int = 0) -> Dict[str, Any]:
+    """运行一个场景并返回结果"""
+    kind, func, _ = SCENARIOS[name]
+    runner = _run_async if kind == "async" else _run_sync
+    
+    if warmup:
+        runner(func, env, range(warmup), concurrency)
+    
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    samples = runner(func, env, range(warmup, warmup + requests), concurrency)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    
+    latencies = [latency for latency, _ in samples]
+    succeeded = sum(1 for _, ok in samples if ok)
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "succeeded": succeeded,
+        "failed": requests - succeeded,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(requests / wall, 2) if wall else None,
+        "latency_ms": _percentiles(latencies),
+        "cpu_s": round(cpu, 4),
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 4) if requests else None,
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+def _git_commit() -> Optional[str]:
+    """当前代码版本（不是git仓库时为None）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Config.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _isolate(workdir: Path, rate_limit: bool, guard: bool = False):
+    """token、日志和抓包数据写到临时目录，默认关闭客户端限速和熔断/并发隔离"""
+    Config.DATA_DIR = workdir
+    Config.LOGS_DIR = workdir / "logs"
+    Config.TOKENS_DIR = workdir / "tokens"
+    Config.TOKEN_DB_PATH = Config.TOKENS_DIR / "tokens.db"
+    Config.RESPONSES_DIR = workdir / "responses"
+    Config.CAPTURE_DB_PATH = workdir / "captures.db"
+    Config.RATE_LIMIT_ENABLED = rate_limit
+    Config.ENDPOINT_GUARD_ENABLED = guard
+    Config.init_dirs()
+
+def run(args) -> int:
+    """运行基准测试并追加结果"""
+    scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"未知场景: {', '.join(unknown)}，可用: {', '.join(SCENARIOS)}", file=sys.stderr)
+        return 2
+    
+    _isolate(Path(tempfile.mkdtemp(prefix="mfuns_bench_")), args.rate_limit, args.guard)
+    
+    server = None
+    if args.server:
+        base_url = args.server
+        server_config = {"url": base_url}
+    else:
+        server = MockMFunsServer(
+            latency_ms=args.latency, jitter_ms=args.jitter, error_rate=args.error_rate,
+            payload_bytes=args.payload, seed=args.seed
+        ).start()
+        base_url = server.base_url
+        server_config = {
+            "in_process": True, "latency_ms": args.latency, "jitter_ms": args.jitter,
+            "error_rate": args.error_rate, "payload_bytes": args.payload,
+        }
+    
+    meta = {
+        "timestamp": time.time(),
+        "label": args.label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "server": server_config,
+        "rate_limit": args.rate_limit,
+        "guard": args.guard,
+    }
+    
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        for name in scenarios:
+            env = BenchEnv(base_url)
+            result = {**meta, **run_scenario(name, env, args.requests, args.concurrency, args.warmup)}
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            latency = result["latency_ms"]
+            print(
+                f"{name:<12} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50 {latency['p50']:>8.2f}ms  p95 {latency['p95']:>8.2f}ms  p99 {latency['p99']:>8.2f}ms  "
+                f"失败 {result['failed']:>4}  CPU {result['cpu_ms_per_request']:.3f}ms/req"
+            )
+    finally:
+        if server:
+            server.stop()
+    
+    print(f"结果已追加到 {output}")
+    return 0
+
+def compare(args) -> int:
+    """按场景对比各标签（同一标签取最近一次）的结果"""
+    latest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    with open(args.results, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = record.get("label") or record.get("commit") or "-"
+            latest.setdefault(record["scenario"], {})[label] = record
+    
+    for scenario, by_label in latest.items():
+        if args.scenario and scenario not in args.scenario:
+            continue
+        print(f"\n{scenario}")
+        print(f"  {'标签':<16}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'CPU/req':>10}{'RSS MB':>9}")
+        baseline = None
+        for label, record in by_label.items():
+            latency = record["latency_ms"]
+            change = ""
+            if baseline is None:
+                baseline = record
+            elif baseline["throughput_rps"]:
+                change = f"  ({(record['throughput_rps'] / baseline['throughput_rps'] - 1) * 100:+.1f}%)"
+            print(
+                f"  {label:<16}{record['throughput_rps']:>10.1f}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+                f"{latency['p99']:>10.2f}{record['cpu_ms_per_request']:>10.3f}{record['max_rss_mb'] or 0:>9.1f}{change}"
+            )
+    return 0
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="MFuns 客户端基准测试（本地模拟服务器）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("scenarios", nargs="*", help=f"场景（默认全部）: {', '.join(SCENARIOS)}")
+    run_parser.add_argument("-n", "--requests", type=int, default=500, help="每个场景的请求数")
+    run_parser.add_argument("-c", "--concurrency", type=int, default=Config.BULK_CONCURRENCY, help="并发数")
+    run_parser.add_argument("--warmup", type=int, default=20, help="预热请求数（不计入结果）")
+    run_parser.add_argument("--latency", type=float, default=5.0, help="模拟服务器延迟（毫秒）")
+    run_parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动（毫秒）")
+    run_parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务器返回503的比例")
+    run_parser.add_argument("--payload", type=int, default=0, help="响应填充字节数")
+    run_parser.add_argument("--seed", type=int, default=42, help="随机种子（错误注入和抖动可复现）")
+    run_parser.add_argument("--server", help="使用外部服务器（如单独运行的 benchmark.mock_server），CPU统计不含服务端")
+    run_parser.add_argument("--rate-limit", action="store_true", help="保留客户端限速（默认关闭）")
+    run_parser.add_argument("--guard", action="store_true", help="保留熔断和并发隔离（默认关闭）")
+    run_parser.add_argument("--label", default="", help="结果标签，例如 baseline / retry-v2")
+    run_parser.add_argument("-o", "--output", default=str(DEFAULT_RESULTS), help="结果JSONL文件（追加）")
+    
+    compare_parser = subparsers.add_parser("compare", help="对比结果")
+    compare_parser.add_argument("results", nargs="?", default=str(DEFAULT_RESULTS), help="结果JSONL文件")
+    compare_parser.add_argument("--scenario", nargs="*", help="只显示这些场景")
+    
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# benchmark/startup.py
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Any, Optional, Tuple
+
+from config import Config
+from benchmark.runner import _git_commit
+
+DEFAULT_RESULTS = Path("startup_results.jsonl")
+
+# 默认测量的入口模块
+DEFAULT_MODULES = ("main", "services.headless_runner", "services.daemon", "api_manager", "mfuns_client")
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """解析 -X importtime 输出，返回 [(模块, 自身微秒, 累计微秒, 层级)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), level))
+        except ValueError:
+            continue
+    return entries
+
+def measure(module: str) -> Dict[str, Any]:
+    """在新的解释器中导入一次模块，返回总耗时、导入耗时和最慢的直接依赖"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=Config.BASE_DIR, capture_output=True, text=True, env=env
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr.strip()[-1000:]}")
+    
+    entries = parse_importtime(completed.stderr)
+    total = next((e for e in reversed(entries) if e[0] == module and e[3] == 0), None)
+    # 目标模块之前、层级为1的条目是它的直接依赖
+    index = entries.index(total) if total else len(entries)
+    children = [e for e in entries[:index] if e[3] == 1]
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": total[2] / 1000 if total else None,
+        "modules": len(entries),
+        "children": sorted(((name, cumulative / 1000) for name, _, cumulative, _ in children), key=lambda c: -c[1]),
+    }
+
+def run(args) -> int:
+    """测量各入口模块的启动耗时并追加结果"""
+    meta = {
+        "timestamp": time.time(),
+        "label": args.label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    
+    for module in args.modules or DEFAULT_MODULES:
+        samples = [measure(module) for _ in range(args.runs)]
+        imports = [s["import_ms"] for s in samples if s["import_ms"] is not None]
+        walls = [s["wall_ms"] for s in samples]
+        result = {
+            **meta,
+            "module": module,
+            "runs": args.runs,
+            "import_ms": round(median(imports), 2) if imports else None,
+            "import_min_ms": round(min(imports), 2) if imports else None,
+            "wall_ms": round(median(walls), 2),
+            "modules_loaded": samples[-1]["modules"],
+            "top_imports": [[name, round(ms, 2)] for name, ms in samples[-1]["children"][:args.top]],
+        }
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        
+        print(
+            f"{module:<28} 导入 {result['import_ms'] or 0:>8.2f}ms  进程 {result['wall_ms']:>8.2f}ms  "
+            f"模块数 {result['modules_loaded']}"
+        )
+        for name, ms in result["top_imports"]:
+            print(f"    {name:<36}{ms:>9.2f}ms")
+    
+    print(f"结果已追加到 {output}")
+    return 0
+
+def compare(args) -> int:
+    """按模块对比各标签（同一标签取最近一次）的启动耗时"""
+    latest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    with open(args.results, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = record.get("label") or record.get("commit") or "-"
+            latest.setdefault(record["module"], {})[label] = record
+    
+    for module, by_label in latest.items():
+        print(f"\n{module}")
+        print(f"  {'标签':<16}{'导入ms':>10}{'进程ms':>10}{'模块数':>8}")
+        baseline = None
+        for label, record in by_label.items():
+            change = ""
+            if baseline is None:
+                baseline = record
+            elif baseline["import_ms"] and record["import_ms"] is not None:
+                change = f"  ({(record['import_ms'] / baseline['import_ms'] - 1) * 100:+.1f}%)"
+            print(
+                f"  {label:<16}{record['import_ms'] or 0:>10.2f}{record['wall_ms']:>10.2f}"
+                f"{record['modules_loaded']:>8}{change}"
+            )
+    return 0
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="启动耗时基准测试（python -X importtime）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="测量启动耗时")
+    run_parser.add_argument("modules", nargs="*", help=f"入口模块（默认: {', '.join(DEFAULT_MODULES)}）")
+    run_parser.add_argument("-n", "--runs", type=int, default=5, help="每个模块测量次数（取中位数）")
+    run_parser.add_argument("--top", type=int, default=8, help="显示最慢的直接依赖数量")
+    run_parser.add_argument("--label", default="", help="结果标签，例如 eager / lazy")
+    run_parser.add_argument("-o", "--output", default=str(DEFAULT_RESULTS), help="结果JSONL文件（追加）")
+    
+    compare_parser = subparsers.add_parser("compare", help="对比结果")
+    compare_parser.add_argument("results", nargs="?", default=str(DEFAULT_RESULTS), help="结果JSONL文件")
+    
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
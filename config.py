@@ -37,13 +37,131 @@ class Config:
     }
     
     # 请求配置
-    DEFAULT_TIMEOUT = 30
+    DEFAULT_TIMEOUT = 30  # 默认读超时（秒）
+    CONNECT_TIMEOUT = 5  # 默认连接超时（秒）
+    TIMEOUTS = {}  # 按接口路径覆盖 (连接超时, 读超时)，默认取接口声明
+    # 总时限（含限速排队、并发等待、重试和退避），0表示不限
+    API_DEADLINE = 60  # APIManager 执行单个API
+    SWEEP_DEADLINE = 15  # 测试所有API（健康检查）时每个API
+    BATCH_ITEM_DEADLINE = 60  # 批量点赞/发布的每一项
+    # 响应体分块读取，超过上限时放弃读取并关闭连接（按解压后字节数），0表示不限
+    MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+    RESPONSE_CHUNK_SIZE = 64 * 1024
+    RAW_TEXT_LIMIT = 1000  # 非JSON响应（如HTML错误页）在结果和日志中保留的字节数
     RETRY_TIMES = 3
-    MAX_RETRIES = 3
+    MAX_RETRIES = 3  # 单个请求最多尝试次数（含首次）
+    
+    # 重试策略配置
+    RETRY_BASE_DELAY = 0.5  # 指数退避基准秒数（全抖动: 0 ~ base * 2^n）
+    RETRY_MAX_DELAY = 8.0  # 单次退避上限
+    RETRY_AFTER_MAX = 30.0  # 服务器Retry-After最多等待秒数
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    # 额外可以安全重发的POST接口（GET默认幂等；接口的幂等性在 apis/endpoints.py 中声明）
+    IDEMPOTENT_ENDPOINTS = ()
+    # 全局重试预算: 每个请求积累 ratio 个重试令牌，另外每秒保底补充 min_per_second 个
+    RETRY_BUDGET_RATIO = 0.2
+    RETRY_BUDGET_MIN_PER_SECOND = 1.0
+    RETRY_BUDGET_CAPACITY = 20.0
+    
+    # 按接口的熔断和并发隔离（bulkhead）
+    ENDPOINT_GUARD_ENABLED = True
+    CIRCUIT_FAILURE_THRESHOLD = 5  # 连续失败（连接失败/超时/5xx）次数达到后熔断，0表示不熔断
+    CIRCUIT_RESET_TIMEOUT = 30.0  # 熔断后冷却秒数，之后放行探测请求
+    CIRCUIT_HALF_OPEN_MAX = 1  # 半开状态同时放行的探测请求数
+    CIRCUIT_BREAKERS = {}  # 按接口路径覆盖 (失败阈值, 冷却秒数)
+    BULKHEAD_DEFAULT_LIMIT = 32  # 每个接口同时进行的请求数上限，0表示不限（接口声明的 max_concurrent 优先）
+    BULKHEAD_LIMITS = {}  # 按接口路径覆盖并发上限
+    BULKHEAD_MAX_WAIT = 5.0  # 并发已满时最多等待秒数，超时则拒绝
+    
+    # token存储配置
+    TOKEN_STORE = "sqlite"  # sqlite: 单个数据库文件（首次使用时迁移旧版json文件） / file: 每个账号一个json文件
+    TOKEN_DB_PATH = TOKENS_DIR / "tokens.db"
+    TOKEN_CACHE_TTL = 1.0  # 内存中的token超过该秒数后重新从存储读取（看到其它进程的更新）
+    
+    # token生命周期配置
+    AUTH_FAILURE_CODES = (-1,)  # 表示token无效/未登录的业务码（HTTP 401 也视为token无效）
+    TOKEN_TTL = 0  # 登录响应和token本身都没有过期时间时使用的有效期（秒），0表示未知
+    TOKEN_REFRESH_MARGIN = 300  # 距过期不足该秒数时后台重新登录
+    TOKEN_VALIDATE_INTERVAL = 600  # 后台校验token的间隔（秒，通过只读接口 /user/info）
+    TOKEN_REFRESH_COOLDOWN = 30  # 重新登录失败后，该秒数内不再重试（避免失效token引发的登录风暴）
+    TOKEN_CREDENTIALS_ENV = ("MFUNS_ACCOUNT", "MFUNS_PASSWORD")  # 可从环境变量读取重新登录用的账号密码
+    
+    # 请求体编码配置（POST）
+    REQUEST_COMPRESSION = ""  # 请求体压缩: "" 不压缩 / gzip / deflate（服务器返回415时自动改为不压缩）
+    REQUEST_COMPRESSION_MIN_BYTES = 1024  # 小于该字节数的请求体不压缩
+    REQUEST_COMPRESSION_LEVEL = 6
+    
+    # 异步请求配置（连接池）
+    ASYNC_POOL_SIZE = 100  # 连接池总连接数上限
+    ASYNC_PER_HOST_LIMIT = 32  # 单主机并发连接数上限
+    ASYNC_KEEPALIVE_TIMEOUT = 30  # 空闲keep-alive连接保留秒数
+    
+    # 客户端限速配置（令牌桶: (每秒速率, 突发容量)）
+    RATE_LIMIT_ENABLED = True
+    # 限速类别，接口在 apis/endpoints.py 中声明所属类别（每个接口单独一个令牌桶）
+    RATE_CLASSES = {
+        "interaction": (5, 5),  # 点赞等互动
+        "write": (1, 2),  # 发布/更新内容
+        "login": (0.2, 2),
+    }
+    RATE_LIMITS = {}  # 按接口路径覆盖限速，如 {"/like/like": (2, 2)}
+    ACCOUNT_RATE_LIMIT = (10, 10)  # 每个已登录账号的总速率，None表示不限
+    RATE_LIMIT_AGING_SECONDS = 5.0  # bulk通道每等待这么久提升一级优先级
+    RATE_LIMIT_POLL_INTERVAL = 0.05  # 排队时的最长轮询间隔（秒）
+    
+    # GET响应缓存配置（POST请求不缓存）
+    CACHE_ENABLED = True
+    CACHE_MAX_BYTES = 16 * 1024 * 1024  # 缓存占用内存上限（按响应体字节数计）
+    CACHE_DEFAULT_TTL = 0  # 未单独配置的GET接口缓存秒数，0表示不缓存
+    CACHE_TTLS = {}  # 按接口路径覆盖缓存秒数（默认取接口声明的 cache_ttl）
+    
+    # 合并相同的进行中幂等请求（方法、URL、参数、请求体和账号都相同时只发一次）
+    SINGLE_FLIGHT_ENABLED = True
+    
+    # 分页遍历配置（services/paginator.py）
+    PAGE_SIZE = 20  # 初始每页条数
+    PAGE_SIZE_MIN = 5
+    PAGE_SIZE_MAX = 100
+    PAGE_PREFETCH = 2  # 处理当前页时预取的页数
+    PAGE_TARGET_SECONDS = 1.0  # 单页耗时目标：明显更快时加大每页条数，更慢时减小
+    
+    # 多账号会话池配置
+    SESSION_POOL_STRATEGY = "round_robin"  # round_robin / least_loaded / sticky
+    
+    # 批处理（批量点赞/批量发布）配置
+    BULK_CONCURRENCY = 8
+    
+    # 批量测试配置
+    SWEEP_CONCURRENCY = 8  # 测试所有API时的并发线程数
     
     # 日志配置
     LOG_LEVEL = logging.DEBUG
     
+    # 请求/响应日志写入配置（后台批量写入JSONL分段）
+    LOG_QUEUE_SIZE = 10000  # 待写入队列上限
+    LOG_QUEUE_FULL_POLICY = "drop"  # 队列满时: drop=丢弃, block=阻塞等待
+    LOG_BATCH_SIZE = 256  # 每批最多写入条数
+    LOG_FLUSH_INTERVAL = 0.5  # 空闲时刷新间隔（秒）
+    LOG_SEGMENT_MAX_BYTES = 64 * 1024 * 1024  # 单个分段文件大小上限
+    LOG_COMPRESS = False  # 是否gzip压缩分段文件
+    
+    # 请求历史存储（带索引的SQLite，可用 python -m services.capture_store 查询）
+    CAPTURE_ENABLED = True
+    CAPTURE_DB_PATH = DATA_DIR / "captures.db"
+    
+    # 指标配置
+    METRICS_ENABLED = True
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9464  # 指标导出端口（/metrics 为Prometheus文本格式，/metrics.json 为JSON快照）
+    METRICS_WINDOW = 2048  # 计算分位数时保留的最近样本数（每个序列）
+    METRICS_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+    
+    # 常驻服务配置（python -m services.daemon）
+    DAEMON_HOST = "127.0.0.1"
+    DAEMON_PORT = 8766
+    DAEMON_AUTH_TOKEN = os.environ.get("MFUNS_DAEMON_TOKEN", "")  # 设置后请求需带 X-Daemon-Token 头
+    DAEMON_MAX_BODY_BYTES = 8 * 1024 * 1024
+    
     @classmethod
     def init_dirs(cls):
         """初始化目录结构"""
@@ -1,7 +1,9 @@
 # main.py
 import sys
 import os
+import json
 import logging
+import argparse
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -10,19 +12,23 @@ from config import Config
 from api_manager import APIManager
 from ui.manager import UIManager
 from params.collector_factory import ParamCollectorFactory
+from services.api_sweeper import APISweeper
+from utils.metrics import MetricsExporter
 
 class MainApp:
     """主应用程序"""
     
-    def __init__(self):
+    def __init__(self, concurrency: int = Config.SWEEP_CONCURRENCY):
         self.ui = UIManager()
         self.api_manager = APIManager()
+        self.concurrency = concurrency
         self.logger = None
     
     def setup_environment(self):
         """设置环境"""
         Config.init_dirs()
         self.logger = Config.setup_logging()
+        self.api_manager.client.token_lifecycle.start()
         
         self.ui.display_header("MFuns API 测试管理器")
     
@@ -95,30 +101,20 @@ class MainApp:
         
         self.ui.display_header("开始测试所有API")
         
-        modules = self.api_manager.list_api_modules()
-        
-        for module_name in modules:
-            print(f"\n测试模块: {module_name}")
-            print("-" * 30)
-            
-            apis = self.api_manager.list_apis_in_module(module_name)
-            for i, (api_name, api_desc) in enumerate(apis):
-                print(f"  {i+1}. {api_name}...", end=" ")
-                
-                # 跳过需要用户输入的API
-                param_collector = ParamCollectorFactory.get_collector(api_name)
-                if param_collector.needs_input():
-                    print("跳过（需要参数）")
-                    continue
-                
-                result = self.api_manager.execute_api(module_name, i)
-                if result["success"]:
-                    print("成功")
-                else:
-                    print(f"失败: {result.get('message', '')}")
+        report = APISweeper(self.api_manager, self.concurrency).run()
+        self.ui.display_sweep_report(report)
         
         print("\n所有API测试完成")
     
+    def run_sweep(self) -> int:
+        """非交互模式测试所有API（健康检查），输出JSON报告并返回退出码"""
+        Config.init_dirs()
+        self.logger = Config.setup_logging()
+        
+        report = APISweeper(self.api_manager, self.concurrency).run()
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0 if report["failed"] == 0 else 1
+    
     def run(self):
         """运行应用程序"""
         try:
@@ -140,5 +136,20 @@ class MainApp:
             logging.exception("程序出错")
 
 if __name__ == "__main__":
-    app = MainApp()
+    parser = argparse.ArgumentParser(description="MFuns API 测试管理器")
+    parser.add_argument("--sweep", action="store_true",
+                       help="非交互模式测试所有API并输出JSON报告")
+    parser.add_argument("--concurrency", type=int, default=Config.SWEEP_CONCURRENCY,
+                       help="测试所有API时的并发数")
+    parser.add_argument("--metrics-port", type=int, nargs="?", const=Config.METRICS_PORT, default=None,
+                       help=f"在本地端口导出指标（/metrics、/metrics.json），默认端口 {Config.METRICS_PORT}")
+    
+    args = parser.parse_args()
+    
+    if args.metrics_port is not None:
+        MetricsExporter(port=args.metrics_port).start()
+    
+    app = MainApp(concurrency=args.concurrency)
+    if args.sweep:
+        sys.exit(app.run_sweep())
     app.run()
\ No newline at end of file
@@ -1,56 +1,127 @@
 # mfuns_client.py
 import logging
+import importlib
+from typing import Dict, Any, Optional
+from config import Config
 from services.token_service import TokenService
+from services.token_lifecycle import TokenLifecycle
 from utils.request_handler import RequestHandler
-from apis.auth import AuthAPI
-from apis.contentAccess import ContentAccessAPI
-from apis.user import UserAPI
-from apis.ContentPublishing import ContentPublishingAPI
+from utils.async_request_handler import AsyncRequestHandler
 
 logger = logging.getLogger(__name__)
 
+# API模块: 属性名 -> (模块, 类名, 是否需要token管理)，首次访问时才导入和创建
+_API_MODULES = {
+    "auth": ("apis.auth", "AuthAPI", True),
+    "content": ("apis.contentAccess", "ContentAccessAPI", False),
+    "user": ("apis.user", "UserAPI", False),
+    "content_publishing": ("apis.ContentPublishing", "ContentPublishingAPI", False),
+}
+
 class MFunsClient:
     """MFuns客户端"""
     
-    def __init__(self):
-        # 初始化组件
-        self.token_manager = TokenService()
-        self.request_handler = RequestHandler()
+    def __init__(
+        self,
+        token_name: str = "mfuns",
+        token_manager: Optional[TokenService] = None,
+        base_url: str = Config.MFUNS_BASE_URL
+    ):
+        # 初始化组件（每个客户端有独立的session/连接池，token_manager可在多个客户端间共享）
+        self.token_name = token_name
+        self.token_manager = token_manager or TokenService()
+        self.request_handler = RequestHandler(base_url)
+        self.async_request_handler = AsyncRequestHandler(base_url)
+        # API模块（auth、content等）在首次访问时创建，见 __getattr__
         
-        # 初始化API模块
-        self.auth = AuthAPI(self.request_handler, self.token_manager)
-        self.content = ContentAccessAPI(self.request_handler)
-        self.user = UserAPI(self.request_handler)
-        self.content_publishing = ContentPublishingAPI(self.request_handler)
+        # token过期跟踪、校验和自动刷新（请求遇到token失效时刷新后重发一次）
+        self.token_lifecycle = TokenLifecycle(self)
+        self.request_handler.auth_refresher = self.token_lifecycle.on_auth_failure
+        self.async_request_handler.auth_refresher = self.token_lifecycle.on_auth_failure
+        if self.request_handler.metrics:
+            self.request_handler.metrics.register_collector("token", self.token_lifecycle)
         
         # 如果有保存的token，自动设置
         self._load_saved_token()
     
+    def __getattr__(self, name: str):
+        """按需创建API模块（auth、content、user、content_publishing）"""
+        spec = _API_MODULES.get(name)
+        if spec is None:
+            raise AttributeError(f"{type(self).__name__} 没有属性 {name}")
+        
+        module_name, class_name, needs_token = spec
+        api_class = getattr(importlib.import_module(module_name), class_name)
+        if needs_token:
+            api = api_class(self.request_handler, self.token_manager, self.async_request_handler, self.token_name)
+        else:
+            api = api_class(self.request_handler, self.async_request_handler)
+        # 保存为实例属性，之后的访问不再经过 __getattr__
+        setattr(self, name, api)
+        return api
+    
     def _load_saved_token(self):
         """加载保存的token"""
-        token = self.token_manager.get_token("mfuns")
+        token = self.token_manager.get_token(self.token_name)
         if token:
             self.request_handler.set_auth_token(token)
+            self.async_request_handler.set_auth_token(token)
             logger.info("已自动加载保存的token")
     
     def is_logged_in(self) -> bool:
-        """检查是否已登录"""
-        return self.token_manager.has_valid_token("mfuns")
+        """
+        检查是否已登录（只检查本地token，不发请求）
+        token已过期但记得账号密码时也算已登录：请求遇到token失效时由 on_auth_failure
+        重新登录后重发，或由后台检查线程提前刷新
+        """
+        if self.token_manager.has_valid_token(self.token_name):
+            return True
+        return bool(self.token_manager.get_token(self.token_name)) and self.token_lifecycle.can_refresh
     
     def login(self, account: str, password: str) -> bool:
         """登录"""
-        return self.auth.login(account, password)
+        success = self.auth.login(account, password)
+        if success:
+            self.token_lifecycle.set_credentials(account, password)
+        return success
+    
+    async def login_async(self, account: str, password: str) -> bool:
+        """登录（异步）"""
+        success = await self.auth.login_async(account, password)
+        if success:
+            self.token_lifecycle.set_credentials(account, password)
+        return success
+    
+    def call(self, endpoint: str, **params) -> Dict[str, Any]:
+        """按 apis/endpoints.py 中的接口声明发送请求"""
+        from apis.endpoints import call
+        return call(self.request_handler, endpoint, **params)
+    
+    async def call_async(self, endpoint: str, **params) -> Dict[str, Any]:
+        """按接口声明发送请求（异步）"""
+        from apis.endpoints import call_async
+        return await call_async(self.async_request_handler, endpoint, **params)
+    
+    def validate_token(self, force: bool = False) -> Optional[bool]:
+        """通过只读接口校验token是否有效（无法判断时返回None）"""
+        return self.token_lifecycle.validate(force)
+    
+    async def aclose(self):
+        """关闭异步连接池"""
+        await self.async_request_handler.close()
     
     def logout(self) -> bool:
         """登出"""
-        # 清除token
-        self.token_manager.clear_token("mfuns")
+        # 清除token（不再自动重新登录）
+        self.token_lifecycle.clear_credentials()
+        self.token_manager.clear_token(self.token_name)
         self.request_handler.remove_auth_token()
+        self.async_request_handler.remove_auth_token()
         logger.info("已登出")
         return True
     
     def test_token_with_like(self, target_id: int = 113180) -> bool:
-        """通过点赞测试token是否有效"""
+        """通过点赞测试token是否有效（会真的点赞，校验token请用 validate_token）"""
         if not self.is_logged_in():
             return False
         
@@ -1,5 +1,6 @@
 from typing import Dict, Any
 from params.collectors import BaseParamCollector
+from utils import delta
 
 class UpdateArticleParamCollector(BaseParamCollector):
     """更新文章参数收集器"""
@@ -23,6 +24,13 @@ class UpdateArticleParamCollector(BaseParamCollector):
         params["cid"] = int(cid)
         
         content = input("文章内容 (JSON格式，按Enter使用默认): ").strip()
+        while content:
+            try:
+                content = delta.normalize(content)
+                break
+            except delta.DeltaError as e:
+                print(f"内容格式错误: {e}")
+                content = input("文章内容 (JSON格式，按Enter使用默认): ").strip()
         if content:
             params["content"] = content
         else:
@@ -1,53 +1,63 @@
 # params/collector_factory.py
-from typing import Dict
+import importlib
+from typing import Dict, Union
 from params.collectors import BaseParamCollector
-from params.no_param_collector import NoParamCollector
-from params.login_collector import LoginParamCollector
-from params.like_collector import LikeParamCollector
-from params.article_params import (
-    UpdateArticleParamCollector, 
-    GetArticleParamCollector, 
-    ListArticlesParamCollector
-)
+from apis.endpoints import ENDPOINTS, find_by_title
+
+# 收集器规格: "模块:类名"，首次使用时才导入并创建
+_NO_PARAM = "params.no_param_collector:NoParamCollector"
+_ENDPOINT = "params.endpoint_collector:EndpointParamCollector"
+
+def _endpoint_collector(endpoint) -> str:
+    """接口声明的收集器：声明了收集器用声明的，否则按参数生成提示"""
+    return endpoint.collector or (_ENDPOINT if endpoint.params else _NO_PARAM)
 
 class ParamCollectorFactory:
     """参数收集器工厂"""
     
-    # 默认收集器映射
-    _collector_mapping = {
-        # 认证模块
-        "登录": LoginParamCollector(),
-        "登出": NoParamCollector(),
-        "检查登录状态": NoParamCollector(),
-        
-        # 内容模块
-        "点赞": LikeParamCollector(),
-        "取消点赞": LikeParamCollector(),
-        "获取点赞状态": LikeParamCollector(),
-        
-        # 用户模块
-        "获取用户信息": NoParamCollector(),
-        
-        # 文章模块
-        "更新文章": UpdateArticleParamCollector(),
-        "获取文章信息": GetArticleParamCollector(),
-        "获取文章列表": ListArticlesParamCollector(),
+    # 额外的收集器映射（值为收集器实例，或尚未导入的 "模块:类名"），
+    # 优先于 apis/endpoints.py 中接口声明的收集器
+    _collector_mapping: Dict[str, Union[BaseParamCollector, str]] = {
+        # 尚未声明接口的文章API
+        "获取文章信息": "params.article_params:GetArticleParamCollector",
+        "获取文章列表": "params.article_params:ListArticlesParamCollector",
     }
     
+    # 已创建的收集器（同一规格共用一个实例）
+    _instances: Dict[str, BaseParamCollector] = {}
+    
+    @classmethod
+    def _load(cls, spec: str) -> BaseParamCollector:
+        """按 "模块:类名" 导入并创建收集器"""
+        collector = cls._instances.get(spec)
+        if collector is None:
+            module_name, class_name = spec.split(":")
+            collector = getattr(importlib.import_module(module_name), class_name)()
+            cls._instances[spec] = collector
+        return collector
+    
     @classmethod
     def get_collector(cls, api_name: str) -> BaseParamCollector:
         """获取参数收集器"""
-        return cls._collector_mapping.get(api_name, NoParamCollector())
+        collector = cls._collector_mapping.get(api_name)
+        if collector is None:
+            endpoint = find_by_title(api_name)
+            collector = _endpoint_collector(endpoint) if endpoint else _NO_PARAM
+        if isinstance(collector, str):
+            collector = cls._load(collector)
+        return collector
     
     @classmethod
-    def register_collector(cls, api_name: str, collector: BaseParamCollector):
-        """注册新的参数收集器"""
+    def register_collector(cls, api_name: str, collector: Union[BaseParamCollector, str]):
+        """注册新的参数收集器（可以传 "模块:类名" 延迟导入）"""
         cls._collector_mapping[api_name] = collector
     
     @classmethod
     def list_collectors(cls) -> Dict[str, str]:
         """列出所有收集器"""
+        mapping = {e.title: _endpoint_collector(e) for e in ENDPOINTS.values() if e.module}
+        mapping.update(cls._collector_mapping)
         return {
-            api_name: type(collector).__name__
-            for api_name, collector in cls._collector_mapping.items()
-        }
\ No newline at end of file
+            api_name: collector.split(":")[1] if isinstance(collector, str) else type(collector).__name__
+            for api_name, collector in mapping.items()
+        }
@@ -0,0 +1,38 @@
+# params/endpoint_collector.py
+from typing import Dict, Any
+from params.collectors import BaseParamCollector
+from apis.endpoints import find_by_title
+
+class EndpointParamCollector(BaseParamCollector):
+    """按接口声明的参数逐个提示输入（没有专用收集器的接口使用）"""
+    
+    def collect(self, api_name: str) -> Dict[str, Any]:
+        endpoint = find_by_title(api_name)
+        if endpoint is None:
+            return {}
+        
+        print(f"\n{api_name} 参数设置:")
+        print("-" * 30)
+        
+        params = {}
+        for param in endpoint.params:
+            default = param.sample if param.required else param.default
+            label = param.description or param.name
+            hint = "必填" if default is None and param.required else f"默认: {default}"
+            while True:
+                value = input(f"{label} ({hint}): ").strip()
+                if not value:
+                    if param.required and default is None:
+                        print(f"{label}不能为空!")
+                        continue
+                    break
+                try:
+                    params[param.name] = param.convert(value)
+                    break
+                except ValueError as e:
+                    print(e)
+        
+        return params
+    
+    def needs_input(self) -> bool:
+        return True
@@ -0,0 +1,96 @@
+# services/api_sweeper.py
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+from config import Config
+from params.collector_factory import ParamCollectorFactory
+from utils.deadline import request_deadline
+
+logger = logging.getLogger(__name__)
+
+class APISweeper:
+    """API批量测试器（只读健康检查）- 用线程池并发执行所有API，结果顺序与菜单顺序一致"""
+    
+    # 会改变登录状态的API（登出会删除保存的token），健康检查不执行
+    SESSION_APIS = {"登录", "登出"}
+    
+    def __init__(self, api_manager, concurrency: int = Config.SWEEP_CONCURRENCY):
+        self.api_manager = api_manager
+        self.concurrency = max(1, concurrency)
+    
+    def collect_tasks(self) -> List[Dict[str, Any]]:
+        """按菜单顺序收集所有待测试的API"""
+        tasks = []
+        for module_name in self.api_manager.list_api_modules():
+            apis = self.api_manager.list_apis_in_module(module_name)
+            for index, (api_name, api_desc) in enumerate(apis):
+                skip = None
+                if api_name in self.SESSION_APIS:
+                    skip = "会改变登录状态"
+                elif ParamCollectorFactory.get_collector(api_name).needs_input():
+                    skip = "需要参数"
+                tasks.append({
+                    "module": module_name,
+                    "index": index,
+                    "api_name": api_name,
+                    "description": api_desc,
+                    "skip": skip
+                })
+        return tasks
+    
+    def _run_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """执行单个API并记录耗时"""
+        entry = {
+            "module": task["module"],
+            "api_name": task["api_name"],
+            "description": task["description"],
+        }
+        
+        if task["skip"]:
+            entry.update({"status": "skipped", "message": task["skip"], "latency_ms": 0.0})
+            return entry
+        
+        start = time.perf_counter()
+        # 每个API单独限时，一个接口变慢不会拖长整个健康检查
+        with request_deadline(Config.SWEEP_DEADLINE):
+            result = self.api_manager.execute_api(task["module"], task["index"])
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        api_result = result.get("result") or {}
+        success = result["success"] and api_result.get("success", True)
+        entry.update({
+            "status": "success" if success else "failed",
+            "message": api_result.get("message") or result.get("message", ""),
+            "latency_ms": round(latency_ms, 2)
+        })
+        return entry
+    
+    def run(self) -> Dict[str, Any]:
+        """执行全部API测试，返回汇总报告"""
+        tasks = self.collect_tasks()
+        
+        logger.info(f"开始测试 {len(tasks)} 个API，并发数: {self.concurrency}")
+        start = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # executor.map 按提交顺序返回结果，保证报告顺序确定
+            results = list(executor.map(self._run_task, tasks))
+        
+        wall_time_ms = (time.perf_counter() - start) * 1000
+        
+        report = {
+            "concurrency": self.concurrency,
+            "total": len(results),
+            "succeeded": sum(1 for r in results if r["status"] == "success"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "skipped": sum(1 for r in results if r["status"] == "skipped"),
+            "wall_time_ms": round(wall_time_ms, 2),
+            "results": results
+        }
+        logger.info(
+            f"API测试完成: 成功 {report['succeeded']}, 失败 {report['failed']}, "
+            f"跳过 {report['skipped']}, 总耗时 {report['wall_time_ms']}ms"
+        )
+        return report
@@ -0,0 +1,268 @@
+# services/batch_publisher.py
+import csv
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+from config import Config
+from mfuns_client import MFunsClient
+from services.batch_runner import Checkpoint, bounded_map
+from services.session_pool import SessionPool, SessionUnavailable
+from utils import delta
+from utils.deadline import request_deadline
+from utils.rate_limiter import request_lane
+
+logger = logging.getLogger(__name__)
+
+_TRUE_VALUES = ("1", "true", "yes", "y", "是")
+
+def read_manifest(path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """读取发布清单（.csv 或 JSONL），产出 (行号, 原始记录)"""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.suffix.lower() == ".csv":
+            # 第1行是表头
+            for line_no, row in enumerate(csv.DictReader(f), 2):
+                yield line_no, {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, {"_error": f"JSON格式错误: {e}"}
+
+class ArticleJob:
+    """一篇待发布的文章（已校验，内容已预先序列化）"""
+    
+    __slots__ = ("key", "line_no", "params")
+    
+    def __init__(self, key: str, line_no: int, params: Dict[str, Any]):
+        self.key = key
+        self.line_no = line_no
+        self.params = params
+
+def prepare_article(line_no: int, row: Dict[str, Any], base_dir: Path) -> ArticleJob:
+    """校验清单中的一行并预先序列化文章内容，格式错误抛出ValueError"""
+    if "_error" in row:
+        raise ValueError(row["_error"])
+    
+    title = str(row.get("title") or "").strip()
+    if not title:
+        raise ValueError("缺少标题")
+    
+    try:
+        cid = int(row.get("cid") or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"频道ID无效: {row.get('cid')}")
+    if cid <= 0:
+        raise ValueError("缺少频道ID")
+    
+    if row.get("content_file"):
+        content_path = Path(row["content_file"])
+        if not content_path.is_absolute():
+            content_path = base_dir / content_path
+        try:
+            raw_content = content_path.read_text(encoding='utf-8')
+        except OSError as e:
+            raise ValueError(f"读取内容文件失败: {e}")
+    elif row.get("content"):
+        raw_content = row["content"] if isinstance(row["content"], str) else json.dumps(row["content"])
+    else:
+        raise ValueError("缺少 content_file 或 content")
+    
+    # 校验并合并相邻同属性的op，紧凑序列化后发布时直接使用（DeltaError 是 ValueError；
+    # 返回的 NormalizedDelta 发送前不会再处理一遍）
+    content = delta.normalize(raw_content)
+    
+    copyright_value = int(row.get("copyright") or 2)
+    if copyright_value not in (1, 2, 3):
+        raise ValueError(f"版权类型无效: {copyright_value}")
+    
+    draft = row.get("draft", False)
+    if not isinstance(draft, bool):
+        draft = str(draft).strip().lower() in _TRUE_VALUES
+    
+    contribute_id = row.get("contribute_id")
+    contribute_id = int(contribute_id) if contribute_id not in (None, "") else None
+    
+    params = {
+        "title": title,
+        "cid": cid,
+        "content": content,
+        "cover": str(row.get("cover") or ""),
+        "tags": ",".join(row["tags"]) if isinstance(row.get("tags"), list) else str(row.get("tags") or ""),
+        "copyright": copyright_value,
+        "draft": draft,
+        "contribute_id": contribute_id,
+    }
+    
+    key = str(row.get("key") or contribute_id or f"{cid}:{title}")
+    return ArticleJob(key, line_no, params)
+
+def outcome_unknown(result: Dict[str, Any]) -> bool:
+    """
+    请求已发出但没有拿到响应（传输错误、超时），文章可能已经发布
+    
+    熔断/并发拒绝和超大响应都不算：前者没有发出请求，后者服务端已经响应。
+    """
+    if result.get("success") or result.get("rejected") or result.get("too_large"):
+        return False
+    return bool(result.get("deadline_exceeded")) or result.get("status_code") is None
+
+class BatchPublisher:
+    """
+    批量发布文章 - 逐行校验清单并流式交给有界并发发布，结果写入检查点
+    
+    结果未知（unknown）的文章可能已经发布，重新运行时默认不再发送，
+    需要 retry_unknown=True 显式重试。
+    """
+    
+    def __init__(
+        self,
+        output: Path,
+        concurrency: int = Config.BULK_CONCURRENCY,
+        client: Optional[MFunsClient] = None,
+        pool: Optional[SessionPool] = None,
+        retry_unknown: bool = False
+    ):
+        self.output = Path(output)
+        self.concurrency = concurrency
+        self.pool = pool
+        self.retry_unknown = retry_unknown
+        self.client = client if client or pool else MFunsClient()
+    
+    def iter_jobs(self, manifest: Path, errors: List[Dict[str, Any]]) -> Iterator[ArticleJob]:
+        """逐行校验清单，按需产出待发布任务，格式错误追加到 errors"""
+        manifest = Path(manifest)
+        seen = set()
+        valid = 0
+        
+        for line_no, row in read_manifest(manifest):
+            try:
+                job = prepare_article(line_no, row, manifest.parent)
+            except ValueError as e:
+                errors.append({"line": line_no, "error": str(e)})
+                continue
+            if job.key in seen:
+                errors.append({"line": line_no, "error": f"重复的key: {job.key}"})
+                continue
+            seen.add(job.key)
+            valid += 1
+            yield job
+        
+        logger.info(f"清单校验完成: {valid} 篇有效, {len(errors)} 个错误")
+    
+    def _publish(self, job: ArticleJob) -> Dict[str, Any]:
+        """发布单篇文章"""
+        start = time.perf_counter()
+        
+        try:
+            with request_lane("bulk"), request_deadline(Config.BATCH_ITEM_DEADLINE):
+                if self.pool:
+                    result = self.pool.call(
+                        lambda c: c.content_publishing.update_article(**job.params),
+                        key=job.key, strategy="sticky"
+                    )
+                else:
+                    result = self.client.content_publishing.update_article(**job.params)
+        except SessionUnavailable as e:
+            logger.error(f"发布 {job.key} 失败: {e}")
+            result = {"success": False, "error": str(e), "rejected": "session"}
+        except Exception as e:
+            logger.error(f"发布 {job.key} 结果未知: {e}")
+            result = {"success": False, "error": str(e)}
+        
+        data = result.get("data") or {}
+        success = result["success"] and data.get("code") == 1
+        if success:
+            status = "success"
+        elif outcome_unknown(result):
+            status = "unknown"
+        else:
+            status = "failed"
+        return {
+            "key": job.key,
+            "line": job.line_no,
+            "title": job.params["title"],
+            "status": status,
+            "code": data.get("code"),
+            "message": data.get("msg") or result.get("error", ""),
+            "article": data.get("data") if success else None,
+            "content_bytes": len(job.params["content"].encode('utf-8')),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "timestamp": time.time(),
+        }
+    
+    def run(self, jobs: Iterable[ArticleJob]) -> Dict[str, int]:
+        """
+        并发发布，任务按需读取
+        
+        检查点中已成功的任务跳过（skipped）；上次结果未知的任务不重试时
+        也跳过（held），避免重复发布。
+        """
+        summary = {"success": 0, "failed": 0, "unknown": 0, "skipped": 0, "held": 0}
+        
+        with Checkpoint(self.output) as checkpoint:
+            def pending() -> Iterator[ArticleJob]:
+                for job in jobs:
+                    if checkpoint.is_done(job.key):
+                        summary["skipped"] += 1
+                    elif checkpoint.is_unknown(job.key) and not self.retry_unknown:
+                        summary["held"] += 1
+                    else:
+                        yield job
+            
+            for result in bounded_map(self._publish, pending(), self.concurrency):
+                checkpoint.record(result)
+                summary[result["status"]] += 1
+        
+        if summary["held"]:
+            logger.warning(f"{summary['held']} 篇上次结果未知，未重试（确认后使用 --retry-unknown）")
+        
+        logger.info(f"批量发布完成: {summary}")
+        return summary
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="批量发布文章（可断点续跑）")
+    parser.add_argument("manifest", help="发布清单（.csv 或 .jsonl）")
+    parser.add_argument("-o", "--output", required=True, help="结果JSONL文件（同时作为检查点）")
+    parser.add_argument("--concurrency", type=int, default=Config.BULK_CONCURRENCY, help="并发数")
+    parser.add_argument("--pool", action="store_true", help="使用所有已保存的账号（会话池）")
+    parser.add_argument("--validate-only", action="store_true", help="只校验清单，不发布")
+    parser.add_argument("--retry-unknown", action="store_true", help="重试上次结果未知的文章（可能重复发布）")
+    
+    args = parser.parse_args(argv)
+    Config.init_dirs()
+    Config.setup_logging()
+    
+    publisher = BatchPublisher(
+        args.output, args.concurrency,
+        pool=SessionPool() if args.pool else None,
+        retry_unknown=args.retry_unknown
+    )
+    errors: List[Dict[str, Any]] = []
+    if args.validate_only:
+        valid = sum(1 for _ in publisher.iter_jobs(args.manifest, errors))
+        for error in errors:
+            print(json.dumps({"status": "invalid", **error}, ensure_ascii=False))
+        print(json.dumps({"valid": valid, "invalid": len(errors)}, ensure_ascii=False))
+        return 0 if not errors else 2
+    
+    summary = publisher.run(publisher.iter_jobs(args.manifest, errors))
+    for error in errors:
+        print(json.dumps({"status": "invalid", **error}, ensure_ascii=False))
+    summary["invalid"] = len(errors)
+    print(json.dumps(summary, ensure_ascii=False))
+    ok = not (errors or summary["failed"] or summary["unknown"] or summary["held"])
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# services/batch_runner.py
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class Checkpoint:
+    """
+    批处理检查点 - 结果以JSONL逐条追加到文件，文件本身就是检查点
+    
+    重新运行时读取已有结果，status 为 success 的 key 会被跳过；最后一条为
+    unknown（结果未知）的 key 单独记录，由调用方决定是否重试。
+    每条结果写入后立即 flush + fsync，进程崩溃最多丢失正在处理的那几条。
+    """
+    
+    def __init__(self, path: Path, key_field: str = "key"):
+        self.path = Path(path)
+        self.key_field = key_field
+        self.done: Set[str] = set()
+        self.unknown: Set[str] = set()
+        self._lock = threading.Lock()
+        
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩溃时可能留下半行，忽略
+                        continue
+                    self._track(record)
+            logger.info(f"检查点 {self.path.name}: 已完成 {len(self.done)} 条，结果未知 {len(self.unknown)} 条")
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        
+        # 上次崩溃留下的半行需要先换行，避免和新结果粘在一起
+        if self.path.stat().st_size > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+    
+    def _track(self, record: Dict[str, Any]):
+        """按结果状态更新 done / unknown"""
+        key = str(record.get(self.key_field))
+        status = record.get("status")
+        if status == "success":
+            self.done.add(key)
+        if status == "unknown":
+            self.unknown.add(key)
+        else:
+            self.unknown.discard(key)
+    
+    def is_done(self, key: Any) -> bool:
+        """该key是否已成功处理"""
+        return str(key) in self.done
+    
+    def is_unknown(self, key: Any) -> bool:
+        """该key最近一次的结果是否未知（请求可能已生效）"""
+        return str(key) in self.unknown
+    
+    def record(self, result: Dict[str, Any]):
+        """追加一条结果"""
+        line = json.dumps(result, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._track(result)
+    
+    def close(self):
+        """关闭结果文件"""
+        with self._lock:
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def bounded_map(func: Callable[[T], R], items: Iterable[T], concurrency: int) -> Iterator[R]:
+    """
+    并发执行 func(item)，按完成顺序产出结果
+    
+    同时在途的任务不超过 concurrency * 2，输入按需读取，
+    可以处理任意长的流（文件、stdin）而不会一次性载入内存。
+    """
+    concurrency = max(1, concurrency)
+    iterator = iter(items)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        exhausted = False
+        
+        while True:
+            while not exhausted and len(pending) < concurrency * 2:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(func, item))
+            
+            if not pending:
+                return
+            
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
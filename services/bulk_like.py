@@ -0,0 +1,152 @@
+# services/bulk_like.py
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, TextIO
+
+from config import Config
+from mfuns_client import MFunsClient
+from services.batch_runner import Checkpoint, bounded_map
+from services.session_pool import SessionPool
+from utils.deadline import request_deadline
+from utils.rate_limiter import request_lane
+
+logger = logging.getLogger(__name__)
+
+def read_targets(stream: TextIO, default_type: int = 0) -> Iterator[Dict[str, int]]:
+    """
+    逐行读取点赞目标，支持以下格式:
+        113180
+        113180,1        (ID,类型，也可用空格或制表符分隔)
+        {"id": 113180, "type": 1}   或   {"target_id": 113180, "like_type": 1}
+    空行和 # 开头的行会被忽略
+    """
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        
+        try:
+            if line.startswith("{"):
+                record = json.loads(line)
+                target_id = record.get("target_id", record.get("id"))
+                like_type = record.get("like_type", record.get("type", default_type))
+            else:
+                parts = line.replace(",", " ").split()
+                target_id = parts[0]
+                like_type = parts[1] if len(parts) > 1 else default_type
+            yield {"target_id": int(target_id), "like_type": int(like_type)}
+        except (ValueError, TypeError, IndexError, json.JSONDecodeError):
+            logger.warning(f"第 {line_no} 行格式无效，已跳过: {line[:80]}")
+
+class BulkLiker:
+    """批量点赞 - 并发执行（bulk限速通道），结果写入JSONL并可断点续跑"""
+    
+    def __init__(
+        self,
+        output: Path,
+        concurrency: int = Config.BULK_CONCURRENCY,
+        client: Optional[MFunsClient] = None,
+        pool: Optional[SessionPool] = None
+    ):
+        self.output = Path(output)
+        self.concurrency = concurrency
+        self.pool = pool
+        self.client = client if client or pool else MFunsClient()
+    
+    @staticmethod
+    def target_key(target: Dict[str, int]) -> str:
+        """检查点中的唯一键"""
+        return f"{target['target_id']}:{target['like_type']}"
+    
+    def _like(self, target: Dict[str, int]) -> Dict[str, Any]:
+        """点赞单个目标"""
+        start = time.perf_counter()
+        
+        try:
+            with request_lane("bulk"), request_deadline(Config.BATCH_ITEM_DEADLINE):
+                if self.pool:
+                    # 同一目标固定由同一账号处理，重跑时不会换账号重复点赞
+                    # （该账号未登录时本条记为失败，重跑时仍由它处理）
+                    result = self.pool.call(
+                        lambda c: c.content.like(target["target_id"], target["like_type"]),
+                        key=target["target_id"], strategy="sticky"
+                    )
+                else:
+                    result = self.client.content.like(target["target_id"], target["like_type"])
+        except Exception as e:
+            logger.error(f"点赞 {target['target_id']} 失败: {e}")
+            result = {"success": False, "error": str(e)}
+        
+        data = result.get("data") or {}
+        success = result["success"] and data.get("code") == 1
+        return {
+            "key": self.target_key(target),
+            "target_id": target["target_id"],
+            "like_type": target["like_type"],
+            "status": "success" if success else "failed",
+            "code": data.get("code"),
+            "message": data.get("msg") or result.get("error", ""),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "timestamp": time.time(),
+        }
+    
+    def run(self, targets: Iterable[Dict[str, int]]) -> Dict[str, int]:
+        """执行批量点赞，返回统计（输入中重复的目标只点赞一次）"""
+        summary = {"success": 0, "failed": 0, "skipped": 0, "duplicates": 0}
+        seen = set()
+        
+        with Checkpoint(self.output) as checkpoint:
+            def pending():
+                for target in targets:
+                    key = self.target_key(target)
+                    if key in seen:
+                        summary["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    if checkpoint.is_done(key):
+                        summary["skipped"] += 1
+                        continue
+                    yield target
+            
+            for result in bounded_map(self._like, pending(), self.concurrency):
+                checkpoint.record(result)
+                summary[result["status"]] += 1
+                
+                processed = summary["success"] + summary["failed"]
+                if processed % 100 == 0:
+                    logger.info(f"已处理 {processed} 条 (成功 {summary['success']}, 失败 {summary['failed']})")
+        
+        logger.info(f"批量点赞完成: {summary}")
+        return summary
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="批量点赞（可断点续跑）")
+    parser.add_argument("input", nargs="?", default="-", help="目标ID文件，- 表示标准输入")
+    parser.add_argument("-o", "--output", required=True, help="结果JSONL文件（同时作为检查点）")
+    parser.add_argument("--type", type=int, default=0, dest="like_type", help="默认点赞类型 (0=文章, 1=视频, ...)")
+    parser.add_argument("--concurrency", type=int, default=Config.BULK_CONCURRENCY, help="并发数")
+    parser.add_argument("--pool", action="store_true", help="使用所有已保存的账号（会话池）")
+    
+    args = parser.parse_args(argv)
+    Config.init_dirs()
+    Config.setup_logging()
+    
+    pool = SessionPool() if args.pool else None
+    liker = BulkLiker(args.output, args.concurrency, pool=pool)
+    
+    if args.input == "-":
+        summary = liker.run(read_targets(sys.stdin, args.like_type))
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            summary = liker.run(read_targets(f, args.like_type))
+    
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
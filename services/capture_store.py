@@ -0,0 +1,350 @@
+# services/capture_store.py
+import re
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Sequence
+from urllib.parse import urlparse
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    request_id TEXT,
+    timestamp REAL NOT NULL,
+    method TEXT,
+    endpoint TEXT,
+    url TEXT,
+    status_code INTEGER,
+    api_code INTEGER,
+    success INTEGER NOT NULL,
+    elapsed_ms REAL,
+    error TEXT,
+    request TEXT,
+    response TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures (timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_endpoint ON captures (endpoint, timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_endpoint_success ON captures (endpoint, success, timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_method ON captures (method, timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_status ON captures (status_code, timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_api_code ON captures (api_code, timestamp);
+CREATE INDEX IF NOT EXISTS idx_captures_elapsed ON captures (elapsed_ms);
+CREATE INDEX IF NOT EXISTS idx_captures_endpoint_elapsed ON captures (endpoint, elapsed_ms);
+"""
+
+# 同一请求只保存一次（实时写入后再导入同一批日志不会重复）
+_UNIQUE_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_captures_request_id ON captures (request_id)"
+
+_COLUMNS = (
+    "request_id", "timestamp", "method", "endpoint", "url", "status_code",
+    "api_code", "success", "elapsed_ms", "error", "request", "response"
+)
+
+def _endpoint_from_url(url: str) -> str:
+    """从完整URL还原接口路径（去掉基础URL的路径前缀）"""
+    path = urlparse(url).path
+    base_path = urlparse(Config.MFUNS_BASE_URL).path.rstrip("/")
+    if base_path and path.startswith(base_path + "/"):
+        path = path[len(base_path):]
+    return path
+
+class CaptureStore:
+    """请求/响应历史存储 - 只追加的SQLite表，按时间、接口、方法、状态码和API code建索引"""
+    
+    # 等待配对的请求记录上限（响应迟迟不到的请求会被淘汰）
+    MAX_PENDING = 10000
+    
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or Config.CAPTURE_DB_PATH)
+        self._local = threading.local()
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+    
+    def _conn(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """旧数据库：删除重复导入的记录（保留最早一条）后建唯一索引"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_captures_request_id'"
+        ).fetchone()
+        if exists:
+            return
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM captures WHERE request_id IS NOT NULL AND id NOT IN "
+                "(SELECT MIN(id) FROM captures WHERE request_id IS NOT NULL GROUP BY request_id)"
+            ).rowcount
+            conn.execute(_UNIQUE_INDEX)
+        if removed:
+            logger.info(f"已删除 {removed} 条重复记录")
+    
+    @staticmethod
+    def _build_row(record: Dict[str, Any], request: Optional[Dict[str, Any]] = None) -> tuple:
+        """把响应（或错误）日志记录转换为表中的一行"""
+        response = record.get("response")
+        api_code = response.get("code") if isinstance(response, dict) else None
+        if not isinstance(api_code, int):
+            api_code = None
+        
+        status_code = record.get("status_code")
+        success = status_code == 200 and api_code in (None, 1) and not record.get("error")
+        
+        endpoint = record.get("endpoint") or _endpoint_from_url(record.get("url", ""))
+        
+        return (
+            record.get("request_id") or None,
+            float(record.get("timestamp") or time.time()),
+            record.get("method"),
+            endpoint,
+            record.get("url"),
+            status_code,
+            api_code,
+            int(success),
+            record.get("elapsed_ms"),
+            record.get("error"),
+            json.dumps(request["data"], ensure_ascii=False, default=str) if request and request.get("data") is not None else None,
+            json.dumps(response, ensure_ascii=False, default=str) if response is not None else None,
+        )
+    
+    def append_many(self, rows: Iterable[tuple]) -> int:
+        """批量追加记录（request_id 已存在的跳过），返回实际写入的条数"""
+        conn = self._conn()
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with conn:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO captures ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                list(rows)
+            )
+        return cursor.rowcount
+    
+    def ingest_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """日志写入器的sink：把请求与响应记录配对后入库，返回实际写入的条数"""
+        rows = []
+        for record in batch:
+            record_type = record.get("type")
+            if record_type == "request":
+                self._pending[record.get("request_id", "")] = record
+                if len(self._pending) > self.MAX_PENDING:
+                    self._pending.popitem(last=False)
+            elif record_type in ("response", "error"):
+                request = self._pending.pop(record.get("request_id", ""), None)
+                rows.append(self._build_row(record, request))
+        
+        return self.append_many(rows) if rows else 0
+    
+    def import_logs(self, directory: Path = None) -> int:
+        """
+        导入历史日志（旧版 request_*/response_*.json 文件和 JSONL 分段）
+        已入库的记录（实时写入或之前导入过的）会跳过，可以重复执行
+        """
+        directory = Path(directory or Config.RESPONSES_DIR)
+        imported = 0
+        
+        for path in sorted(directory.glob("response_*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"读取 {path.name} 失败: {e}")
+                continue
+            # 旧版文件没有 request_id，用文件名去重
+            record["request_id"] = record.get("request_id") or path.name
+            imported += self.append_many([self._build_row(record)])
+        
+        for path in sorted(directory.glob("*.jsonl*")):
+            opener = gzip.open if path.suffix == ".gz" else open
+            batch = []
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        batch.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+                    if len(batch) >= 1000:
+                        imported += self.ingest_batch(batch)
+                        batch = []
+            imported += self.ingest_batch(batch)
+        
+        logger.info(f"已导入 {imported} 条记录")
+        return imported
+    
+    @staticmethod
+    def _where(
+        endpoint: Optional[str] = None,
+        method: Optional[str] = None,
+        status_code: Optional[int] = None,
+        api_code: Optional[int] = None,
+        failed: Optional[bool] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ):
+        """构建查询条件"""
+        clauses, args = [], []
+        if endpoint:
+            clauses.append("endpoint = ?")
+            args.append("/" + endpoint.lstrip("/"))
+        if method:
+            clauses.append("method = ?")
+            args.append(method.upper())
+        if status_code is not None:
+            clauses.append("status_code = ?")
+            args.append(status_code)
+        if api_code is not None:
+            clauses.append("api_code = ?")
+            args.append(api_code)
+        if failed is not None:
+            clauses.append("success = ?")
+            args.append(0 if failed else 1)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            args.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            args.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+    
+    def query(self, limit: int = 100, **filters) -> List[Dict[str, Any]]:
+        """按条件查询记录（按时间倒序）"""
+        where, args = self._where(**filters)
+        rows = self._conn().execute(
+            f"SELECT * FROM captures{where} ORDER BY timestamp DESC LIMIT ?",
+            args + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def count(self, **filters) -> int:
+        """按条件统计记录数"""
+        where, args = self._where(**filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM captures{where}", args).fetchone()[0]
+    
+    def latency_percentiles(self, percentiles: Sequence[float], **filters) -> Dict[float, Optional[float]]:
+        """一次有序扫描计算多个耗时百分位数（毫秒），没有记录时为None"""
+        where, args = self._where(**filters)
+        where = (where + " AND" if where else " WHERE") + " elapsed_ms IS NOT NULL"
+        
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM captures{where}", args).fetchone()[0]
+        if total == 0 or not percentiles:
+            return {p: None for p in percentiles}
+        
+        ranks = {p: min(total - 1, max(0, int(round(p / 100 * total)) - 1)) for p in percentiles}
+        offsets = sorted(set(ranks.values()))
+        # 多次引用的CTE只排序一次（物化），各百分位在排好序的结果上按偏移取值
+        columns = ", ".join("(SELECT elapsed_ms FROM sorted LIMIT 1 OFFSET ?)" for _ in offsets)
+        row = conn.execute(
+            f"WITH sorted AS (SELECT elapsed_ms FROM captures{where} ORDER BY elapsed_ms) SELECT {columns}",
+            args + offsets
+        ).fetchone()
+        values = dict(zip(offsets, row))
+        return {p: values[rank] for p, rank in ranks.items()}
+    
+    def latency_percentile(self, percentile: float, **filters) -> Optional[float]:
+        """计算耗时百分位数（毫秒）"""
+        return self.latency_percentiles([percentile], **filters)[percentile]
+    
+    def summary(self, percentiles: Sequence[float] = (50, 95, 99), **filters) -> Dict[str, Any]:
+        """统计概要：总数、失败数和耗时分布"""
+        where, args = self._where(**filters)
+        total, failed = self._conn().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(success = 0), 0) FROM captures{where}", args
+        ).fetchone()
+        result = {"total": total, "failed": failed}
+        for p, value in self.latency_percentiles(percentiles, **filters).items():
+            result[f"p{p:g}_ms"] = value
+        return result
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """解析时间参数: 1h/30m/2d/45s（相对现在）、today、ISO时间或时间戳"""
+    if not value:
+        return None
+    
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if match:
+        seconds = {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return time.time() - float(match.group(1)) * seconds
+    if value == "today":
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="查询请求/响应历史")
+    parser.add_argument("--db", help="数据库路径（默认: Config.CAPTURE_DB_PATH）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    def add_filters(sub):
+        sub.add_argument("--endpoint", help="接口路径，如 /like/like")
+        sub.add_argument("--method", help="请求方法")
+        sub.add_argument("--status", type=int, dest="status_code", help="HTTP状态码")
+        sub.add_argument("--code", type=int, dest="api_code", help="API返回的code")
+        sub.add_argument("--failed", action="store_true", default=None, help="只看失败的请求")
+        sub.add_argument("--since", help="开始时间（如 1h、today、2024-01-01T00:00）")
+        sub.add_argument("--until", help="结束时间")
+    
+    query_parser = subparsers.add_parser("query", help="查询记录")
+    add_filters(query_parser)
+    query_parser.add_argument("--limit", type=int, default=100, help="最多返回条数")
+    
+    stats_parser = subparsers.add_parser("stats", help="统计总数、失败数和耗时百分位")
+    add_filters(stats_parser)
+    stats_parser.add_argument("-p", "--percentile", type=float, action="append",
+                             help="额外计算的百分位（可多次指定）")
+    
+    import_parser = subparsers.add_parser("import", help="导入未实时入库的历史日志文件")
+    import_parser.add_argument("directory", nargs="?", help="日志目录（默认: Config.RESPONSES_DIR）")
+    
+    args = parser.parse_args(argv)
+    store = CaptureStore(args.db)
+    
+    if args.command == "import":
+        print(json.dumps({"imported": store.import_logs(args.directory)}))
+        return 0
+    
+    filters = {
+        "endpoint": args.endpoint,
+        "method": args.method,
+        "status_code": args.status_code,
+        "api_code": args.api_code,
+        "failed": args.failed,
+        "since": parse_time(args.since),
+        "until": parse_time(args.until),
+    }
+    
+    if args.command == "query":
+        for row in store.query(limit=args.limit, **filters):
+            print(json.dumps(row, ensure_ascii=False))
+    else:
+        result = store.summary([50, 95, 99] + (args.percentile or []), **filters)
+        print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+# services/daemon.py
+import sys
+import hmac
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote
+from typing import Dict, List, Any, Optional, Tuple
+
+from config import Config
+from api_manager import APIManager
+from services.headless_runner import PlanError, coerce_params, describe_apis
+from utils.metrics import get_metrics
+from utils.log_writer import get_log_writer
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC 错误码
+RPC_PARSE_ERROR = -32700
+RPC_INVALID_REQUEST = -32600
+RPC_METHOD_NOT_FOUND = -32601
+RPC_INVALID_PARAMS = -32602
+RPC_NOT_LOGGED_IN = -32000
+RPC_API_EXCEPTION = -32001
+
+class RPCError(Exception):
+    """JSON-RPC 错误"""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class APIDaemon:
+    """
+    常驻服务：复用同一个 APIManager（会话、连接池和token保持热状态），
+    通过本地HTTP提供 APIManager.api_modules 中注册的API，请求并发处理。
+        
+        POST /rpc                  JSON-RPC 2.0，method 为 "模块.API"（支持批量）
+        POST /call/<模块>/<API>     请求体为参数对象，返回 execute_api 的结果
+        GET  /apis                 API列表及参数
+        GET  /health               存活检查
+        GET  /metrics              Prometheus指标
+    """
+    
+    # 会改变登录状态的API，与其他登录/登出请求串行执行
+    SESSION_APIS = {"登录", "登出"}
+    
+    def __init__(
+        self,
+        api_manager: Optional[APIManager] = None,
+        host: str = Config.DAEMON_HOST,
+        port: int = Config.DAEMON_PORT,
+        auth_token: str = Config.DAEMON_AUTH_TOKEN
+    ):
+        self.api_manager = api_manager or APIManager()
+        self.host = host
+        self.port = port
+        self.auth_token = auth_token
+        self.started_at: Optional[float] = None
+        self._session_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._metrics = get_metrics()
+    
+    def list_apis(self) -> List[Dict[str, Any]]:
+        """API列表及参数"""
+        return describe_apis(self.api_manager)
+    
+    def health(self) -> Dict[str, Any]:
+        """存活检查"""
+        return {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+            "logged_in": self.api_manager.client.is_logged_in(),
+        }
+    
+    def call(self, module_name: str, api_name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """执行API，名称或参数错误抛出 RPCError"""
+        found = self.api_manager.find_api(module_name, api_name)
+        if found is None:
+            raise RPCError(RPC_METHOD_NOT_FOUND, f"API不存在: {module_name}.{api_name}")
+        if params is not None and not isinstance(params, dict):
+            raise RPCError(RPC_INVALID_PARAMS, "params 必须是对象")
+        
+        index, func, _ = found
+        try:
+            kwargs = coerce_params(func, params or {})
+        except PlanError as e:
+            raise RPCError(RPC_INVALID_PARAMS, str(e))
+        
+        self._metrics.inc("daemon_calls_total", {"module": module_name, "api": api_name})
+        if api_name in self.SESSION_APIS:
+            with self._session_lock:
+                return self.api_manager.execute_api(module_name, index, **kwargs)
+        return self.api_manager.execute_api(module_name, index, **kwargs)
+    
+    def _dispatch(self, method: str, params: Any) -> Any:
+        """JSON-RPC 方法分发"""
+        if method == "system.ping":
+            return "pong"
+        if method == "system.health":
+            return self.health()
+        if method == "system.listApis":
+            return self.list_apis()
+        if method == "system.metrics":
+            return self._metrics.snapshot()
+        
+        module_name, sep, api_name = method.partition(".")
+        if not sep:
+            raise RPCError(RPC_METHOD_NOT_FOUND, f"方法格式应为 模块.API: {method}")
+        
+        result = self.call(module_name, api_name, params)
+        if result.get("error") == "not_logged_in":
+            raise RPCError(RPC_NOT_LOGGED_IN, result.get("message", "请先登录"))
+        if result.get("error") == "exception":
+            raise RPCError(RPC_API_EXCEPTION, result.get("message", "执行失败"))
+        return result
+    
+    def handle_rpc(self, message: Any) -> Optional[Dict[str, Any]]:
+        """处理单个JSON-RPC请求，通知（没有id）返回None"""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return _rpc_error(None, RPC_INVALID_REQUEST, "无效的JSON-RPC请求")
+        
+        request_id = message.get("id")
+        try:
+            result = self._dispatch(message["method"], message.get("params"))
+        except RPCError as e:
+            response = _rpc_error(request_id, e.code, e.message)
+        except Exception as e:
+            logger.exception(f"处理RPC请求失败: {message.get('method')}")
+            response = _rpc_error(request_id, RPC_API_EXCEPTION, f"执行失败: {e}")
+        else:
+            response = {"jsonrpc": "2.0", "result": result, "id": request_id}
+        return response if "id" in message else None
+    
+    def handle_rpc_payload(self, payload: Any) -> Any:
+        """处理单个或批量JSON-RPC请求"""
+        if isinstance(payload, list):
+            if not payload:
+                return _rpc_error(None, RPC_INVALID_REQUEST, "批量请求为空")
+            responses = [r for r in map(self.handle_rpc, payload) if r is not None]
+            return responses or None
+        return self.handle_rpc(payload)
+    
+    def start(self) -> "APIDaemon":
+        """在后台线程中启动"""
+        self._server = _DaemonHTTPServer((self.host, self.port), _DaemonHandler)
+        self._server.api_daemon = self
+        self.port = self._server.server_port
+        self.started_at = time.time()
+        threading.Thread(target=self._server.serve_forever, name="api-daemon", daemon=True).start()
+        # 常驻期间在后台校验token并在过期前重新登录
+        self.api_manager.client.token_lifecycle.start()
+        logger.info(f"API常驻服务已启动: http://{self.host}:{self.port}/rpc")
+        return self
+    
+    def stop(self):
+        """停止服务"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self.api_manager.client.token_lifecycle.stop()
+            logger.info("API常驻服务已停止")
+
+def _rpc_error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """JSON-RPC 错误响应"""
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
+
+class _DaemonHTTPServer(ThreadingHTTPServer):
+    """每个连接一个线程，客户端用keep-alive复用连接"""
+    
+    daemon_threads = True
+    request_queue_size = 128
+
+class _DaemonHandler(BaseHTTPRequestHandler):
+    """常驻服务的HTTP处理"""
+    
+    protocol_version = "HTTP/1.1"
+    # 小响应分两次写出（头和体），不关闭Nagle会叠加延迟确认
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        logger.debug("常驻服务: " + format % args)
+    
+    def _send(self, status: int, payload: Any, content_type: str = "application/json"):
+        """发送响应（payload 为 None 时只返回204）"""
+        if payload is None:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+        else:
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _authorized(self) -> bool:
+        """校验访问令牌（未配置时不校验）"""
+        token = self.server.api_daemon.auth_token
+        if not token:
+            return True
+        # 固定时间比较，不通过响应耗时泄露令牌内容（按字节比较，非ASCII也不报错）
+        provided = self.headers.get("X-Daemon-Token") or ""
+        if not hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+            self._send(401, {"success": False, "message": "访问令牌无效"})
+            return False
+        return True
+    
+    def _content_length(self) -> Optional[int]:
+        """解析请求体长度；不合法或过大时直接拒绝并断开连接（不读取请求体），返回None"""
+        value = (self.headers.get("Content-Length") or "0").strip()
+        length = int(value) if value.isascii() and value.isdigit() else -1
+        if 0 <= length <= Config.DAEMON_MAX_BODY_BYTES:
+            return length
+        # 未读取的请求体留在连接里，无法继续复用
+        self.close_connection = True
+        if length < 0:
+            self._send(400, {"success": False, "message": "Content-Length 无效"})
+        else:
+            self._send(413, {"success": False, "message": "请求体过大"})
+        return None
+    
+    def _read_json(self, length: int) -> Tuple[bool, Any]:
+        """读取JSON请求体，返回 (是否成功, 内容)"""
+        body = self.rfile.read(length) if length else b""
+        if not body:
+            return True, None
+        try:
+            return True, json.loads(body)
+        except ValueError as e:
+            return False, f"JSON格式错误: {e}"
+    
+    def _route(self) -> Tuple[str, List[str]]:
+        """解析路径"""
+        parts = [unquote(p) for p in self.path.split("?")[0].split("/") if p]
+        return (parts[0] if parts else ""), parts[1:]
+    
+    def do_GET(self):
+        if not self._authorized():
+            return
+        daemon: APIDaemon = self.server.api_daemon
+        route, _ = self._route()
+        if route == "health":
+            self._send(200, daemon.health())
+        elif route == "apis":
+            self._send(200, daemon.list_apis())
+        elif route == "metrics":
+            self._send(200, get_metrics().render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send(404, {"success": False, "message": "路径不存在"})
+    
+    def do_POST(self):
+        if not self._authorized():
+            return
+        daemon: APIDaemon = self.server.api_daemon
+        route, args = self._route()
+        length = self._content_length()
+        if length is None:
+            return
+        ok, payload = self._read_json(length)
+        
+        if route == "rpc":
+            if not ok:
+                self._send(200, _rpc_error(None, RPC_PARSE_ERROR, payload))
+                return
+            self._send(200, daemon.handle_rpc_payload(payload))
+            return
+        
+        if route == "call" and len(args) == 2:
+            if not ok:
+                self._send(400, {"success": False, "error": "usage", "message": payload})
+                return
+            try:
+                self._send(200, daemon.call(args[0], args[1], payload))
+            except RPCError as e:
+                status = 404 if e.code == RPC_METHOD_NOT_FOUND else 400
+                self._send(status, {"success": False, "error": "usage", "message": e.message})
+            return
+        
+        self._send(404, {"success": False, "message": "路径不存在"})
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="MFuns API 常驻服务（本地HTTP / JSON-RPC）")
+    parser.add_argument("--host", default=Config.DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=Config.DAEMON_PORT)
+    parser.add_argument("--log-level", default="INFO", help="控制台日志级别")
+    
+    args = parser.parse_args(argv)
+    Config.LOG_LEVEL = getattr(logging, args.log_level.upper(), logging.INFO)
+    Config.init_dirs()
+    Config.setup_logging()
+    
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not Config.DAEMON_AUTH_TOKEN:
+        logger.warning("常驻服务监听非本地地址且未设置 MFUNS_DAEMON_TOKEN，任何人都可以调用API")
+    
+    daemon = APIDaemon(host=args.host, port=args.port).start()
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    print(f"API常驻服务: http://{daemon.host}:{daemon.port}  (Ctrl+C 退出)", file=sys.stderr)
+    try:
+        while not stopped.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        get_log_writer().flush(timeout=5)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# services/headless_runner.py
+import os
+import sys
+import json
+import inspect
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Iterator, Optional, TextIO
+
+from config import Config
+from api_manager import APIManager
+
+logger = logging.getLogger(__name__)
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1  # 有API执行失败
+EXIT_USAGE = 2  # 参数、模块/API名称或计划文件错误
+EXIT_AUTH = 3  # 需要登录
+EXIT_INTERRUPTED = 130
+
+class PlanError(ValueError):
+    """计划文件或参数错误"""
+
+def parse_params(pairs: List[str]) -> Dict[str, str]:
+    """解析 --param k=v 列表（值中的 $VAR / ${VAR} 会展开为环境变量）"""
+    params = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip():
+            raise PlanError(f"参数格式应为 key=value: {pair}")
+        params[key.strip()] = os.path.expandvars(value)
+    return params
+
+def _literal(value: str) -> Any:
+    """把字符串解析为数字/布尔/null，其他情况保持字符串"""
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return value
+    return parsed if parsed is None or isinstance(parsed, (bool, int, float)) else value
+
+def _convert(name: str, value: Any, target: type) -> Any:
+    """把参数值转换为目标类型"""
+    if not isinstance(value, str) or target is str:
+        return value
+    try:
+        if target is bool:
+            lowered = value.strip().lower()
+            if lowered in ("1", "true", "yes", "y", "on"):
+                return True
+            if lowered in ("0", "false", "no", "n", "off", ""):
+                return False
+            raise ValueError(value)
+        if target in (int, float):
+            return target(value)
+    except ValueError:
+        raise PlanError(f"参数 {name} 需要 {target.__name__} 类型: {value}")
+    return value
+
+def coerce_params(func: Callable, params: Dict[str, Any]) -> Dict[str, Any]:
+    """按函数签名（类型注解或默认值的类型）转换参数，未知参数报错"""
+    signature = inspect.signature(func)
+    accepts_any = any(p.kind is p.VAR_KEYWORD for p in signature.parameters.values())
+    coerced = {}
+    
+    for name, value in params.items():
+        parameter = signature.parameters.get(name)
+        if parameter is None or parameter.kind is parameter.VAR_KEYWORD:
+            if not accepts_any:
+                allowed = ", ".join(n for n, p in signature.parameters.items() if p.kind is not p.VAR_KEYWORD)
+                raise PlanError(f"未知参数: {name}（可用: {allowed or '无'}）")
+            coerced[name] = _literal(value) if isinstance(value, str) else value
+            continue
+        
+        target = parameter.annotation if isinstance(parameter.annotation, type) else None
+        if target is None and parameter.default is not inspect.Parameter.empty and parameter.default is not None:
+            target = type(parameter.default)
+        coerced[name] = _convert(name, value, target) if target else value
+    
+    missing = [
+        name for name, p in signature.parameters.items()
+        if p.default is inspect.Parameter.empty and p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+        and name not in coerced
+    ]
+    if missing:
+        raise PlanError(f"缺少参数: {', '.join(missing)}")
+    return coerced
+
+def _expand(value: Any) -> Any:
+    """展开计划中字符串里的环境变量"""
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, dict):
+        return {k: _expand(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand(v) for v in value]
+    return value
+
+def read_plan(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    读取执行计划，每一步: {"module": ..., "api": ..., "params": {...}, "repeat": 1}
+        .jsonl          每行一步（流式读取）
+        .yaml / .yml    步骤列表，或 {"steps": [...]}（需要 PyYAML）
+        .json           同 YAML 结构
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    
+    if suffix == ".jsonl":
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    yield _expand(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise PlanError(f"计划第 {line_no} 行格式错误: {e}")
+        return
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        if suffix in (".yaml", ".yml"):
+            # PyYAML 为可选依赖，只有 .yaml 计划文件需要（导入较慢，用到时才导入）
+            try:
+                import yaml
+            except ImportError:
+                raise PlanError("读取YAML计划需要安装 PyYAML: pip install pyyaml")
+            try:
+                document = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise PlanError(f"计划文件格式错误: {e}")
+        else:
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError as e:
+                raise PlanError(f"计划文件格式错误: {e}")
+    
+    steps = document.get("steps") if isinstance(document, dict) else document
+    if not isinstance(steps, list):
+        raise PlanError("计划文件应为步骤列表，或包含 steps 列表")
+    for step in steps:
+        yield _expand(step)
+
+class HeadlessRunner:
+    """无交互执行API：参数直接传给API函数，每个结果输出一行JSON"""
+    
+    def __init__(self, api_manager: Optional[APIManager] = None, output: TextIO = sys.stdout):
+        self.api_manager = api_manager or APIManager()
+        self.output = output
+        self.exit_code = EXIT_OK
+    
+    def _emit(self, record: Dict[str, Any]):
+        """输出一条结果"""
+        self.output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.output.flush()
+    
+    def _fail(self, code: int):
+        """记录退出码（用法错误优先于登录错误，登录错误优先于执行失败）"""
+        if self.exit_code == EXIT_OK or (code != EXIT_FAILED and self.exit_code == EXIT_FAILED):
+            self.exit_code = code
+        elif code == EXIT_USAGE:
+            self.exit_code = EXIT_USAGE
+    
+    def run_step(self, module_name: str, api_name: str, params: Dict[str, Any], step: int = 0) -> bool:
+        """执行一步，返回是否成功"""
+        record = {"step": step, "module": module_name, "api": api_name}
+        
+        found = self.api_manager.find_api(module_name, api_name)
+        if found is None:
+            if module_name not in self.api_manager.api_modules:
+                message = f"模块 '{module_name}' 不存在"
+            else:
+                message = f"API '{api_name}' 不存在"
+            self._emit({**record, "success": False, "error": "usage", "message": message})
+            self._fail(EXIT_USAGE)
+            return False
+        
+        index, func, _ = found
+        try:
+            kwargs = coerce_params(func, params or {})
+        except PlanError as e:
+            self._emit({**record, "success": False, "error": "usage", "message": str(e)})
+            self._fail(EXIT_USAGE)
+            return False
+        
+        result = self.api_manager.execute_api(module_name, index, **kwargs)
+        api_result = result.get("result")
+        success = bool(result.get("success")) and (not isinstance(api_result, dict) or api_result.get("success", True))
+        
+        record.update({
+            "success": success,
+            "elapsed_ms": result.get("elapsed_ms"),
+            "result": api_result,
+        })
+        if not result.get("success"):
+            record.update({"error": result.get("error"), "message": result.get("message")})
+        self._emit(record)
+        
+        if not success:
+            self._fail(EXIT_AUTH if result.get("error") == "not_logged_in" else EXIT_FAILED)
+        return success
+    
+    def run_plan(self, steps: Iterator[Dict[str, Any]], stop_on_error: bool = False) -> int:
+        """按顺序执行计划中的每一步"""
+        number = 0
+        try:
+            for step in steps:
+                if not isinstance(step, dict) or "module" not in step or "api" not in step:
+                    number += 1
+                    self._emit({"step": number, "success": False, "error": "usage", "message": "步骤需要 module 和 api"})
+                    self._fail(EXIT_USAGE)
+                    if stop_on_error:
+                        break
+                    continue
+                
+                for _ in range(max(1, int(step.get("repeat", 1)))):
+                    number += 1
+                    ok = self.run_step(step["module"], step["api"], step.get("params") or {}, number)
+                    if not ok and stop_on_error:
+                        return self.exit_code
+        except PlanError as e:
+            self._emit({"step": number + 1, "success": False, "error": "usage", "message": str(e)})
+            self._fail(EXIT_USAGE)
+        return self.exit_code
+
+def describe_apis(api_manager: APIManager) -> List[Dict[str, Any]]:
+    """所有模块、API及其参数（参数值为默认值，必填参数为None）"""
+    apis = []
+    for module_name, module in api_manager.api_modules.items():
+        for api_name, func, description in module["apis"]:
+            params = {}
+            for name, p in inspect.signature(func).parameters.items():
+                if p.kind is p.VAR_KEYWORD:
+                    params["**"] = "任意"
+                else:
+                    params[name] = None if p.default is inspect.Parameter.empty else p.default
+            apis.append({"module": module_name, "api": api_name, "description": description, "params": params})
+    return apis
+
+def list_apis(api_manager: APIManager, output: TextIO = sys.stdout):
+    """列出所有模块、API及其参数"""
+    for api in describe_apis(api_manager):
+        output.write(json.dumps(api, ensure_ascii=False, default=str) + "\n")
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description="无交互执行API，结果以JSON行输出到标准输出",
+        epilog="退出码: 0=全部成功 1=有API失败 2=参数/计划错误 3=需要登录 130=中断"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = subparsers.add_parser("run", help="执行单个API或执行计划")
+    run_parser.add_argument("module", nargs="?", help="模块名称，例如 内容模块")
+    run_parser.add_argument("api", nargs="?", help="API名称，例如 点赞")
+    run_parser.add_argument("-p", "--param", action="append", default=[], metavar="KEY=VALUE",
+                            help="API参数，可重复；值支持 $ENV 环境变量")
+    run_parser.add_argument("--plan", help="执行计划文件（.jsonl / .yaml / .json）")
+    run_parser.add_argument("--stop-on-error", action="store_true", help="计划中某一步失败后停止")
+    run_parser.add_argument("--deadline", type=float, default=Config.API_DEADLINE,
+                            help="每一步的总时限秒数（含排队和重试），0表示不限")
+    run_parser.add_argument("--log-level", default="WARNING", help="控制台日志级别（日志输出到标准错误）")
+    
+    subparsers.add_parser("list", help="列出所有API及参数")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == "run":
+        if bool(args.plan) == bool(args.module and args.api):
+            run_parser.print_usage(sys.stderr)
+            print("错误: 需要指定 <module> <api>，或使用 --plan", file=sys.stderr)
+            return EXIT_USAGE
+        Config.LOG_LEVEL = getattr(logging, args.log_level.upper(), logging.WARNING)
+        Config.API_DEADLINE = args.deadline
+    
+    Config.init_dirs()
+    Config.setup_logging()
+    
+    api_manager = APIManager()
+    if args.command == "list":
+        list_apis(api_manager)
+        return EXIT_OK
+    
+    runner = HeadlessRunner(api_manager)
+    try:
+        if args.plan:
+            return runner.run_plan(read_plan(args.plan), args.stop_on_error)
+        try:
+            params = parse_params(args.param)
+        except PlanError as e:
+            print(f"错误: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        runner.run_step(args.module, args.api, params, 1)
+        return runner.exit_code
+    except (OSError, PlanError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+if __name__ == "__main__":
+    sys.exit(main())
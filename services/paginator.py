@@ -0,0 +1,296 @@
+# services/paginator.py
+import sys
+import json
+import time
+import logging
+import argparse
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Dict, Any, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+from apis.endpoints import Endpoint, get_endpoint
+
+logger = logging.getLogger(__name__)
+
+class PaginationError(Exception):
+    """分页请求失败（cursor 为已产出的条数，可用于续跑）"""
+    
+    def __init__(self, message: str, cursor: int):
+        self.cursor = cursor
+        super().__init__(f"{message}（cursor={cursor}）")
+
+def _walk(data: Any, keys: List[str]) -> Any:
+    """按键路径取值，路径不存在返回None"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+class Paginator:
+    """
+    分页遍历列表接口（page/limit），逐条产出元素
+        
+        - 处理当前页时在后台线程预取之后的 prefetch 页
+        - 按单页耗时调整每页条数（快则加倍、慢则减半），响应体超过上限时减半重取
+        - cursor 为已产出的条数，中断后用 Paginator(..., cursor=n) 从第n条继续
+    
+    每页的起始位置为 (page - 1) * limit，调整每页条数后新页可能与已取的页重叠，
+    重叠部分按位置跳过，不会重复产出。数组按接口声明的 items_path 按需解码。
+    
+    示例（list_articles 的路径未经确认，仅作为遍历目标的示例）:
+        for article in Paginator(client.request_handler, "list_articles", max_items=100): ...
+    """
+    
+    def __init__(
+        self,
+        handler: Any,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = Config.PAGE_SIZE,
+        prefetch: int = Config.PAGE_PREFETCH,
+        cursor: int = 0,
+        max_items: Optional[int] = None,
+        min_page_size: int = Config.PAGE_SIZE_MIN,
+        max_page_size: int = Config.PAGE_SIZE_MAX,
+        target_seconds: float = Config.PAGE_TARGET_SECONDS,
+        page_param: str = "page",
+        limit_param: str = "limit"
+    ):
+        self.handler = handler
+        self.endpoint: Endpoint = get_endpoint(endpoint)
+        if not self.endpoint.items_path:
+            raise ValueError(f"{endpoint} 没有声明 items_path，不是列表接口")
+        self.params = dict(params or {})
+        self.min_page_size = max(1, min_page_size)
+        self.max_page_size = max(self.min_page_size, max_page_size)
+        self.page_size = min(max(page_size, self.min_page_size), self.max_page_size)
+        self.prefetch = max(0, prefetch)
+        self.cursor = cursor
+        self.max_items = max_items
+        self.target_seconds = target_seconds
+        self.page_param = page_param
+        self.limit_param = limit_param
+        self.total: Optional[int] = None
+        # 服务端完整返回过的最大每页条数（据此区分最后一页与服务端限制了条数）
+        self.served = 0
+        
+        self.pages = 0
+        self.skipped = 0
+        self.resized = 0
+        self.blocked_seconds = 0.0
+    
+    def _fetch(self, page: int, size: int) -> Tuple[Dict[str, Any], float]:
+        """请求一页，返回 (结果, 耗时秒数)"""
+        method, path, kwargs = self.endpoint.request_args({
+            **self.params, self.page_param: page, self.limit_param: size
+        })
+        start = time.perf_counter()
+        result = self.handler.request(method, path, stream_items=self.endpoint.items_path, **kwargs)
+        return result, time.perf_counter() - start
+    
+    def _items(self, result: Dict[str, Any]) -> Sequence[Any]:
+        """页中的元素（记录 total），失败时抛出 PaginationError"""
+        data = result.get("data")
+        if not result.get("success") or not isinstance(data, dict) or data.get("code") != 1:
+            message = (data.get("msg") if isinstance(data, dict) else None) or result.get("error") or "请求失败"
+            raise PaginationError(f"获取列表失败: {message}", self.cursor)
+        
+        keys = self.endpoint.items_path.split(".")
+        total = _walk(data, keys[:-1] + ["total"])
+        if isinstance(total, int):
+            self.total = total
+        items = result.get("items")
+        if items is None:
+            items = _walk(data, keys)
+        if not isinstance(items, Sequence) or isinstance(items, (str, bytes)):
+            raise PaginationError(f"响应中没有列表: {self.endpoint.items_path}", self.cursor)
+        return items
+    
+    def _last_page(self, size: int, count: int) -> bool:
+        """不满一页时是否已到末尾（否则视为服务端限制了每页条数）"""
+        if not count:
+            return True
+        if self.total is not None:
+            return self.cursor >= self.total
+        # 没有 total 时，只有服务端完整返回过不小于这个条数的页，才能确定是最后一页
+        return size <= self.served
+    
+    def _adapt(self, size: int, elapsed: float):
+        """按单页耗时调整之后的每页条数"""
+        if elapsed < self.target_seconds / 2 and size >= self.page_size:
+            new_size = min(size * 2, self.max_page_size)
+        elif elapsed > self.target_seconds:
+            new_size = max(size // 2, self.min_page_size)
+        else:
+            return
+        if new_size != self.page_size:
+            logger.debug(f"每页条数 {self.page_size} -> {new_size}（单页 {elapsed:.2f}秒）")
+            self.page_size = new_size
+            self.resized += 1
+    
+    def __iter__(self) -> Iterator[Any]:
+        end = None if self.max_items is None else self.cursor + self.max_items
+        queue: Deque[Tuple[int, int, Future]] = deque()
+        next_start = self.cursor
+        executor = ThreadPoolExecutor(max_workers=self.prefetch + 1)
+        
+        def submit(page: int, size: int, left: bool = False):
+            # 在调用方的上下文中请求（保留限速通道和请求时限）
+            context = contextvars.copy_context()
+            entry = (page, size, executor.submit(context.run, self._fetch, page, size))
+            if left:
+                queue.appendleft(entry)
+            else:
+                queue.append(entry)
+        
+        def fill():
+            nonlocal next_start
+            while len(queue) <= self.prefetch:
+                stops = [n for n in (end, self.total) if n is not None]
+                if stops and next_start >= min(stops):
+                    return
+                # 尽量让页的起始位置对齐，避免与已取的页重叠
+                size = self.page_size
+                while next_start % size and size // 2 >= self.min_page_size:
+                    size //= 2
+                page = next_start // size + 1
+                submit(page, size)
+                next_start = page * size
+        
+        def discard():
+            while queue:
+                queue.pop()[2].cancel()
+        
+        try:
+            fill()
+            while queue:
+                page, size, future = queue.popleft()
+                wait_start = time.perf_counter()
+                result, elapsed = future.result()
+                self.blocked_seconds += time.perf_counter() - wait_start
+                
+                # 响应体过大：这一页拆成两个半页重取
+                if result.get("too_large"):
+                    if size // 2 < self.min_page_size:
+                        raise PaginationError(f"单页响应体过大: {result.get('error')}", self.cursor)
+                    half = size // 2
+                    start = (page - 1) * size
+                    first = start // half + 1
+                    last = (start + size - 1) // half + 1
+                    for half_page in range(last, first - 1, -1):
+                        submit(half_page, half, left=True)
+                    # 之后不再超过这个条数
+                    self.max_page_size = half
+                    self.page_size = min(self.page_size, half)
+                    self.resized += 1
+                    logger.info(f"第{page}页响应过大，每页条数减为 {half}")
+                    continue
+                
+                items = self._items(result)
+                self.pages += 1
+                start = (page - 1) * size
+                for index, item in enumerate(items, start):
+                    if index < self.cursor:
+                        # 与之前的页重叠
+                        self.skipped += 1
+                        continue
+                    if end is not None and self.cursor >= end:
+                        break
+                    yield item
+                    self.cursor += 1
+                
+                if end is not None and self.cursor >= end:
+                    return
+                if len(items) >= size:
+                    self.served = max(self.served, size)
+                elif self._last_page(size, len(items)):
+                    return
+                else:
+                    # 服务端限制了每页条数：按实际条数从当前位置重新排队
+                    logger.warning(f"每页最多返回 {len(items)} 条，少于请求的 {size} 条")
+                    self.max_page_size = len(items)
+                    self.min_page_size = min(self.min_page_size, self.max_page_size)
+                    self.page_size = min(self.page_size, self.max_page_size)
+                    discard()
+                    next_start = self.cursor
+                self._adapt(size, elapsed)
+                fill()
+        finally:
+            discard()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """遍历统计（blocked_seconds 为等待页面返回的总时间，预取越有效越小）"""
+        return {
+            "cursor": self.cursor,
+            "total": self.total,
+            "pages": self.pages,
+            "page_size": self.page_size,
+            "resized": self.resized,
+            "skipped": self.skipped,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+        }
+
+def _count_lines(path: Path) -> int:
+    """已写入的完整行数（续跑时作为 cursor）"""
+    if not path.exists():
+        return 0
+    with open(path, 'rb') as f:
+        return f.read().count(b"\n")
+
+def _parse_param(text: str) -> Tuple[str, str]:
+    """解析 名称=值"""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"参数格式应为 名称=值: {text}")
+    return name.strip(), value
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="遍历列表接口的所有元素，逐行写入JSONL（可断点续跑）")
+    parser.add_argument("endpoint", help="列表接口名称（声明了 items_path 的接口，如示例接口 list_articles）")
+    parser.add_argument("-o", "--output", required=True, help="结果JSONL文件（已有的行数即续跑位置）")
+    parser.add_argument("-p", "--param", dest="params", action="append", type=_parse_param, default=[],
+                        help="其它请求参数 名称=值（可重复）")
+    parser.add_argument("--cursor", type=int, help="从第几条开始（默认为结果文件的行数）")
+    parser.add_argument("--max-items", type=int, help="最多获取的条数")
+    parser.add_argument("--page-size", type=int, default=Config.PAGE_SIZE, help="初始每页条数")
+    parser.add_argument("--prefetch", type=int, default=Config.PAGE_PREFETCH, help="预取页数")
+    
+    args = parser.parse_args(argv)
+    Config.init_dirs()
+    Config.setup_logging()
+    
+    from mfuns_client import MFunsClient
+    
+    output = Path(args.output)
+    cursor = args.cursor if args.cursor is not None else _count_lines(output)
+    endpoint = get_endpoint(args.endpoint)
+    types = {param.name: param for param in endpoint.params}
+    params = {}
+    for name, value in args.params:
+        params[name] = types[name].convert(value) if name in types else value
+    
+    paginator = Paginator(
+        MFunsClient().request_handler, args.endpoint, params,
+        page_size=args.page_size, prefetch=args.prefetch, cursor=cursor, max_items=args.max_items
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    status = 0
+    with open(output, 'a', encoding='utf-8') as f:
+        try:
+            for item in paginator:
+                f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+        except PaginationError as e:
+            logger.error(str(e))
+            status = 1
+    
+    print(json.dumps(paginator.stats(), ensure_ascii=False))
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# services/session_pool.py
+import re
+import zlib
+import logging
+import threading
+import itertools
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+from config import Config
+from mfuns_client import MFunsClient
+from services.token_service import TokenService
+
+logger = logging.getLogger(__name__)
+
+class SessionUnavailable(RuntimeError):
+    """sticky 分配到的会话未登录（不改用其它账号）"""
+
+class PooledSession:
+    """池中的一个会话：独立的客户端（独立session、连接池和token）"""
+    
+    def __init__(self, client: MFunsClient):
+        self.client = client
+        self.in_flight = 0
+        self.total = 0
+    
+    @property
+    def name(self) -> str:
+        """会话使用的token名称"""
+        return self.client.token_name
+
+class SessionPool:
+    """
+    多账号会话池
+    
+    每个账号一个独立的 MFunsClient，token 通过共享的 TokenService 按名称
+    （mfuns_<账号>）保存。调用按策略分配到某个会话：
+        round_robin  - 轮询
+        least_loaded - 当前进行中请求最少的会话
+        sticky       - 按key哈希固定到同一会话（同一对象的操作走同一账号）
+    
+    sticky 按全部账号名做最高随机权重哈希，与会话加入顺序和登录状态无关，
+    增减账号时只有该账号的key会变化；对应会话未登录时抛出 SessionUnavailable。
+    """
+    
+    STRATEGIES = ("round_robin", "least_loaded", "sticky")
+    
+    def __init__(
+        self,
+        token_names: Optional[List[str]] = None,
+        strategy: str = Config.SESSION_POOL_STRATEGY,
+        token_manager: Optional[TokenService] = None,
+        base_url: str = Config.MFUNS_BASE_URL
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"未知的分配策略: {strategy}")
+        
+        self.strategy = strategy
+        self.base_url = base_url
+        self.token_manager = token_manager or TokenService()
+        self._sessions: List[PooledSession] = []
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        
+        if token_names is None:
+            # 默认加载所有已保存的 MFuns 账号
+            token_names = sorted(
+                name for name in self.token_manager.names()
+                if name == "mfuns" or name.startswith("mfuns_")
+            )
+        for token_name in token_names:
+            self._add_session(token_name)
+    
+    @staticmethod
+    def token_name_for(account: str) -> str:
+        """账号对应的token名称（同时用作token文件名，去掉不安全字符）"""
+        return "mfuns_" + re.sub(r"[^\w.@-]", "_", account)
+    
+    def _add_session(self, token_name: str) -> PooledSession:
+        """创建并加入一个会话"""
+        session = PooledSession(MFunsClient(token_name, self.token_manager, self.base_url))
+        with self._lock:
+            self._sessions.append(session)
+        logger.info(f"会话池加入: {token_name}")
+        return session
+    
+    def add_account(self, account: str, password: str) -> bool:
+        """登录账号并加入会话池（已存在则重新登录）"""
+        token_name = self.token_name_for(account)
+        with self._lock:
+            session = next((s for s in self._sessions if s.name == token_name), None)
+        if session is None:
+            session = self._add_session(token_name)
+        return session.client.login(account, password)
+    
+    def __len__(self) -> int:
+        """会话数量"""
+        return len(self._sessions)
+    
+    def _candidates(self, key: Optional[str], strategy: str) -> List[PooledSession]:
+        """
+        按登录状态筛选候选会话
+        不持有锁：检查登录状态可能要读取token存储，不能阻塞其它线程借出和归还
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+        if not sessions:
+            raise RuntimeError("会话池为空，请先添加账号")
+        
+        if strategy == "sticky" and key is not None:
+            session = max(sessions, key=lambda s: zlib.crc32(f"{s.name}:{key}".encode('utf-8')))
+            if not session.client.is_logged_in():
+                raise SessionUnavailable(f"{key} 对应的账号 {session.name} 未登录")
+            return [session]
+        return [s for s in sessions if s.client.is_logged_in()] or sessions
+    
+    def _select(self, sessions: List[PooledSession], strategy: str) -> PooledSession:
+        """在候选会话中按策略选择（调用方持有锁）"""
+        if len(sessions) == 1:
+            return sessions[0]
+        if strategy == "least_loaded":
+            return min(sessions, key=lambda s: (s.in_flight, s.total))
+        return sessions[next(self._round_robin) % len(sessions)]
+    
+    @contextmanager
+    def acquire(self, key: Optional[str] = None, strategy: Optional[str] = None) -> Iterator[MFunsClient]:
+        """借出一个客户端，退出上下文时归还"""
+        strategy = strategy or self.strategy
+        candidates = self._candidates(key, strategy)
+        with self._lock:
+            session = self._select(candidates, strategy)
+            session.in_flight += 1
+            session.total += 1
+        try:
+            yield session.client
+        finally:
+            with self._lock:
+                session.in_flight -= 1
+    
+    def call(self, func: Callable[[MFunsClient], Any], key: Optional[str] = None, strategy: Optional[str] = None) -> Any:
+        """在分配到的客户端上执行 func(client)"""
+        with self.acquire(key, strategy) as client:
+            return func(client)
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """各会话的负载统计"""
+        with self._lock:
+            loads = [(s, s.in_flight, s.total) for s in self._sessions]
+        # 登录状态在锁外读取
+        return [
+            {
+                "name": s.name,
+                "logged_in": s.client.is_logged_in(),
+                "in_flight": in_flight,
+                "total": total,
+            }
+            for s, in_flight, total in loads
+        ]
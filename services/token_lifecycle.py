@@ -0,0 +1,184 @@
+# services/token_lifecycle.py
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from config import Config
+from apis.endpoints import get_endpoint
+from utils.request_handler import is_auth_failure
+
+logger = logging.getLogger(__name__)
+
+class TokenLifecycle:
+    """
+    token生命周期管理
+        - 按 token_expires_at 跟踪过期时间，临近过期时后台重新登录
+        - 通过只读接口 /user/info 校验token（不再用点赞探测，不经过响应缓存）
+        - 请求返回401/未登录业务码时，由请求处理器回调 on_auth_failure 刷新后重发一次
+    并发请求同时遇到失效token时只重新登录一次；重新登录失败后冷却一段时间，避免登录风暴。
+    """
+    
+    def __init__(
+        self,
+        client,
+        refresh_margin: float = Config.TOKEN_REFRESH_MARGIN,
+        validate_interval: float = Config.TOKEN_VALIDATE_INTERVAL,
+        cooldown: float = Config.TOKEN_REFRESH_COOLDOWN
+    ):
+        self.client = client
+        self.refresh_margin = refresh_margin
+        self.validate_interval = validate_interval
+        self.cooldown = cooldown
+        self._credentials: Optional[Tuple[str, str]] = self._credentials_from_env()
+        self._refresh_lock = threading.Lock()
+        self._last_validated = 0.0
+        self._last_failure = 0.0
+        self._valid: Optional[bool] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"validations": 0, "invalid": 0, "refreshes": 0, "refresh_failures": 0, "auth_retries": 0}
+    
+    @staticmethod
+    def _credentials_from_env() -> Optional[Tuple[str, str]]:
+        """从环境变量读取账号密码"""
+        account_var, password_var = Config.TOKEN_CREDENTIALS_ENV
+        account, password = os.environ.get(account_var), os.environ.get(password_var)
+        return (account, password) if account and password else None
+    
+    def set_credentials(self, account: str, password: str):
+        """记住账号密码（仅在内存中），用于过期前重新登录"""
+        self._credentials = (account, password)
+    
+    def clear_credentials(self):
+        """清除账号密码（登出时调用）"""
+        self._credentials = None
+        self._valid = None
+    
+    @property
+    def can_refresh(self) -> bool:
+        """是否可以自动重新登录"""
+        return self._credentials is not None
+    
+    def _current_token(self) -> Optional[str]:
+        return self.client.token_manager.get_token(self.client.token_name)
+    
+    def expires_at(self) -> Optional[float]:
+        """当前token过期时间戳（未知返回None）"""
+        return self.client.token_manager.get_expires_at(self.client.token_name)
+    
+    def expires_in(self) -> Optional[float]:
+        """距过期的秒数（未知返回None）"""
+        expires_at = self.expires_at()
+        return None if expires_at is None else expires_at - time.time()
+    
+    def needs_refresh(self) -> bool:
+        """是否已过期或即将过期"""
+        remaining = self.expires_in()
+        return remaining is not None and remaining <= self.refresh_margin
+    
+    def validate(self, force: bool = False) -> Optional[bool]:
+        """
+        通过 /user/info 校验token是否有效
+        返回 True/False；网络错误等无法判断时返回None。未强制时，校验间隔内直接返回上次结果。
+        """
+        token = self._current_token()
+        if not token:
+            return False
+        if not force and self._valid is not None and time.monotonic() - self._last_validated < self.validate_interval:
+            return self._valid
+        
+        # 显式带上要校验的token，绕过缓存和刷新回调：校验本身不会触发重新登录
+        method, path, kwargs = get_endpoint("user_info").request_args({})
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "Authorization": token}
+        result = self.client.request_handler.probe(method, path, **kwargs)
+        self._stats["validations"] += 1
+        if is_auth_failure(result):
+            self._valid = False
+            self._stats["invalid"] += 1
+        elif result.get("success") and (result.get("data") or {}).get("code") == 1:
+            self._valid = True
+        else:
+            return None
+        self._last_validated = time.monotonic()
+        return self._valid
+    
+    def refresh(self, failed_token: Optional[str] = None) -> bool:
+        """重新登录换取新token，返回当前是否持有可用的新token"""
+        with self._refresh_lock:
+            current = self.client.token_manager.get_token(self.client.token_name, fresh=True)
+            if failed_token and current and current != failed_token:
+                # 其它线程或进程已经刷新过，换上新token即可
+                self.client.request_handler.set_auth_token(current)
+                self.client.async_request_handler.set_auth_token(current)
+                return True
+            if not self._credentials:
+                logger.warning("token已失效或即将过期，但没有可用的账号密码，无法自动重新登录")
+                return False
+            if self._last_failure and time.monotonic() - self._last_failure < self.cooldown:
+                return False
+            
+            logger.info("重新登录以刷新token")
+            if self.client.auth.login(*self._credentials):
+                self._stats["refreshes"] += 1
+                self._valid = True
+                self._last_validated = time.monotonic()
+                self._last_failure = 0.0
+                return True
+            
+            self._stats["refresh_failures"] += 1
+            self._last_failure = time.monotonic()
+            return False
+    
+    def on_auth_failure(self, failed_token: str) -> bool:
+        """请求处理器回调：请求因token失效被拒绝"""
+        refreshed = self.refresh(failed_token)
+        if refreshed:
+            self._stats["auth_retries"] += 1
+        else:
+            self._valid = False
+        return refreshed
+    
+    def check(self):
+        """后台检查一次：临近过期则重新登录，否则按间隔校验"""
+        if not self._current_token():
+            return
+        if self.needs_refresh():
+            self.refresh()
+        elif self.validate() is False and self.can_refresh:
+            self.refresh(self._current_token())
+    
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"token后台检查失败: {e}")
+    
+    def start(self, interval: Optional[float] = None) -> "TokenLifecycle":
+        """启动后台检查线程"""
+        if self._thread and self._thread.is_alive():
+            return self
+        interval = interval or max(1.0, min(self.validate_interval, self.refresh_margin) / 2)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="token-lifecycle", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止后台检查"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """统计信息"""
+        remaining = self.expires_in()
+        return {
+            **self._stats,
+            "valid": self._valid,
+            "expires_in_s": None if remaining is None else round(remaining, 1),
+            "can_refresh": self.can_refresh,
+        }
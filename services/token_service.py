@@ -1,73 +1,137 @@
 # services/token_service.py
 import json
+import time
+import base64
+import threading
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from config import Config
+from services.token_store import create_token_store
 import logging
 
 logger = logging.getLogger(__name__)
 
+def jwt_expiry(token: str) -> Optional[float]:
+    """读取JWT的exp声明（不校验签名），不是JWT时返回None"""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except ValueError:
+        return None
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+def token_expires_at(token_data: Dict[str, Any]) -> Optional[float]:
+    """
+    token过期时间戳，依次取:
+        expires_at / login_time + expires_in（登录响应给出） / JWT exp / login_time + Config.TOKEN_TTL
+    都没有时返回None（有效期未知）
+    """
+    if token_data.get("expires_at"):
+        return float(token_data["expires_at"])
+    login_time = token_data.get("login_time")
+    if login_time and token_data.get("expires_in"):
+        return float(login_time) + float(token_data["expires_in"])
+    expiry = jwt_expiry(token_data.get("access_token") or "")
+    if expiry is not None:
+        return expiry
+    if login_time and Config.TOKEN_TTL > 0:
+        return float(login_time) + Config.TOKEN_TTL
+    return None
+
 class TokenService:
-    """Token服务"""
+    """Token服务（数据保存在token存储中，内存索引按 Config.TOKEN_CACHE_TTL 重新读取，以看到其它进程的更新）"""
     
-    def __init__(self):
+    def __init__(self, store=None):
         Config.init_dirs()
+        self.store = store or create_token_store()
         self.tokens: Dict[str, Dict] = {}
-        self.load_tokens()
+        self._read_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
     
     def get_token_path(self, api_name: str) -> Path:
-        """获取token文件路径"""
+        """获取token文件路径（文件存储）"""
         return Config.TOKENS_DIR / f"{api_name}_token.json"
     
     def load_tokens(self):
-        """加载所有保存的token"""
-        token_dir = Config.TOKENS_DIR
+        """加载所有保存的token到内存索引"""
+        now = time.monotonic()
+        with self._lock:
+            for api_name, token_data in self.store.items():
+                self.tokens[api_name] = token_data
+                self._read_at[api_name] = now
+    
+    def names(self) -> List[str]:
+        """所有已保存token的名称"""
+        return self.store.names()
+    
+    def _entry(self, api_name: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        """从内存索引读取token，超过缓存时间则重新从存储读取（不存在的名称同样缓存）"""
+        now = time.monotonic()
+        with self._lock:
+            if not fresh and now - self._read_at.get(api_name, float("-inf")) < Config.TOKEN_CACHE_TTL:
+                return self.tokens.get(api_name)
         
-        for token_file in token_dir.glob("*_token.json"):
-            api_name = token_file.stem.replace("_token", "")
-            try:
-                with open(token_file, 'r', encoding='utf-8') as f:
-                    self.tokens[api_name] = json.load(f)
-                logger.info(f"加载 {api_name} 的token")
-            except (FileNotFoundError, json.JSONDecodeError) as e:
-                logger.error(f"加载 {api_name} 的token失败: {e}")
+        try:
+            token_data = self.store.get(api_name)
+        except Exception as e:
+            logger.error(f"读取 {api_name} 的token失败: {e}")
+            return self.tokens.get(api_name)
+        
+        with self._lock:
+            if token_data is None:
+                self.tokens.pop(api_name, None)
+            else:
+                self.tokens[api_name] = token_data
+            self._read_at[api_name] = now
+        return token_data
     
     def save_token(self, api_name: str, token_data: Dict[str, Any]) -> bool:
         """保存token"""
         try:
-            token_file = self.get_token_path(api_name)
-            
-            with open(token_file, 'w', encoding='utf-8') as f:
-                json.dump(token_data, f, ensure_ascii=False, indent=2)
-            
-            self.tokens[api_name] = token_data
+            self.store.put(api_name, token_data)
+            with self._lock:
+                self.tokens[api_name] = token_data
+                self._read_at[api_name] = time.monotonic()
             logger.info(f"{api_name} 的token已保存")
             return True
         except Exception as e:
             logger.error(f"保存token失败: {e}")
             return False
     
-    def get_token(self, api_name: str, key: str = "access_token") -> Optional[str]:
-        """获取指定API的token"""
-        if api_name in self.tokens:
-            return self.tokens[api_name].get(key)
+    def get_token(self, api_name: str, key: str = "access_token", fresh: bool = False) -> Optional[str]:
+        """获取指定API的token（fresh=True 时跳过内存索引直接读取存储）"""
+        token_data = self._entry(api_name, fresh)
+        if token_data is not None:
+            return token_data.get(key)
         return None
     
     def clear_token(self, api_name: str) -> bool:
         """清除token"""
         try:
-            token_file = self.get_token_path(api_name)
-            if token_file.exists():
-                token_file.unlink()
-            if api_name in self.tokens:
-                del self.tokens[api_name]
+            self.store.delete(api_name)
+            with self._lock:
+                self.tokens.pop(api_name, None)
+                self._read_at[api_name] = time.monotonic()
             logger.info(f"已清除 {api_name} 的token")
             return True
         except Exception as e:
             logger.error(f"清除token失败: {e}")
             return False
     
+    def get_expires_at(self, api_name: str) -> Optional[float]:
+        """获取token过期时间戳（未知返回None）"""
+        token_data = self._entry(api_name)
+        if token_data is not None:
+            return token_expires_at(token_data)
+        return None
+    
     def has_valid_token(self, api_name: str, min_length: int = 10) -> bool:
-        """检查是否有有效的token"""
+        """检查是否有有效的token（格式正确且未过期）"""
         token = self.get_token(api_name)
-        return token is not None and len(token) >= min_length
\ No newline at end of file
+        if token is None or len(token) < min_length:
+            return False
+        expires_at = self.get_expires_at(api_name)
+        return expires_at is None or expires_at > time.time()
@@ -0,0 +1,216 @@
+# services/token_store.py
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，文件存储只做进程内加锁
+    fcntl = None
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class SQLiteTokenStore:
+    """SQLite token存储（WAL模式，多进程并发读写安全，按名称主键查询）"""
+    
+    def __init__(self, db_path: Path = None):
+        self.db_path = Path(db_path or Config.TOKEN_DB_PATH)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+    
+    def _conn(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取token，不存在返回None"""
+        row = self._conn().execute("SELECT data FROM tokens WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, name: str, data: Dict[str, Any]):
+        """写入token（整条替换）"""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO tokens (name, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (name, json.dumps(data, ensure_ascii=False), time.time())
+            )
+    
+    def delete(self, name: str):
+        """删除token"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM tokens WHERE name = ?", (name,))
+    
+    def names(self) -> List[str]:
+        """所有token名称"""
+        return [row[0] for row in self._conn().execute("SELECT name FROM tokens ORDER BY name")]
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """所有 (名称, token)"""
+        for name, data in self._conn().execute("SELECT name, data FROM tokens ORDER BY name").fetchall():
+            yield name, json.loads(data)
+    
+    def import_files(self, directory: Path) -> int:
+        """
+        迁移旧版 <name>_token.json 文件（每个目录只迁移一次，记录在 meta 表中）
+        库中没有、或文件比库中的记录更新时导入；文件保持原样，file 存储的进程仍可继续使用
+        """
+        marker = f"imported:{Path(directory).resolve()}"
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+            return 0
+        
+        migrated = 0
+        with conn:
+            # 写锁下再确认一次，多个进程同时启动时只有一个执行迁移
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+            for token_file in Path(directory).glob("*_token.json"):
+                name = token_file.stem[:-len("_token")]
+                try:
+                    with open(token_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    updated_at = token_file.stat().st_mtime
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"迁移 {name} 的token失败: {e}")
+                    continue
+                cursor = conn.execute(
+                    "INSERT INTO tokens (name, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at "
+                    "WHERE excluded.updated_at > tokens.updated_at",
+                    (name, json.dumps(data, ensure_ascii=False), updated_at)
+                )
+                if cursor.rowcount:
+                    migrated += 1
+                    logger.info(f"已迁移 {name} 的token到 {self.db_path.name}")
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, str(time.time())))
+        return migrated
+
+class FileTokenStore:
+    """
+    文件token存储（每个名称一个 <name>_token.json，与旧版格式相同）
+    写入时先写临时文件并fsync，再原子替换；写操作持有目录锁文件的排他锁（fcntl.flock）。
+    读取直接打开单个文件，不扫描目录。
+    """
+    
+    LOCK_FILE = ".tokens.lock"
+    
+    def __init__(self, directory: Path = None):
+        self.directory = Path(directory or Config.TOKENS_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def path_for(self, name: str) -> Path:
+        """token文件路径"""
+        return self.directory / f"{name}_token.json"
+    
+    @contextmanager
+    def _locked(self):
+        """进程内互斥 + 跨进程的文件锁"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.directory / self.LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取token，不存在返回None"""
+        try:
+            with open(self.path_for(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"读取 {name} 的token失败: {e}")
+            return None
+    
+    def put(self, name: str, data: Dict[str, Any]):
+        """写入token（临时文件 + fsync + 原子替换）"""
+        with self._locked():
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path_for(name))
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+            self._fsync_directory()
+    
+    def _fsync_directory(self):
+        """同步目录项，保证改名在断电后仍然生效（Windows不支持，忽略）"""
+        try:
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+    
+    def delete(self, name: str):
+        """删除token"""
+        with self._locked():
+            self.path_for(name).unlink(missing_ok=True)
+    
+    def names(self) -> List[str]:
+        """所有token名称"""
+        return sorted(path.stem[:-len("_token")] for path in self.directory.glob("*_token.json"))
+    
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """所有 (名称, token)"""
+        for name in self.names():
+            data = self.get(name)
+            if data is not None:
+                yield name, data
+
+def create_token_store(backend: str = None):
+    """按 Config.TOKEN_STORE 创建token存储（sqlite 首次使用时迁移一次旧版token文件）"""
+    backend = backend or Config.TOKEN_STORE
+    if backend == "sqlite":
+        store = SQLiteTokenStore()
+        store.import_files(Config.TOKENS_DIR)
+        return store
+    if backend == "file":
+        return FileTokenStore()
+    raise ValueError(f"未知的token存储: {backend}")
@@ -0,0 +1,31 @@
+# test/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from benchmark.mock_server import MockMFunsServer
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_data(tmp_path_factory):
+    """token、日志和抓包数据写到临时目录，关闭客户端限速和熔断"""
+    workdir = tmp_path_factory.mktemp("data")
+    Config.DATA_DIR = workdir
+    Config.LOGS_DIR = workdir / "logs"
+    Config.TOKENS_DIR = workdir / "tokens"
+    Config.TOKEN_DB_PATH = Config.TOKENS_DIR / "tokens.db"
+    Config.RESPONSES_DIR = workdir / "responses"
+    Config.CAPTURE_DB_PATH = workdir / "captures.db"
+    Config.RATE_LIMIT_ENABLED = False
+    Config.ENDPOINT_GUARD_ENABLED = False
+    Config.init_dirs()
+    return workdir
+
+@pytest.fixture
+def mock_server():
+    """本地模拟服务器"""
+    with MockMFunsServer() as server:
+        yield server
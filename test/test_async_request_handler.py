@@ -0,0 +1,97 @@
+# test/test_async_request_handler.py
+import time
+import asyncio
+
+from apis.endpoints import call_async
+from benchmark.mock_server import MOCK_TOKEN
+from utils.request_handler import RequestHandler
+from utils.async_request_handler import AsyncRequestHandler
+
+def _run(coro_fn, handler):
+    """在新的事件循环中执行，结束后关闭连接池"""
+    async def main():
+        async with handler:
+            return await coro_fn(handler)
+    return asyncio.run(main())
+
+def test_get_post_match_sync(mock_server):
+    sync = RequestHandler(mock_server.base_url)
+    sync.set_auth_token(MOCK_TOKEN)
+    handler = AsyncRequestHandler(mock_server.base_url)
+    handler.set_auth_token(MOCK_TOKEN)
+    
+    async def calls(h):
+        return await h.get("/user/info"), await h.post("/like/like", {"id": 1, "type": 1})
+    
+    async_get, async_post = _run(calls, handler)
+    assert async_get == sync.get("/user/info")
+    assert async_post == sync.post("/like/like", {"id": 1, "type": 1})
+    assert async_post["success"] and async_post["data"]["code"] == 1
+
+def test_failure_matches_sync(mock_server):
+    sync = RequestHandler(mock_server.base_url)
+    handler = AsyncRequestHandler(mock_server.base_url)
+    
+    async def calls(h):
+        return await h.get("/user/info")
+    
+    # 未登录: HTTP 200，业务码 -1
+    result = _run(calls, handler)
+    assert result == sync.get("/user/info")
+    assert result["data"]["code"] == -1
+
+def test_connector_limits(mock_server):
+    handler = AsyncRequestHandler(mock_server.base_url, pool_size=7, per_host_limit=2)
+    handler.set_auth_token(MOCK_TOKEN)
+    mock_server.latency_ms = 100
+    
+    async def calls(h):
+        connector = h._get_session().connector
+        start = time.perf_counter()
+        results = await asyncio.gather(*(h.post("/like/like", {"id": i, "type": 1}) for i in range(6)))
+        return connector, results, time.perf_counter() - start
+    
+    connector, results, elapsed = _run(calls, handler)
+    assert connector.limit == 7
+    assert connector.limit_per_host == 2
+    assert all(result["success"] for result in results)
+    # 单主机最多2个连接: 6个请求至少排3轮
+    assert elapsed >= 0.3
+
+def test_login_omits_authorization(mock_server):
+    handler = AsyncRequestHandler(mock_server.base_url)
+    handler.set_auth_token("stale-token")
+    
+    async def calls(h):
+        login = await call_async(h, "login", account="user", password="secret")
+        await h.get("/user/info")
+        return login
+    
+    result = _run(calls, handler)
+    assert result["data"]["data"]["access_token"] == MOCK_TOKEN
+    assert "Authorization" not in mock_server.last_headers["/auth/login"]
+    # 只作用于登录请求，共享的请求头不变
+    assert handler.headers["Authorization"] == "stale-token"
+    assert mock_server.last_headers["/user/info"]["Authorization"] == "stale-token"
+
+def test_session_rebuilt_for_new_event_loop(mock_server):
+    handler = AsyncRequestHandler(mock_server.base_url)
+    handler.set_auth_token(MOCK_TOKEN)
+    
+    async def call():
+        return handler._get_session(), await handler.get("/user/info")
+    
+    # 不经过 async with：上一个事件循环结束时session没有关闭
+    first_session, first = asyncio.run(call())
+    second_session, second = asyncio.run(call())
+    assert first["success"] and second["success"]
+    assert first_session is not second_session
+    assert first_session.closed
+    
+    # 同一事件循环中复用session
+    async def reuse():
+        async with handler:
+            return handler._get_session() is handler._get_session()
+    
+    assert asyncio.run(reuse())
+    assert handler._session is None
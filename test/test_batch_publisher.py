@@ -0,0 +1,86 @@
+# test/test_batch_publisher.py
+import json
+import types
+import threading
+
+from services import batch_publisher
+from services.batch_publisher import BatchPublisher
+
+class FakePublishing:
+    """按标题返回预设结果的 update_article"""
+    
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.titles = []
+        self._lock = threading.Lock()
+    
+    def update_article(self, **params):
+        with self._lock:
+            self.titles.append(params["title"])
+        result = self.results.get(params["title"])
+        if isinstance(result, Exception):
+            raise result
+        return result or {"success": True, "status_code": 200, "data": {"code": 1, "data": {"id": 1}}}
+
+def _manifest(tmp_path, titles) -> str:
+    path = tmp_path / "manifest.jsonl"
+    rows = [{"title": title, "cid": 1, "content": {"ops": [{"insert": f"{title}\n"}]}} for title in titles]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+def _run(tmp_path, publishing: FakePublishing, manifest: str, retry_unknown: bool = False):
+    publisher = BatchPublisher(
+        tmp_path / "out.jsonl", concurrency=2,
+        client=types.SimpleNamespace(content_publishing=publishing), retry_unknown=retry_unknown
+    )
+    errors = []
+    return publisher.run(publisher.iter_jobs(manifest, errors)), errors
+
+def test_jobs_are_streamed(tmp_path, monkeypatch):
+    manifest = _manifest(tmp_path, [f"t{i}" for i in range(20)])
+    read = []
+    original = batch_publisher.read_manifest
+    
+    def tracking(path):
+        for line_no, row in original(path):
+            read.append(line_no)
+            yield line_no, row
+    
+    monkeypatch.setattr(batch_publisher, "read_manifest", tracking)
+    read_at_publish = []
+    
+    class Tracking(FakePublishing):
+        def update_article(self, **params):
+            read_at_publish.append(len(read))
+            return super().update_article(**params)
+    
+    summary, errors = _run(tmp_path, Tracking(), manifest)
+    assert summary["success"] == 20 and errors == []
+    # 发布第一篇时清单只读了在途上限那么多行
+    assert read_at_publish[0] <= 4
+
+def test_unknown_is_held_until_retry(tmp_path):
+    manifest = _manifest(tmp_path, ["ok", "timeout", "error", "rejected"])
+    publishing = FakePublishing({
+        "timeout": {"success": False, "error": "Read timed out", "url": ""},
+        "error": RuntimeError("boom"),
+        "rejected": {"success": False, "error": "接口熔断中", "rejected": "circuit", "url": ""},
+    })
+    summary, _ = _run(tmp_path, publishing, manifest)
+    assert summary == {"success": 1, "failed": 1, "unknown": 2, "skipped": 0, "held": 0}
+    
+    # 重新运行：未知结果默认不再发送，失败的照常重试
+    publishing = FakePublishing()
+    summary, _ = _run(tmp_path, publishing, manifest)
+    assert publishing.titles == ["rejected"]
+    assert summary == {"success": 1, "failed": 0, "unknown": 0, "skipped": 1, "held": 2}
+    
+    summary, _ = _run(tmp_path, publishing, manifest, retry_unknown=True)
+    assert sorted(publishing.titles) == ["error", "rejected", "timeout"]
+    assert summary == {"success": 2, "failed": 0, "unknown": 0, "skipped": 2, "held": 0}
+
+def test_invalid_rows_reported(tmp_path):
+    manifest = _manifest(tmp_path, ["a", "a", ""])
+    summary, errors = _run(tmp_path, FakePublishing(), manifest)
+    assert summary["success"] == 1
+    assert [error["line"] for error in errors] == [2, 3]
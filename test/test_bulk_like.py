@@ -0,0 +1,42 @@
+# test/test_bulk_like.py
+import io
+import json
+import types
+import threading
+
+from services.bulk_like import BulkLiker, read_targets
+
+class FakeContent:
+    """记录点赞请求"""
+    
+    def __init__(self, fail_ids=()):
+        self.calls = []
+        self.fail_ids = set(fail_ids)
+        self._lock = threading.Lock()
+    
+    def like(self, target_id: int, like_type: int):
+        with self._lock:
+            self.calls.append((target_id, like_type))
+        code = 0 if target_id in self.fail_ids else 1
+        return {"success": True, "data": {"code": code, "msg": ""}}
+
+def _liker(tmp_path, content: FakeContent) -> BulkLiker:
+    return BulkLiker(tmp_path / "likes.jsonl", concurrency=4, client=types.SimpleNamespace(content=content))
+
+def test_duplicates_liked_once(tmp_path):
+    content = FakeContent()
+    targets = read_targets(io.StringIO("1\n2\n1\n1,0\n1,1\n{\"id\": 2}\n"))
+    summary = _liker(tmp_path, content).run(targets)
+    assert sorted(content.calls) == [(1, 0), (1, 1), (2, 0)]
+    assert summary == {"success": 3, "failed": 0, "skipped": 0, "duplicates": 3}
+
+def test_rerun_skips_done(tmp_path):
+    content = FakeContent(fail_ids={2})
+    _liker(tmp_path, content).run(read_targets(io.StringIO("1\n2\n")))
+    
+    content = FakeContent()
+    summary = _liker(tmp_path, content).run(read_targets(io.StringIO("1\n2\n2\n")))
+    assert content.calls == [(2, 0)]
+    assert summary == {"success": 1, "failed": 0, "skipped": 1, "duplicates": 1}
+    lines = (tmp_path / "likes.jsonl").read_text(encoding="utf-8").splitlines()
+    assert sorted(json.loads(line)["status"] for line in lines) == ["failed", "success", "success"]
@@ -0,0 +1,53 @@
+# test/test_capture_store.py
+import random
+
+import pytest
+
+from services.capture_store import CaptureStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = CaptureStore(tmp_path / "captures.db")
+    rng = random.Random(7)
+    rows = []
+    for i in range(500):
+        endpoint = "/like/like" if i % 2 else "/user/info"
+        success = i % 7 != 0
+        elapsed = None if i % 50 == 0 else rng.uniform(1, 1000)
+        rows.append((
+            f"r{i}", 1000.0 + i, "GET", endpoint, "http://x" + endpoint, 200 if success else 500,
+            1 if success else None, int(success), elapsed, None, None, None
+        ))
+    store.append_many(rows)
+    return store
+
+def _expected(store: CaptureStore, percentile: float, **filters):
+    values = sorted(
+        row["elapsed_ms"] for row in store.query(limit=10 ** 6, **filters) if row["elapsed_ms"] is not None
+    )
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(percentile / 100 * len(values))) - 1))]
+
+@pytest.mark.parametrize("filters", [{}, {"endpoint": "/like/like"}, {"endpoint": "/user/info", "failed": False}])
+def test_percentiles_in_one_query(store, filters):
+    percentiles = [0, 50, 90, 95, 99, 100]
+    result = store.latency_percentiles(percentiles, **filters)
+    assert result == {p: _expected(store, p, **filters) for p in percentiles}
+    assert store.latency_percentile(95, **filters) == result[95]
+
+def test_summary(store):
+    summary = store.summary([50, 99.9], endpoint="/like/like")
+    assert summary["total"] == store.count(endpoint="/like/like")
+    assert summary["failed"] == store.count(endpoint="/like/like", failed=True)
+    assert set(summary) == {"total", "failed", "p50_ms", "p99.9_ms"}
+    assert store.summary(endpoint="/missing") == {
+        "total": 0, "failed": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None
+    }
+
+def test_success_filter_uses_index(store):
+    where, args = store._where(endpoint="/like/like", failed=True)
+    plan = " ".join(
+        row[-1] for row in store._conn().execute(f"EXPLAIN QUERY PLAN SELECT COUNT(*) FROM captures{where}", args)
+    )
+    assert "idx_captures_endpoint_success" in plan
@@ -0,0 +1,52 @@
+# test/test_daemon.py
+import json
+import socket
+
+import pytest
+
+from config import Config
+from services.daemon import APIDaemon
+
+@pytest.fixture
+def daemon():
+    server = APIDaemon(port=0, auth_token="").start()
+    yield server
+    server.stop()
+
+def _post(daemon: APIDaemon, content_length: str, body: bytes = b""):
+    """发送原始请求并读到连接关闭，返回 (状态码, 响应头, 响应体)"""
+    with socket.create_connection(("127.0.0.1", daemon.port), timeout=5) as sock:
+        sock.sendall(
+            b"POST /rpc HTTP/1.1\r\nHost: localhost\r\n"
+            + (b"Connection: close\r\n" if body else b"")
+            + f"Content-Length: {content_length}\r\n\r\n".encode() + body
+        )
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    head, _, rest = data.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, json.loads(rest)
+
+@pytest.mark.parametrize("length", ["-1", "abc", "1e3"])
+def test_invalid_content_length(daemon, length):
+    status, headers, payload = _post(daemon, length)
+    assert status == 400
+    assert headers["Connection"] == "close"
+    assert payload["success"] is False
+
+def test_oversized_body_rejected_without_reading(daemon):
+    # 只声明长度不发送请求体：服务端若去读取会一直阻塞到超时
+    status, headers, payload = _post(daemon, str(Config.DAEMON_MAX_BODY_BYTES + 1))
+    assert status == 413
+    assert headers["Connection"] == "close"
+
+def test_valid_body_keeps_rpc_semantics(daemon):
+    body = b"{not json"
+    status, _, payload = _post(daemon, str(len(body)), body)
+    assert status == 200
+    assert payload["error"]["code"] == -32700
@@ -0,0 +1,89 @@
+# test/test_delta.py
+import io
+import json
+
+import pytest
+
+from utils.delta import (
+    DeltaBuilder, DeltaError, NormalizedDelta, compact_stream, iter_ops, merge_ops, normalize
+)
+
+def test_merge_ops_adjacent_same_attributes():
+    ops = [
+        {"insert": "a"},
+        {"insert": "b", "attributes": {}},
+        {"insert": "c", "attributes": {"bold": True}},
+        {"insert": "d", "attributes": {"bold": True}},
+        {"insert": {"image": "x.png"}},
+        {"insert": {"image": "y.png"}},
+        {"insert": "e"},
+    ]
+    assert list(merge_ops(ops)) == [
+        # 空的 attributes 与没有属性等价
+        {"insert": "ab"},
+        {"insert": "cd", "attributes": {"bold": True}},
+        # 嵌入对象不合并
+        {"insert": {"image": "x.png"}},
+        {"insert": {"image": "y.png"}},
+        {"insert": "e"},
+    ]
+
+def test_merge_ops_validates():
+    with pytest.raises(DeltaError):
+        list(merge_ops([{"insert": ""}]))
+    with pytest.raises(DeltaError):
+        list(merge_ops([{"insert": "a", "retain": 1}]))
+    with pytest.raises(DeltaError):
+        list(merge_ops([{"insert": {"image": "a", "video": "b"}}]))
+    # 不校验时原样合并
+    assert list(merge_ops([{"insert": "a"}, {"insert": "b"}], validate=False)) == [{"insert": "ab"}]
+
+def test_iter_ops_across_chunk_boundaries():
+    ops = [{"insert": "文字" * 7 + str(i), "attributes": {"size": 1234567890 + i}} for i in range(20)]
+    text = json.dumps({"version": 1, "ops": ops, "meta": {"a": [1, 2]}}, ensure_ascii=False, indent=1)
+    # 各种块大小下字符串、数字和空白都会被截断在块边界上
+    for chunk_size in (1, 2, 3, 7, 64, 10 ** 6):
+        assert list(iter_ops(io.StringIO(text), chunk_size)) == ops
+
+def test_iter_ops_number_split_at_boundary():
+    text = '{"ops":[{"insert":{"formula":12345}}]}'
+    start = text.index("12345")
+    # 数字恰好在块末尾被截断
+    assert list(iter_ops(io.StringIO(text), start + 2)) == [{"insert": {"formula": 12345}}]
+
+def test_iter_ops_errors():
+    with pytest.raises(DeltaError):
+        list(iter_ops(io.StringIO('{"meta": 1}')))
+    with pytest.raises(DeltaError):
+        list(iter_ops(io.StringIO('{"ops": [{"insert": "a"}')))
+    assert list(iter_ops(io.StringIO('{"ops": []}'))) == []
+
+def test_compact_stream():
+    ops = [{"insert": "a"}, {"insert": "b"}, {"insert": "c", "attributes": {"bold": True}}]
+    source = io.StringIO(json.dumps({"ops": ops}, indent=2))
+    target = io.StringIO()
+    counts = compact_stream(source, target, chunk_size=5)
+    assert target.getvalue() == '{"ops":[{"insert":"ab"},{"insert":"c","attributes":{"bold":true}}]}'
+    assert counts == {"ops_in": 3, "ops_out": 2, "bytes_out": len(target.getvalue().encode('utf-8'))}
+
+def test_normalize_returns_marked_string():
+    content = normalize('{"ops": [{"insert": "a"}, {"insert": "b"}]}')
+    assert isinstance(content, NormalizedDelta)
+    assert content == '{"ops":[{"insert":"ab"}]}'
+    assert normalize(content) is content
+
+def test_builder_merges_text():
+    builder = DeltaBuilder()
+    for _ in range(1000):
+        builder.line("x")
+    builder.insert("粗体", {"bold": True}).insert("!", {"bold": True}).embed("image", "a.png").link("链接", "https://x")
+    assert builder.to_dict() == {"ops": [
+        {"insert": "x\n" * 1000},
+        {"insert": "粗体!", "attributes": {"bold": True}},
+        {"insert": {"image": "a.png"}},
+        {"insert": "链接", "attributes": {"link": "https://x"}},
+    ]}
+    # 取过 ops 之后还能继续合并
+    builder.insert("...", {"link": "https://x"})
+    assert builder.ops[-1] == {"insert": "链接...", "attributes": {"link": "https://x"}}
+    assert json.loads(builder.dumps()) == builder.to_dict()
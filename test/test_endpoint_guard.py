@@ -0,0 +1,163 @@
+# test/test_endpoint_guard.py
+import types
+
+import pytest
+
+from utils import endpoint_guard
+from utils.endpoint_guard import (
+    EndpointGuard, CircuitBreaker, CLOSED, HALF_OPEN, OPEN, REJECT_CIRCUIT, REJECT_BULKHEAD
+)
+
+class FakeClock:
+    """手动推进的时钟"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(endpoint_guard, "time", types.SimpleNamespace(monotonic=fake))
+    return fake
+
+@pytest.fixture
+def guard(clock):
+    return EndpointGuard(failure_threshold=3, reset_timeout=10, half_open_max=1, bulkhead_limits={"/x": 2})
+
+def _attempt(guard: EndpointGuard, success: bool, endpoint: str = "/x"):
+    """一次完整的尝试，返回拒绝原因（放行时为None）"""
+    reason, generation = guard.enter(endpoint, timeout=0)
+    if reason is None:
+        guard.exit(endpoint, success, generation)
+    return reason
+
+def test_opens_after_consecutive_failures(guard):
+    assert _attempt(guard, False) is None
+    assert _attempt(guard, False) is None
+    # 中间一次成功清零失败计数
+    assert _attempt(guard, True) is None
+    assert _attempt(guard, False) is None
+    assert _attempt(guard, False) is None
+    assert guard.state("/x") == CLOSED
+    assert _attempt(guard, False) is None
+    assert guard.state("/x") == OPEN
+    assert guard.is_open("/x")
+    assert _attempt(guard, True) == REJECT_CIRCUIT
+    assert guard.stats()["endpoints"]["/x"]["circuit_opens"] == 1
+
+def test_half_open_probe_closes(guard, clock):
+    for _ in range(3):
+        _attempt(guard, False)
+    clock.advance(10)
+    assert guard.state("/x") == HALF_OPEN
+    assert not guard.is_open("/x")
+    
+    # 半开时只放行一个探测请求
+    assert guard.enter("/x", timeout=0)[0] is None
+    assert guard.enter("/x", timeout=0)[0] == REJECT_CIRCUIT
+    guard.exit("/x", True)
+    assert guard.state("/x") == CLOSED
+    assert _attempt(guard, True) is None
+
+def test_half_open_probe_failure_reopens(guard, clock):
+    for _ in range(3):
+        _attempt(guard, False)
+    clock.advance(10)
+    assert _attempt(guard, False) is None
+    assert guard.state("/x") == OPEN
+    clock.advance(9.9)
+    assert _attempt(guard, True) == REJECT_CIRCUIT
+    clock.advance(0.1)
+    assert _attempt(guard, True) is None
+    assert guard.state("/x") == CLOSED
+
+def test_endpoints_are_isolated(guard):
+    for _ in range(3):
+        _attempt(guard, False)
+    assert guard.state("/x") == OPEN
+    assert _attempt(guard, True, "/y") is None
+    assert guard.state("/y") == CLOSED
+
+def test_reset(guard):
+    for _ in range(3):
+        _attempt(guard, False)
+    guard.reset("/x")
+    assert guard.state("/x") == CLOSED
+    assert _attempt(guard, True) is None
+
+def test_bulkhead_limit(guard):
+    assert guard.enter("/x", timeout=0)[0] is None
+    assert guard.enter("/x", timeout=0)[0] is None
+    assert guard.enter("/x", timeout=0)[0] == REJECT_BULKHEAD
+    guard.exit("/x", True)
+    assert guard.enter("/x", timeout=0)[0] is None
+    stats = guard.stats()["endpoints"]["/x"]
+    assert stats["peak_in_flight"] == 2
+    assert stats["rejected_bulkhead"] == 1
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker(failure_threshold=0, reset_timeout=10, half_open_max=1)
+    for _ in range(10):
+        assert breaker.allow(0)
+        assert breaker.record(False, 0) is None
+    assert breaker.state == CLOSED
+
+def test_result_from_before_opening_is_ignored(guard, clock):
+    # 熔断前发出的慢请求在熔断后才成功返回
+    reason, stale = guard.enter("/x", timeout=0)
+    assert reason is None
+    guard.exit("/x", False)
+    for _ in range(2):
+        _attempt(guard, False, "/x")
+    assert guard.state("/x") == OPEN
+    guard.exit("/x", True, stale)
+    assert guard.state("/x") == OPEN
+    
+    # 仍然要经过半开探测
+    clock.advance(10)
+    assert _attempt(guard, True) is None
+    assert guard.state("/x") == CLOSED
+
+def test_stale_failure_does_not_reopen(guard, clock):
+    reason, stale = guard.enter("/x", timeout=0)
+    for _ in range(3):
+        _attempt(guard, False, "/x")
+    clock.advance(10)
+    assert _attempt(guard, True) is None
+    guard.exit("/x", False, stale)
+    assert guard.state("/x") == CLOSED
+    assert guard.stats()["endpoints"]["/x"]["consecutive_failures"] == 0
+
+def test_cancel_returns_probe_slot(guard, clock):
+    for _ in range(3):
+        _attempt(guard, False)
+    clock.advance(10)
+    reason, generation = guard.enter("/x", timeout=0)
+    assert reason is None
+    guard.cancel("/x", generation)
+    assert guard.stats()["endpoints"]["/x"]["in_flight"] == 0
+    assert _attempt(guard, True) is None
+    assert guard.state("/x") == CLOSED
+
+def test_bulkhead_checked_before_rate_limit(mock_server):
+    from benchmark.mock_server import MOCK_TOKEN
+    from utils.rate_limiter import RequestScheduler
+    from utils.request_handler import RequestHandler
+    
+    guard = EndpointGuard(bulkhead_limits={"/user/info": 1}, max_wait=0)
+    scheduler = RequestScheduler({"/user/info": (1, 1)}, account_limit=None)
+    handler = RequestHandler(mock_server.base_url, guard=guard, scheduler=scheduler)
+    handler.set_auth_token(MOCK_TOKEN)
+    
+    guard.enter("/user/info", timeout=0)
+    result = handler.get("/user/info")
+    assert not result["success"]
+    assert guard.stats()["endpoints"]["/user/info"]["rejected_bulkhead"] == 1
+    # 被并发上限拒绝的请求没有消耗限速令牌
+    assert scheduler.acquire("/user/info", timeout=0) is not None
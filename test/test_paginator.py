@@ -0,0 +1,77 @@
+# test/test_paginator.py
+import threading
+from typing import List, Optional, Tuple
+
+import pytest
+
+from services.paginator import Paginator, PaginationError
+
+class FakeListHandler:
+    """按 page/limit 切片返回固定列表的请求处理器，可限制每页最多条数"""
+    
+    def __init__(self, count: int, cap: Optional[int] = None, with_total: bool = False):
+        self.items = list(range(count))
+        self.cap = cap
+        self.with_total = with_total
+        self.calls: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+    
+    def request(self, method, path, stream_items=None, params=None, **kwargs):
+        page, limit = params["page"], params["limit"]
+        with self._lock:
+            self.calls.append((page, limit))
+        start = (page - 1) * limit
+        served = min(limit, self.cap or limit)
+        data = {"list": self.items[start:start + served]}
+        if self.with_total:
+            data["total"] = len(self.items)
+        return {"success": True, "data": {"code": 1, "data": data}}
+
+def _crawl(handler: FakeListHandler, **kwargs) -> List[int]:
+    return list(Paginator(handler, "list_articles", prefetch=0, **kwargs))
+
+def test_short_page_without_total_is_not_the_end():
+    # 服务端每页最多20条且不返回 total：第一页不满不能当作最后一页
+    handler = FakeListHandler(75, cap=20)
+    assert _crawl(handler, page_size=50) == list(range(75))
+    assert max(limit for _, limit in handler.calls) <= 50
+
+def test_cap_detected_after_page_size_grows():
+    # 每页条数加倍后才超过服务端上限
+    handler = FakeListHandler(200, cap=40)
+    paginator = Paginator(handler, "list_articles", prefetch=1, page_size=20, target_seconds=10)
+    assert list(paginator) == list(range(200))
+    assert paginator.max_page_size == 40
+
+def test_short_page_after_full_page_ends():
+    handler = FakeListHandler(45)
+    assert _crawl(handler, page_size=20, max_page_size=20) == list(range(45))
+    # 20 条的页完整返回过，第3页只有5条即为末尾，不再多请求
+    assert handler.calls == [(1, 20), (2, 20), (3, 20)]
+
+def test_total_confirms_the_end():
+    handler = FakeListHandler(15, with_total=True)
+    assert _crawl(handler, page_size=50) == list(range(15))
+    assert handler.calls == [(1, 50)]
+
+def test_total_with_cap_continues():
+    handler = FakeListHandler(50, cap=20, with_total=True)
+    assert _crawl(handler, page_size=50) == list(range(50))
+
+def test_cursor_resume_and_max_items():
+    handler = FakeListHandler(100, cap=30)
+    assert _crawl(handler, page_size=50, cursor=10, max_items=40) == list(range(10, 50))
+
+def test_failed_page_raises_with_cursor():
+    class Failing(FakeListHandler):
+        def request(self, method, path, stream_items=None, params=None, **kwargs):
+            if params["page"] > 1:
+                return {"success": False, "error": "boom"}
+            return super().request(method, path, stream_items, params, **kwargs)
+    
+    items = []
+    with pytest.raises(PaginationError) as info:
+        for item in Paginator(Failing(50), "list_articles", page_size=10, prefetch=0):
+            items.append(item)
+    assert items == list(range(10))
+    assert info.value.cursor == 10
@@ -0,0 +1,119 @@
+# test/test_rate_limiter.py
+import types
+
+import pytest
+
+from config import Config
+from utils import rate_limiter
+from utils.rate_limiter import RequestScheduler, TokenBucket, request_lane
+
+class FakeClock:
+    """手动推进的时钟"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=fake))
+    return fake
+
+@pytest.fixture
+def scheduler(clock):
+    return RequestScheduler({"/x": (1, 1), "/y": (1, 1)}, account_limit=None)
+
+def _grant(scheduler: RequestScheduler, ticket) -> bool:
+    with scheduler._lock:
+        return scheduler._try_grant(ticket) is None
+
+def _enqueue(scheduler: RequestScheduler, endpoint: str, lane=None, identity=None):
+    with scheduler._lock:
+        return scheduler._enqueue(endpoint, identity, lane)
+
+def test_token_bucket_refill(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time(clock()) == pytest.approx(0.5)
+    clock.advance(0.25)
+    assert bucket.wait_time(clock()) == pytest.approx(0.25)
+    clock.advance(10)
+    bucket.wait_time(clock())
+    # 不超过突发容量
+    assert bucket._tokens == 2
+
+def test_interactive_lane_first(scheduler, clock):
+    assert _grant(scheduler, _enqueue(scheduler, "/x"))
+    bulk = _enqueue(scheduler, "/x", "bulk")
+    interactive = _enqueue(scheduler, "/x", "interactive")
+    
+    clock.advance(1)
+    # 只有一个令牌：后到的 interactive 先放行
+    assert not _grant(scheduler, bulk)
+    assert _grant(scheduler, interactive)
+    assert not _grant(scheduler, bulk)
+    clock.advance(1)
+    assert _grant(scheduler, bulk)
+    assert scheduler.stats()["queue_depth"] == {"interactive": 0, "bulk": 0}
+
+def test_bulk_lane_aging(scheduler, clock):
+    assert _grant(scheduler, _enqueue(scheduler, "/x"))
+    bulk = _enqueue(scheduler, "/x", "bulk")
+    clock.advance(Config.RATE_LIMIT_AGING_SECONDS)
+    interactive = _enqueue(scheduler, "/x", "interactive")
+    
+    # 等待足够久的 bulk 提升到 interactive，按到达顺序先放行
+    assert not _grant(scheduler, interactive)
+    assert _grant(scheduler, bulk)
+
+def test_unrelated_endpoints_do_not_block(scheduler, clock):
+    assert _grant(scheduler, _enqueue(scheduler, "/x"))
+    waiting = _enqueue(scheduler, "/x")
+    assert not _grant(scheduler, waiting)
+    assert _grant(scheduler, _enqueue(scheduler, "/y", "bulk"))
+    # 不限速的接口不排队
+    assert _enqueue(scheduler, "/z") is None
+
+def test_request_lane_context(scheduler):
+    with request_lane("bulk"):
+        assert _enqueue(scheduler, "/x").lane == "bulk"
+    assert _enqueue(scheduler, "/x").lane == "interactive"
+    with pytest.raises(ValueError):
+        with request_lane("unknown"):
+            pass
+
+def test_waiter_stuck_elsewhere_does_not_block_shared_bucket(clock):
+    scheduler = RequestScheduler({"/x": (0.1, 1), "/y": (1, 1)}, account_limit=(10, 10))
+    assert _grant(scheduler, _enqueue(scheduler, "/x", identity="token"))
+    bulk = _enqueue(scheduler, "/x", "bulk", identity="token")
+    clock.advance(Config.RATE_LIMIT_AGING_SECONDS)
+    
+    # 提升后的 bulk 排在前面，但它卡在 /x 上，账号桶还有令牌：/y 的请求直接放行
+    assert not _grant(scheduler, bulk)
+    assert _grant(scheduler, _enqueue(scheduler, "/y", identity="token"))
+
+def test_waiter_stuck_on_shared_bucket_keeps_its_turn(clock):
+    scheduler = RequestScheduler({"/x": (1, 1), "/y": (1, 1)}, account_limit=(1, 1))
+    assert _grant(scheduler, _enqueue(scheduler, "/x", identity="token"))
+    first = _enqueue(scheduler, "/x", identity="token")
+    second = _enqueue(scheduler, "/y", identity="token")
+    
+    # 账号桶也是 first 的瓶颈：second 不能抢走账号桶补充的令牌
+    clock.advance(1)
+    assert not _grant(scheduler, second)
+    assert _grant(scheduler, first)
+    assert not _grant(scheduler, second)
+    clock.advance(1)
+    assert _grant(scheduler, second)
+
+def test_acquire_timeout_leaves_queue(scheduler):
+    assert scheduler.acquire("/x", timeout=0) == 0.0
+    assert scheduler.acquire("/x", timeout=0) is None
+    assert scheduler.stats()["queue_depth"] == {"interactive": 0, "bulk": 0}
@@ -0,0 +1,105 @@
+# test/test_response_body.py
+import json
+
+import pytest
+
+from utils import response_body
+from utils.response_body import (
+    JSONArray, ResponseTooLarge, decode_body, read_body, split_items
+)
+
+class FakeResponse:
+    """只实现 read_body 用到的部分"""
+    
+    def __init__(self, body: bytes, content_length=None):
+        self.headers = {} if content_length is None else {"Content-Length": str(content_length)}
+        self._body = body
+        self.closed = False
+    
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._body), chunk_size):
+            yield self._body[i:i + chunk_size]
+    
+    def close(self):
+        self.closed = True
+
+def _body(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+def test_read_body_limit():
+    assert read_body(FakeResponse(b"x" * 100), max_bytes=100) == b"x" * 100
+    # 声明的长度超过上限时不读取
+    response = FakeResponse(b"", content_length=101)
+    with pytest.raises(ResponseTooLarge):
+        read_body(response, max_bytes=100)
+    assert response.closed
+    # 没有声明长度时按实际读取的字节数
+    with pytest.raises(ResponseTooLarge):
+        read_body(FakeResponse(b"x" * 101), max_bytes=100)
+
+def test_decode_body_non_json():
+    assert decode_body(b'{"code": 1}') == {"code": 1}
+    assert decode_body(b"<html>502</html>") == {"raw_text": "<html>502</html>"}
+
+ITEMS = [
+    {"id": 1, "title": "普通"},
+    {"id": 2, "title": "含有 ] } , [ { 的标题"},
+    {"id": 3, "title": "转义 \"引号\" 和 \\ 反斜杠\\"},
+    {"id": 4, "tags": ["a", ["b", {"c": [1, [2, [3, [4, [5]]]]]}]]},
+    None,
+    "字符串元素",
+    12.5,
+    [],
+]
+
+def test_split_items_roundtrip():
+    payload = {"code": 1, "msg": "", "data": {"total": 8, "list": ITEMS, "page": 1, "after": [1, 2]}}
+    data, items = split_items(_body(payload), "data.list")
+    assert isinstance(items, JSONArray)
+    assert data == {"code": 1, "msg": "", "data": {"total": 8, "list": [], "page": 1, "after": [1, 2]}}
+    assert len(items) == len(ITEMS)
+    assert list(items) == ITEMS
+    assert items[3] == ITEMS[3]
+    assert items[-1] == []
+    assert items[1:3] == ITEMS[1:3]
+    with pytest.raises(IndexError):
+        items[len(ITEMS)]
+
+def test_split_items_whitespace_and_siblings():
+    body = b'{ "code" : 1 , "meta" : {"list": [9]} , "data" : {\n "list" : [ 1 , {"a" : [ ]} ,\n 3 ] } }'
+    data, items = split_items(body, "data.list")
+    assert data == {"code": 1, "meta": {"list": [9]}, "data": {"list": []}}
+    assert list(items) == [1, {"a": []}, 3]
+
+def test_split_items_empty_array():
+    data, items = split_items(b'{"data": {"list": [ ]}}', "data.list")
+    assert data == {"data": {"list": []}}
+    assert len(items) == 0
+    assert list(items) == []
+
+def test_split_items_falls_back():
+    # 路径不存在、不是数组或JSON不完整时与 decode_body 相同
+    assert split_items(b'{"data": {"list": null}}', "data.list") == ({"data": {"list": None}}, None)
+    assert split_items(b'{"code": 0}', "data.list") == ({"code": 0}, None)
+    assert split_items(b'{"data": {"list": [1, "x', "data.list")[1] is None
+    assert split_items(b"<html></html>", "data.list") == ({"raw_text": "<html></html>"}, None)
+
+def test_elements_decoded_on_access(monkeypatch):
+    payload = {"data": {"list": [{"id": i} for i in range(100)]}}
+    body = _body(payload)
+    decoded = []
+    original = response_body.loads
+    
+    def counting(data):
+        decoded.append(len(data))
+        return original(data)
+    
+    monkeypatch.setattr(response_body, "loads", counting)
+    data, items = split_items(body, "data.list")
+    # 只解码了沿途的键和数组之外的部分
+    assert sum(decoded) < 100
+    decoded.clear()
+    assert len(items) == 100
+    assert decoded == []
+    assert items[50] == {"id": 50}
+    assert len(decoded) == 1
@@ -0,0 +1,121 @@
+# test/test_response_cache.py
+import json
+import types
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from benchmark.mock_server import MOCK_TOKEN
+from utils import response_cache
+from utils.request_handler import RequestHandler
+from utils.response_cache import ResponseCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def _body(value) -> bytes:
+    return json.dumps({"code": 1, "data": value}).encode()
+
+def test_ttl_expiry(clock):
+    cache = ResponseCache(ttls={"/a": 5})
+    cache.put("k", "/a", _body(1), 200)
+    entry, fresh = cache.lookup("k")
+    assert fresh and entry.data == {"code": 1, "data": 1}
+    
+    clock[0] += 5
+    # 没有验证器的过期条目直接丢弃
+    assert cache.lookup("k") == (None, False)
+    assert cache.stats()["entries"] == 0
+    
+    cache.put("k", "/nocache", _body(1), 200)
+    assert cache.lookup("k") == (None, False)
+
+def test_lru_eviction_by_bytes(clock):
+    size = len(_body(0))
+    cache = ResponseCache(max_bytes=size * 2, ttls={}, default_ttl=60)
+    cache.put("a", "/x", _body(0), 200)
+    cache.put("b", "/x", _body(1), 200)
+    # 访问 a 后 b 成为最久未使用
+    cache.lookup("a")
+    cache.put("c", "/x", _body(2), 200)
+    assert cache.lookup("b") == (None, False)
+    assert cache.lookup("a")[1] and cache.lookup("c")[1]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == size * 2
+
+def test_expired_entry_with_validator_revalidates(clock):
+    cache = ResponseCache(ttls={"/a": 5})
+    cache.put("k", "/a", _body(1), 200, etag='"v1"')
+    clock[0] += 6
+    entry, fresh = cache.lookup("k")
+    assert not fresh and entry.validators() == {"If-None-Match": '"v1"'}
+    cache.refresh("k", "/a")
+    assert cache.lookup("k")[1]
+    assert cache.stats()["revalidated"] == 1
+
+def test_cached_result_is_a_copy(mock_server):
+    handler = RequestHandler(mock_server.base_url, cache=ResponseCache())
+    handler.set_auth_token(MOCK_TOKEN)
+    first = handler.get("/user/info")
+    first["data"]["data"]["name"] = "changed"
+    second = handler.get("/user/info")
+    assert second["cached"]
+    assert second["data"]["data"]["name"] == "benchmark"
+    second["data"]["data"].clear()
+    assert handler.get("/user/info")["data"]["data"]["name"] == "benchmark"
+    assert mock_server.stats()["/user/info"]["ok"] == 1
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    """返回带 ETag 的响应，If-None-Match 匹配时返回304"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = _body({"name": "etag"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def etag_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    server.daemon_threads = True
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_handler_revalidates_with_304(etag_server, clock):
+    handler = RequestHandler(
+        f"http://127.0.0.1:{etag_server.server_port}", cache=ResponseCache(ttls={"/item": 5})
+    )
+    first = handler.get("/item")
+    assert first["success"] and "cached" not in first
+    
+    clock[0] += 6
+    second = handler.get("/item")
+    assert second["cached"] and second["data"] == first["data"]
+    assert etag_server.requests == [None, '"v1"']
+    
+    # 304 后重新计时，有效期内不再请求
+    assert handler.get("/item")["cached"]
+    assert len(etag_server.requests) == 2
+    assert handler.cache.stats()["revalidated"] == 1
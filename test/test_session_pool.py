@@ -0,0 +1,44 @@
+# test/test_session_pool.py
+import types
+
+import pytest
+
+from services.session_pool import PooledSession, SessionPool, SessionUnavailable
+
+def _pool(states, strategy="round_robin") -> SessionPool:
+    pool = SessionPool(token_names=[], strategy=strategy)
+    
+    def checker(name: str):
+        def is_logged_in() -> bool:
+            # 登录状态不能在持有池锁时读取
+            assert not pool._lock.locked()
+            return states[name]
+        return is_logged_in
+    
+    for name in states:
+        client = types.SimpleNamespace(token_name=name, is_logged_in=checker(name))
+        pool._sessions.append(PooledSession(client))
+    return pool
+
+def test_round_robin_skips_logged_out():
+    pool = _pool({"a": True, "b": False, "c": True})
+    names = [pool.call(lambda client: client.token_name) for _ in range(4)]
+    assert sorted(set(names)) == ["a", "c"]
+    assert [s["logged_in"] for s in pool.stats()] == [True, False, True]
+
+def test_least_loaded():
+    pool = _pool({"a": True, "b": True}, "least_loaded")
+    with pool.acquire() as first:
+        with pool.acquire() as second:
+            assert first is not second
+    assert [s["in_flight"] for s in pool.stats()] == [0, 0]
+
+def test_sticky_keeps_key_on_logged_out_account():
+    states = {"a": True, "b": True, "c": True}
+    pool = _pool(states, "sticky")
+    name = pool.call(lambda client: client.token_name, key="article:1")
+    assert all(pool.call(lambda client: client.token_name, key="article:1") == name for _ in range(3))
+    
+    states[name] = False
+    with pytest.raises(SessionUnavailable):
+        pool.call(lambda client: client.token_name, key="article:1")
@@ -0,0 +1,136 @@
+# test/test_single_flight.py
+import time
+import asyncio
+import threading
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+def _wait_for(predicate, timeout: float = 5.0):
+    """等待条件成立（等待方登记后才放行首个调用方）"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.001)
+
+class _Leader:
+    """在后台线程中执行首个调用，fn 阻塞到 release 后返回 result 或抛出 error"""
+    
+    def __init__(self, sf: SingleFlight, key: str, result=None, error: BaseException = None):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.outcome = None
+        
+        def fn():
+            self.started.set()
+            self.release.wait()
+            if error is not None:
+                raise error
+            return result
+        
+        def run():
+            try:
+                self.outcome = sf.do(key, fn)
+            except BaseException as e:
+                self.outcome = e
+        
+        self.thread = threading.Thread(target=run)
+        self.thread.start()
+        self.started.wait()
+    
+    def finish(self):
+        self.release.set()
+        self.thread.join()
+
+def _follow(sf: SingleFlight, key: str, timeout=None):
+    """在后台线程中加入同键请求，返回 (线程, 结果列表)"""
+    results = []
+    
+    def fn():
+        raise AssertionError("等待方不应发送请求")
+    
+    thread = threading.Thread(target=lambda: results.append(sf.do(key, fn, timeout)))
+    thread.start()
+    return thread, results
+
+def test_followers_share_result():
+    sf = SingleFlight()
+    leader = _Leader(sf, "k", result={"success": True, "data": {"code": 1}})
+    followers = [_follow(sf, "k") for _ in range(3)]
+    _wait_for(lambda: sf.coalesced == 3)
+    leader.finish()
+    
+    assert leader.outcome == {"success": True, "data": {"code": 1}}
+    for thread, results in followers:
+        thread.join()
+        assert results == [{"success": True, "data": {"code": 1}, "coalesced": True}]
+    stats = sf.stats()
+    assert stats["leaders"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["peak_waiters"] == 3
+
+def test_leader_error_propagates_to_followers():
+    sf = SingleFlight()
+    leader = _Leader(sf, "k", error=RuntimeError("connection reset"))
+    thread, results = _follow(sf, "k")
+    _wait_for(lambda: sf.coalesced == 1)
+    leader.finish()
+    thread.join()
+    
+    # 首个调用方收到原异常，等待方收到失败结果且不重发
+    assert isinstance(leader.outcome, RuntimeError)
+    assert results == [{"success": False, "error": "connection reset", "coalesced": True}]
+    # 失败后同键的新请求重新发送
+    assert sf.do("k", lambda: {"success": True}) == {"success": True}
+    assert sf.leaders == 2
+
+def test_follower_timeout_does_not_cancel_leader():
+    sf = SingleFlight()
+    leader = _Leader(sf, "k", result={"success": True})
+    thread, results = _follow(sf, "k", timeout=0)
+    thread.join()
+    assert results == [None]
+    assert sf.stats()["wait_timeouts"] == 1
+    leader.finish()
+    assert leader.outcome == {"success": True}
+
+def test_different_keys_not_coalesced():
+    sf = SingleFlight()
+    leader = _Leader(sf, "a", result={"success": True})
+    assert sf.do("b", lambda: {"success": True, "key": "b"}) == {"success": True, "key": "b"}
+    leader.finish()
+    assert sf.coalesced == 0
+
+def test_make_key_separates_identity_and_body():
+    base = SingleFlight.make_key("get", "http://x/a", {"b": 1, "a": 2}, None, "token-1")
+    assert base == SingleFlight.make_key("GET", "http://x/a", {"a": 2, "b": 1}, None, "token-1")
+    assert base != SingleFlight.make_key("GET", "http://x/a", {"a": 2, "b": 1}, None, "token-2")
+    assert base != SingleFlight.make_key("GET", "http://x/a", {"a": 2, "b": 1}, {"c": 3}, "token-1")
+    assert "token-1" not in base
+
+def test_async_leader_error_propagates():
+    sf = SingleFlight()
+    
+    async def main():
+        release = asyncio.Event()
+        
+        async def leader_fn():
+            await release.wait()
+            raise RuntimeError("timeout")
+        
+        async def follower_fn():
+            raise AssertionError("等待方不应发送请求")
+        
+        leader = asyncio.create_task(sf.do_async("k", leader_fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(sf.do_async("k", follower_fn))
+        await asyncio.sleep(0)
+        assert sf.coalesced == 1
+        release.set()
+        with pytest.raises(RuntimeError):
+            await leader
+        return await follower
+    
+    assert asyncio.run(main()) == {"success": False, "error": "timeout", "coalesced": True}
+    assert sf.stats()["in_flight"] == 0
@@ -0,0 +1,104 @@
+# test/test_token_lifecycle.py
+import types
+from typing import Dict, List, Optional
+
+from benchmark.mock_server import MOCK_TOKEN
+from services import token_lifecycle
+from services.token_lifecycle import TokenLifecycle
+from utils.request_handler import RequestHandler
+from utils.response_cache import ResponseCache
+
+class FakeTokens:
+    """内存中的 token_manager"""
+    
+    def __init__(self, token: Optional[str] = None):
+        self.tokens: Dict[str, str] = {"mfuns": token} if token else {}
+    
+    def get_token(self, name: str, fresh: bool = False) -> Optional[str]:
+        return self.tokens.get(name)
+    
+    def get_expires_at(self, name: str) -> Optional[float]:
+        return None
+
+class FakeAuth:
+    """记录登录次数，按 succeed 决定登录结果"""
+    
+    def __init__(self, client, succeed: bool = True):
+        self.client = client
+        self.succeed = succeed
+        self.logins = 0
+    
+    def login(self, account: str, password: str) -> bool:
+        self.logins += 1
+        if self.succeed:
+            self.client.token_manager.tokens["mfuns"] = MOCK_TOKEN
+            self.client.request_handler.set_auth_token(MOCK_TOKEN)
+        return self.succeed
+
+def _client(base_url: str, token: Optional[str], succeed: bool = True):
+    client = types.SimpleNamespace(token_name="mfuns", token_manager=FakeTokens(token))
+    client.request_handler = RequestHandler(base_url, cache=ResponseCache())
+    client.async_request_handler = types.SimpleNamespace(set_auth_token=lambda token: None)
+    client.auth = FakeAuth(client, succeed)
+    lifecycle = TokenLifecycle(client, cooldown=30)
+    lifecycle.set_credentials("user", "pass")
+    client.request_handler.auth_refresher = lifecycle.on_auth_failure
+    if token:
+        client.request_handler.set_auth_token(token)
+    return client, lifecycle
+
+def test_validate_skips_cache(mock_server):
+    client, lifecycle = _client(mock_server.base_url, MOCK_TOKEN)
+    # 普通请求写入缓存后，校验仍然请求服务端
+    assert client.request_handler.get("/user/info")["success"]
+    assert lifecycle.validate(force=True) is True
+    assert lifecycle.validate(force=True) is True
+    assert mock_server.stats()["/user/info"]["ok"] == 3
+
+def test_validate_does_not_relogin(mock_server):
+    client, lifecycle = _client(mock_server.base_url, "expired-token")
+    assert lifecycle.validate(force=True) is False
+    assert client.auth.logins == 0
+    assert lifecycle.stats()["invalid"] == 1
+
+def test_refresh_cooldown(mock_server, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(token_lifecycle, "time", types.SimpleNamespace(monotonic=lambda: now[0], time=lambda: now[0]))
+    client, lifecycle = _client(mock_server.base_url, "expired-token", succeed=False)
+    
+    assert lifecycle.refresh("expired-token") is False
+    # 冷却期内不再重新登录
+    now[0] += 29
+    assert lifecycle.refresh("expired-token") is False
+    assert client.auth.logins == 1
+    
+    now[0] += 2
+    client.auth.succeed = True
+    assert lifecycle.refresh("expired-token") is True
+    assert client.auth.logins == 2
+    assert lifecycle.stats()["refresh_failures"] == 1
+
+def test_request_refreshes_then_resends(mock_server):
+    client, lifecycle = _client(mock_server.base_url, "expired-token")
+    result = client.request_handler.get("/user/info")
+    assert result["success"] and result["data"]["code"] == 1
+    assert client.auth.logins == 1
+    assert mock_server.stats()["/user/info"] == {"unauthorized": 1, "ok": 1}
+    assert lifecycle.stats()["auth_retries"] == 1
+
+def test_request_with_new_token_skips_login(mock_server):
+    client, lifecycle = _client(mock_server.base_url, "expired-token")
+    # 其它进程已经刷新过：换上新token重发，不重新登录
+    client.token_manager.tokens["mfuns"] = MOCK_TOKEN
+    assert client.request_handler.get("/user/info")["success"]
+    assert client.request_handler.headers["Authorization"] == MOCK_TOKEN
+    assert client.auth.logins == 0
+
+def test_explicit_authorization_not_refreshed(mock_server):
+    calls: List[str] = []
+    handler = RequestHandler(mock_server.base_url)
+    handler.set_auth_token("expired-token")
+    handler.auth_refresher = lambda token: calls.append(token) or True
+    result = handler.get("/user/info", headers={"Authorization": "expired-token"})
+    assert result["data"]["code"] == -1
+    assert calls == []
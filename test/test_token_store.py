@@ -0,0 +1,89 @@
+# test/test_token_store.py
+import os
+import json
+import threading
+
+import pytest
+
+from services.token_store import FileTokenStore, SQLiteTokenStore
+
+def _write_legacy(directory, name: str, data, mtime: float):
+    path = directory / f"{name}_token.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_migration_runs_once_and_keeps_files(tmp_path):
+    legacy = _write_legacy(tmp_path, "a", {"token": "old"}, 1000.0)
+    store = SQLiteTokenStore(tmp_path / "tokens.db")
+    assert store.import_files(tmp_path) == 1
+    assert store.get("a") == {"token": "old"}
+    # 文件保留给 file 存储的进程继续使用
+    assert legacy.exists()
+    
+    # 之后新出现的文件不再扫描导入
+    _write_legacy(tmp_path, "b", {"token": "b"}, 1000.0)
+    assert SQLiteTokenStore(tmp_path / "tokens.db").import_files(tmp_path) == 0
+    assert store.get("b") is None
+
+def test_migration_keeps_newer_record(tmp_path):
+    store = SQLiteTokenStore(tmp_path / "tokens.db")
+    store.put("fresh", {"token": "db"})
+    store.put("stale", {"token": "db"})
+    conn = store._conn()
+    with conn:
+        conn.execute("UPDATE tokens SET updated_at = 1000 WHERE name = 'stale'")
+    
+    _write_legacy(tmp_path, "fresh", {"token": "file"}, 1000.0)
+    _write_legacy(tmp_path, "stale", {"token": "file"}, 2000.0)
+    assert store.import_files(tmp_path) == 1
+    assert store.get("fresh") == {"token": "db"}
+    assert store.get("stale") == {"token": "file"}
+
+def test_concurrent_migration_imports_once(tmp_path):
+    for i in range(20):
+        _write_legacy(tmp_path, f"t{i}", {"token": i}, 1000.0)
+    results = []
+    
+    def migrate():
+        results.append(SQLiteTokenStore(tmp_path / "tokens.db").import_files(tmp_path))
+    
+    threads = [threading.Thread(target=migrate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [0] * 7 + [20]
+
+@pytest.mark.parametrize("backend", ["sqlite", "file"])
+def test_concurrent_writers(tmp_path, backend):
+    def make_store():
+        if backend == "sqlite":
+            return SQLiteTokenStore(tmp_path / "tokens.db")
+        return FileTokenStore(tmp_path)
+    
+    errors = []
+    
+    def write(worker: int):
+        store = make_store()
+        try:
+            for i in range(25):
+                store.put("shared", {"worker": worker, "seq": i})
+                store.put(f"own{worker}", {"seq": i})
+                assert store.get("shared") is not None
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    store = make_store()
+    assert store.get("shared")["seq"] == 24
+    assert dict(store.items()) == {
+        "shared": store.get("shared"),
+        **{f"own{worker}": {"seq": 24} for worker in range(6)},
+    }
@@ -1,6 +1,5 @@
 # ui/manager.py
-import sys
-from typing import List, Tuple, Dict, Any, Callable
+from typing import List, Tuple, Dict, Any
 
 class UIManager:
     """用户界面管理器"""
@@ -54,6 +53,8 @@ class UIManager:
         if result.get("success"):
             print(f" {result.get('api_name', 'API')} 执行成功")
             print(f"描述: {result.get('description', '')}")
+            if "elapsed_ms" in result:
+                print(f"耗时: {result['elapsed_ms']:.0f}ms")
             
             api_result = result.get("result", {})
             if api_result:
@@ -68,6 +69,29 @@ class UIManager:
         else:
             print(f"执行失败: {result.get('message', '未知错误')}")
     
+    def display_sweep_report(self, report: Dict[str, Any]):
+        """显示批量测试报告"""
+        current_module = None
+        for entry in report["results"]:
+            if entry["module"] != current_module:
+                current_module = entry["module"]
+                print(f"\n测试模块: {current_module}")
+                print("-" * 30)
+            
+            if entry["status"] == "skipped":
+                print(f"  {entry['api_name']}... 跳过（{entry['message']}）")
+            elif entry["status"] == "success":
+                print(f"  {entry['api_name']}... 成功 ({entry['latency_ms']:.0f}ms)")
+            else:
+                print(f"  {entry['api_name']}... 失败: {entry['message']} ({entry['latency_ms']:.0f}ms)")
+        
+        print("\n" + "=" * 40)
+        print(
+            f"共 {report['total']} 个API: 成功 {report['succeeded']}, "
+            f"失败 {report['failed']}, 跳过 {report['skipped']}"
+        )
+        print(f"并发数: {report['concurrency']}, 总耗时: {report['wall_time_ms']:.0f}ms")
+    
     def wait_for_continue(self):
         """等待用户继续"""
         input("\n按Enter键继续...")
\ No newline at end of file
@@ -0,0 +1,367 @@
+# utils/async_request_handler.py
+import time
+import uuid
+import logging
+from typing import Dict, Any, Callable, Optional
+
+from config import Config
+from utils.body_encoder import BodyEncoder
+from utils.retry_policy import RetryPolicy, parse_retry_after
+from utils.rate_limiter import RequestScheduler, get_scheduler
+from utils.endpoint_guard import EndpointGuard, get_endpoint_guard
+from utils.metrics import MetricsRegistry, get_metrics, observe_request, api_code_of
+from utils.request_handler import (
+    build_default_headers, normalize_endpoint, register_collectors, is_auth_failure,
+    save_request_log, save_response_log, save_error_log, rejected_result,
+    deadline_result, fits_deadline, timeout_for, coalesce_key, coalesced_result,
+    decode_response, logged_data, success_result, too_large_result
+)
+from utils.response_body import ResponseTooLarge, read_body_async
+from utils.single_flight import SingleFlight, get_single_flight
+from utils.deadline import remaining_time, cap_timeout
+
+logger = logging.getLogger(__name__)
+
+# aiohttp 为可选依赖，仅异步接口需要；导入耗时较长，首次创建session时才导入
+# （asyncio 同理，在异步方法内导入）
+aiohttp = None
+
+def import_aiohttp():
+    """导入 aiohttp（首次调用时），未安装时抛出 RuntimeError"""
+    global aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp as module
+        except ImportError:
+            raise RuntimeError("异步请求需要安装 aiohttp: pip install aiohttp")
+        aiohttp = module
+    return aiohttp
+
+class AsyncRequestHandler:
+    """异步请求处理器（asyncio + aiohttp，HTTP/1.1 keep-alive 连接池）"""
+    
+    def __init__(
+        self,
+        base_url: str = Config.MFUNS_BASE_URL,
+        pool_size: int = Config.ASYNC_POOL_SIZE,
+        per_host_limit: int = Config.ASYNC_PER_HOST_LIMIT,
+        retry_policy: Optional[RetryPolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        encoder: Optional[BodyEncoder] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        guard: Optional[EndpointGuard] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        self.base_url = base_url
+        self.retry_policy = retry_policy or RetryPolicy()
+        from apis.endpoints import timeouts
+        self.timeouts = timeouts()
+        self.guard = guard or (get_endpoint_guard() if Config.ENDPOINT_GUARD_ENABLED else None)
+        self.single_flight = single_flight or (get_single_flight() if Config.SINGLE_FLIGHT_ENABLED else None)
+        self.encoder = encoder or BodyEncoder()
+        self.metrics = metrics or (get_metrics() if Config.METRICS_ENABLED else None)
+        if self.metrics:
+            register_collectors(self.metrics, self)
+        self.scheduler = scheduler or (get_scheduler() if Config.RATE_LIMIT_ENABLED else None)
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.headers: Dict[str, str] = build_default_headers()
+        # token失效时的刷新回调（同步函数，在线程池中执行），由 TokenLifecycle 设置
+        self.auth_refresher: Optional[Callable[[str], bool]] = None
+        self._session = None
+        # 创建session时的事件循环（session和连接只能在这个循环中使用）
+        self._loop = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_session(self):
+        """获取session（首次使用或换了事件循环时在当前事件循环中创建）"""
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            self._detach_session()
+        if self._session is None or self._session.closed:
+            import_aiohttp()
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host_limit,
+                keepalive_timeout=Config.ASYNC_KEEPALIVE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=Config.DEFAULT_TIMEOUT)
+            )
+            self._loop = loop
+        return self._session
+    
+    def _detach_session(self):
+        """放弃其它事件循环中创建的session（如多次调用 asyncio.run）"""
+        import asyncio
+        
+        session, loop = self._session, self._loop
+        self._session = self._loop = None
+        if session.closed:
+            return
+        if loop.is_closed():
+            # 原事件循环已关闭，其中的连接无法再关闭或复用，只能丢弃（应在循环结束前调用 close）
+            session.detach()
+        else:
+            # 在原事件循环中关闭
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        logger.debug("已丢弃其它事件循环中的异步session")
+    
+    async def close(self):
+        """关闭连接池"""
+        import asyncio
+        
+        if self._session is not None and self._loop is not asyncio.get_running_loop():
+            self._detach_session()
+        elif self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = self._loop = None
+    
+    def set_auth_token(self, token: str):
+        """设置认证token"""
+        # MFuns API使用直接token，不加Bearer前缀
+        self.headers["Authorization"] = token
+        logger.debug(f"已设置认证token: {token[:30]}...")
+    
+    def remove_auth_token(self):
+        """移除认证token"""
+        if "Authorization" in self.headers:
+            del self.headers["Authorization"]
+            logger.debug("已移除认证token")
+    
+    def build_url(self, endpoint: str) -> str:
+        """构建完整URL"""
+        base = self.base_url.rstrip('/')
+        endpoint = endpoint.lstrip('/')
+        return f"{base}/{endpoint}"
+    
+    def _merge_headers(self, headers: Optional[Dict[str, Optional[str]]]) -> Dict[str, str]:
+        """合并请求头，值为None的键表示本次请求移除该头（与requests语义一致）"""
+        merged = dict(self.headers)
+        for key, value in (headers or {}).items():
+            if value is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+        return merged
+    
+    def _observe(
+        self,
+        method: str,
+        endpoint: str,
+        status_code: Optional[int],
+        elapsed_ms: float,
+        attempt: int,
+        sent_bytes: int,
+        ttfb_ms: Optional[float] = None,
+        received_bytes: int = 0,
+        response_data: Any = None
+    ):
+        """记录请求指标"""
+        if not self.metrics:
+            return
+        observe_request(
+            self.metrics, normalize_endpoint(endpoint), method.upper(), status_code, elapsed_ms,
+            ttfb_ms=ttfb_ms,
+            bytes_out=sent_bytes,
+            bytes_in=received_bytes,
+            retries=attempt - 1,
+            api_code=api_code_of(response_data)
+        )
+    
+    async def request(self, method: str, endpoint: str, headers: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """发送请求（相同的进行中幂等请求只发一次，共享结果）"""
+        key = coalesce_key(self, method, endpoint, self.build_url(endpoint), kwargs, headers)
+        if key is None:
+            return await self._request(method, endpoint, headers, **kwargs)
+        result = await self.single_flight.do_async(
+            key, lambda: self._request(method, endpoint, headers, **kwargs), cap_timeout(None)
+        )
+        return coalesced_result(self.metrics, method, endpoint, self.build_url(endpoint), result)
+    
+    async def _request(self, method: str, endpoint: str, headers: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        """发送请求（token失效时刷新token后重发一次）"""
+        import asyncio
+        
+        token = self.headers.get("Authorization")
+        result = await self._send(method, endpoint, headers, **kwargs)
+        
+        # 显式指定了Authorization的请求（如登录）不触发刷新
+        if not token or not self.auth_refresher or "Authorization" in (headers or {}):
+            return result
+        if is_auth_failure(result):
+            refreshed = await asyncio.get_running_loop().run_in_executor(None, self.auth_refresher, token)
+            if refreshed:
+                logger.info(f"token已刷新，重发请求: {method} {endpoint}")
+                result = await self._send(method, endpoint, headers, **kwargs)
+        return result
+    
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict] = None,
+        stream_items: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """发送请求（含限速和重试），stream_items 见 decode_response"""
+        import asyncio
+        
+        url = self.build_url(endpoint)
+        request_headers = self._merge_headers(headers)
+        
+        logger.info(f"请求: {method} {url}")
+        
+        payload = kwargs.pop('json', None)
+        encoded = None
+        if payload is not None:
+            logger.debug(f"请求数据: {payload}")
+            encoded = self.encoder.encode(normalize_endpoint(endpoint), payload)
+        
+        request_id = uuid.uuid4().hex
+        save_request_log(method, url, request_headers, payload, request_id, encoded)
+        
+        session = self._get_session()
+        self.retry_policy.record_request(endpoint)
+        if self.metrics:
+            self.metrics.add("in_flight_requests", {"endpoint": normalize_endpoint(endpoint)}, 1, help_text="进行中的请求数")
+        try:
+            start = time.perf_counter()
+            attempt = 0
+            sent_bytes = 0
+            ttfb_ms = None
+            while True:
+                attempt += 1
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    return deadline_result(self.metrics, method, endpoint, url)
+                # 先过熔断和并发上限再排队等待限速：被拒绝的请求不消耗限速令牌
+                generation = None
+                if self.guard:
+                    reason, generation = await self.guard.enter_async(endpoint, cap_timeout(self.guard.max_wait))
+                    if reason:
+                        return rejected_result(self.metrics, method, endpoint, url, reason)
+                if self.scheduler:
+                    waited = None
+                    try:
+                        waited = await self.scheduler.acquire_async(
+                            endpoint, request_headers.get("Authorization"), timeout=remaining_time()
+                        )
+                    finally:
+                        # 排队超时（或任务被取消）没有发出请求，归还并发名额
+                        if waited is None and self.guard:
+                            self.guard.cancel(endpoint, generation)
+                    if waited is None:
+                        return deadline_result(self.metrics, method, endpoint, url)
+                    if waited > 0:
+                        logger.debug(f"限速排队 {waited * 1000:.0f}ms: {endpoint}")
+                send_kwargs = kwargs
+                send_headers = request_headers
+                if encoded:
+                    send_kwargs = {**kwargs, "data": encoded["body"]}
+                    send_headers = {**request_headers, **encoded["headers"]}
+                sent_bytes += encoded["encoded_bytes"] if encoded else 0
+                attempt_start = time.perf_counter()
+                status_code = None
+                exc = None
+                too_large = None
+                # 连接/读超时按接口配置，有总时限时整次尝试不超过剩余时间
+                connect_timeout, read_timeout = timeout_for(self.timeouts, endpoint)
+                total = cap_timeout(None)
+                timeout = aiohttp.ClientTimeout(
+                    total=None if total is None else max(total, 0.001),
+                    sock_connect=connect_timeout, sock_read=read_timeout
+                )
+                try:
+                    async with session.request(
+                        method, url, headers=send_headers, timeout=timeout, **send_kwargs
+                    ) as response:
+                        # 进入上下文时已收到响应头
+                        ttfb_ms = (time.perf_counter() - attempt_start) * 1000
+                        status_code = response.status
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        # 分块读取，内存占用不超过 Config.MAX_RESPONSE_BYTES
+                        body = await read_body_async(response)
+                except ResponseTooLarge as e:
+                    too_large = e
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    exc = e
+                finally:
+                    # 连接失败、超时和5xx计入熔断
+                    if self.guard:
+                        self.guard.exit(endpoint, status_code is not None and status_code < 500, generation)
+                
+                if exc is not None:
+                    error = str(exc) or type(exc).__name__
+                    self.retry_policy.record_attempt(endpoint, "error")
+                    delay = fits_deadline(self.retry_policy.next_delay(
+                        method, endpoint, attempt,
+                        connect_error=isinstance(exc, aiohttp.ClientConnectorError)
+                    ))
+                    if delay is None:
+                        logger.error(f"请求失败 (尝试 {attempt}/{self.retry_policy.max_attempts}): {error}")
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        save_error_log(method, url, error, request_id, normalize_endpoint(endpoint), elapsed_ms)
+                        self._observe(method, endpoint, None, elapsed_ms, attempt, sent_bytes)
+                        return {
+                            "success": False,
+                            "error": error,
+                            "url": url
+                        }
+                    logger.error(f"请求失败 (尝试 {attempt}/{self.retry_policy.max_attempts}): {error}，{delay:.2f}秒后重试")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.info(f"响应: {status_code}")
+                self.retry_policy.record_attempt(endpoint, str(status_code))
+                
+                if too_large is not None:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    save_error_log(method, url, str(too_large), request_id, normalize_endpoint(endpoint), elapsed_ms)
+                    self._observe(method, endpoint, status_code, elapsed_ms, attempt, sent_bytes, ttfb_ms)
+                    return too_large_result(self.metrics, method, endpoint, url, status_code, too_large)
+                
+                # 服务器不接受压缩的请求体：改为不压缩立即重发
+                if status_code == 415 and encoded and encoded["encoding"]:
+                    self.encoder.mark_unsupported(normalize_endpoint(endpoint))
+                    encoded = self.encoder.encode(normalize_endpoint(endpoint), payload)
+                    continue
+                
+                # 429/5xx 按策略重试（非幂等请求只重试429）
+                delay = fits_deadline(self.retry_policy.next_delay(
+                    method, endpoint, attempt, status_code=status_code, retry_after=retry_after
+                ))
+                if delay is not None:
+                    logger.warning(f"响应 {status_code} (尝试 {attempt}/{self.retry_policy.max_attempts})，{delay:.2f}秒后重试")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                response_data, items = decode_response(body, stream_items)
+                
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                save_response_log(
+                    method, url, status_code, logged_data(response_data, items),
+                    request_id, normalize_endpoint(endpoint), elapsed_ms
+                )
+                self._observe(method, endpoint, status_code, elapsed_ms, attempt, sent_bytes, ttfb_ms, len(body), response_data)
+                
+                return success_result(status_code, response_data, url, items)
+        finally:
+            if self.metrics:
+                self.metrics.add("in_flight_requests", {"endpoint": normalize_endpoint(endpoint)}, -1)
+    
+    async def get(self, endpoint: str, params: Optional[Dict] = None, **kwargs) -> Dict:
+        """GET请求"""
+        return await self.request("GET", endpoint, params=params, **kwargs)
+    
+    async def post(self, endpoint: str, data: Optional[Dict] = None, **kwargs) -> Dict:
+        """POST请求"""
+        return await self.request("POST", endpoint, json=data, **kwargs)
@@ -0,0 +1,112 @@
+# utils/body_encoder.py
+import json
+import zlib
+import gzip
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ("gzip", "deflate")
+
+def dumps_compact(data: Any) -> bytes:
+    """紧凑序列化为UTF-8 JSON（无多余空白，中文不转义）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # orjson 不支持的类型（如超大整数）交给标准库处理
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def compress(body: bytes, encoding: str, level: int = Config.REQUEST_COMPRESSION_LEVEL) -> bytes:
+    """按 Content-Encoding 压缩请求体"""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise ValueError(f"不支持的压缩方式: {encoding}")
+
+class BodyEncoder:
+    """
+    请求体编码器 - 紧凑JSON + 可选压缩
+    
+    超过阈值的请求体按配置压缩（压缩后更大则不压缩）；某个接口返回415后，
+    该接口之后都不再压缩。按接口统计编码前后的字节数。
+    """
+    
+    def __init__(
+        self,
+        compression: Optional[str] = Config.REQUEST_COMPRESSION,
+        min_size: int = Config.REQUEST_COMPRESSION_MIN_BYTES
+    ):
+        if compression and compression not in ENCODINGS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        self.compression = compression or None
+        self.min_size = min_size
+        self._unsupported = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def encode(self, endpoint: str, data: Any) -> Dict[str, Any]:
+        """编码请求体，返回 body、需要附加的请求头和字节数"""
+        body = dumps_compact(data)
+        raw_bytes = len(body)
+        encoding = None
+        
+        if self.compression and raw_bytes >= self.min_size and endpoint not in self._unsupported:
+            compressed = compress(body, self.compression)
+            if len(compressed) < raw_bytes:
+                body = compressed
+                encoding = self.compression
+        
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "compressed": 0, "raw_bytes": 0, "encoded_bytes": 0})
+            stats["requests"] += 1
+            stats["compressed"] += encoding is not None
+            stats["raw_bytes"] += raw_bytes
+            stats["encoded_bytes"] += len(body)
+        
+        headers = {"Content-Type": "application/json"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return {
+            "body": body,
+            "headers": headers,
+            "encoding": encoding,
+            "raw_bytes": raw_bytes,
+            "encoded_bytes": len(body),
+        }
+    
+    def mark_unsupported(self, endpoint: str):
+        """服务器不接受压缩请求体（415），该接口之后不再压缩"""
+        with self._lock:
+            if endpoint not in self._unsupported:
+                logger.warning(f"服务器不接受压缩的请求体，已对该接口关闭压缩: {endpoint}")
+            self._unsupported.add(endpoint)
+    
+    def stats(self) -> Dict[str, Any]:
+        """各接口编码前后字节数统计"""
+        with self._lock:
+            endpoints = {endpoint: dict(s) for endpoint, s in self._stats.items()}
+            unsupported = sorted(self._unsupported)
+        
+        total_raw = sum(s["raw_bytes"] for s in endpoints.values())
+        total_encoded = sum(s["encoded_bytes"] for s in endpoints.values())
+        return {
+            "backend": "orjson" if orjson is not None else "json",
+            "compression": self.compression,
+            "raw_bytes": total_raw,
+            "encoded_bytes": total_encoded,
+            "saved_pct": round((1 - total_encoded / total_raw) * 100, 1) if total_raw else 0.0,
+            "unsupported": unsupported,
+            "endpoints": endpoints,
+        }
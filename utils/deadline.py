@@ -0,0 +1,42 @@
+# utils/deadline.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# 当前上下文（线程/协程）的截止时间（time.monotonic），None表示不限
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """
+    在当前上下文中为请求设置总时限（含限速排队、并发等待、重试和退避）
+    嵌套时取更早的截止时间；seconds 为None或<=0时不改变外层时限
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def current_deadline() -> Optional[float]:
+    """当前截止时间（time.monotonic），None表示不限"""
+    return _deadline.get()
+
+def remaining_time() -> Optional[float]:
+    """距截止时间的秒数（可能为负），None表示不限"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """用剩余时间限制超时（不限时返回原值）"""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    remaining = max(0.0, remaining)
+    return remaining if timeout is None else min(timeout, remaining)
@@ -0,0 +1,356 @@
+# utils/delta.py
+import io
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+# 流式读写时每次读取/输出的字符数
+CHUNK_SIZE = 64 * 1024
+
+class DeltaError(ValueError):
+    """Delta 文档格式错误"""
+
+class NormalizedDelta(str):
+    """normalize 的结果（已校验合并），发送前不再重复处理"""
+    
+    __slots__ = ()
+
+def validate_op(op: Any, index: int = 0) -> Dict[str, Any]:
+    """校验单个 op（文章内容只允许 insert），返回原对象"""
+    if not isinstance(op, dict):
+        raise DeltaError(f"第 {index} 个op不是对象")
+    
+    if "insert" not in op:
+        raise DeltaError(f"第 {index} 个op缺少 insert")
+    unknown = set(op) - {"insert", "attributes"}
+    if unknown:
+        raise DeltaError(f"第 {index} 个op包含未知字段: {', '.join(sorted(unknown))}")
+    
+    insert = op["insert"]
+    if isinstance(insert, str):
+        if not insert:
+            raise DeltaError(f"第 {index} 个op的 insert 为空")
+    elif isinstance(insert, dict):
+        # 嵌入对象（图片、视频等）只能有一个键
+        if len(insert) != 1:
+            raise DeltaError(f"第 {index} 个op的嵌入对象必须只有一个键")
+    else:
+        raise DeltaError(f"第 {index} 个op的 insert 必须是字符串或对象")
+    
+    if "attributes" in op and not isinstance(op["attributes"], dict):
+        raise DeltaError(f"第 {index} 个op的 attributes 必须是对象")
+    return op
+
+def merge_ops(ops: Iterable[Dict[str, Any]], validate: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    合并相邻且属性相同的文本 op（流式，只缓存当前一个op）
+    
+    空的 attributes 会被去掉，与没有属性等价。
+    """
+    pending: Optional[Dict[str, Any]] = None
+    pending_text: List[str] = []
+    
+    def flush() -> Dict[str, Any]:
+        if pending_text:
+            pending["insert"] = "".join(pending_text)
+            pending_text.clear()
+        return pending
+    
+    for index, op in enumerate(ops):
+        if validate:
+            validate_op(op, index)
+        attributes = op.get("attributes") or None
+        
+        if pending is not None and isinstance(op["insert"], str) and isinstance(pending["insert"], str) \
+                and pending.get("attributes") == attributes:
+            pending_text.append(op["insert"])
+            continue
+        
+        if pending is not None:
+            yield flush()
+        pending = {"insert": op["insert"]}
+        if attributes:
+            pending["attributes"] = attributes
+        if isinstance(op["insert"], str):
+            pending_text.append(op["insert"])
+    
+    if pending is not None:
+        yield flush()
+
+class DeltaBuilder:
+    """
+    Delta 文档构建器，追加时自动合并相邻的同属性文本
+    
+    与 merge_ops 相同，最后一个文本op的片段先放在列表中，
+    取 ops 或序列化时才拼接（逐段拼接字符串是O(n²)）
+    """
+    
+    def __init__(self):
+        self._ops: List[Dict[str, Any]] = []
+        self._pending_text: List[str] = []
+    
+    def _flush(self):
+        """把未拼接的片段合并到最后一个op"""
+        if len(self._pending_text) > 1:
+            self._ops[-1]["insert"] = "".join(self._pending_text)
+            self._pending_text = [self._ops[-1]["insert"]]
+    
+    @property
+    def ops(self) -> List[Dict[str, Any]]:
+        """已追加的op（合并后）"""
+        self._flush()
+        return self._ops
+    
+    def _append(self, op: Dict[str, Any]):
+        """追加新的op（结束上一个文本op）"""
+        self._flush()
+        self._ops.append(op)
+        self._pending_text = [op["insert"]] if isinstance(op["insert"], str) else []
+    
+    def insert(self, text: str, attributes: Optional[Dict[str, Any]] = None) -> "DeltaBuilder":
+        """追加文本"""
+        if not text:
+            return self
+        attributes = attributes or None
+        if self._pending_text and self._ops[-1].get("attributes") == attributes:
+            self._pending_text.append(text)
+            return self
+        
+        op = {"insert": text}
+        if attributes:
+            op["attributes"] = dict(attributes)
+        self._append(op)
+        return self
+    
+    def embed(self, kind: str, value: Any, attributes: Optional[Dict[str, Any]] = None) -> "DeltaBuilder":
+        """追加嵌入对象，例如 embed("image", url)"""
+        op = {"insert": {kind: value}}
+        if attributes:
+            op["attributes"] = dict(attributes)
+        self._append(op)
+        return self
+    
+    def link(self, text: str, url: str) -> "DeltaBuilder":
+        """追加链接"""
+        return self.insert(text, {"link": url})
+    
+    def line(self, text: str = "", attributes: Optional[Dict[str, Any]] = None) -> "DeltaBuilder":
+        """追加一行文本（以换行结尾）"""
+        return self.insert(text + "\n", attributes)
+    
+    def extend(self, ops: Iterable[Dict[str, Any]]) -> "DeltaBuilder":
+        """追加已有的 op（会校验并合并）"""
+        for index, op in enumerate(ops):
+            validate_op(op, index)
+            if isinstance(op["insert"], str):
+                self.insert(op["insert"], op.get("attributes"))
+            else:
+                self._append({k: op[k] for k in ("insert", "attributes") if op.get(k)})
+        return self
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Delta 文档对象"""
+        return {"ops": self.ops}
+    
+    def dumps(self) -> str:
+        """紧凑的JSON字符串"""
+        return "".join(iter_dump(self.ops))
+
+def iter_dump(ops: Iterable[Dict[str, Any]], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """流式序列化为紧凑JSON，按 chunk_size 左右的片段产出"""
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    buffer: List[str] = ['{"ops":[']
+    size = len(buffer[0])
+    first = True
+    
+    for op in ops:
+        piece = encode(op) if first else "," + encode(op)
+        first = False
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    
+    buffer.append("]}")
+    yield "".join(buffer)
+
+class _StreamReader:
+    """增量读取JSON文本，用 raw_decode 逐个解析值"""
+    
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """再读入一块，已到文件末尾返回False"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # 丢弃已解析的部分，避免缓冲区无限增长
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """跳过空白，返回下一个字符（文件结束返回空串）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+    
+    def expect(self, char: str):
+        """下一个非空白字符必须是 char"""
+        found = self.peek()
+        if found != char:
+            raise DeltaError(f"期望 '{char}'，实际为 '{found or '文件结束'}'")
+        self.pos += 1
+    
+    def decode(self) -> Any:
+        """解析下一个完整的JSON值，不完整时继续读入"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise DeltaError(f"JSON格式错误: {e}")
+            # 数字等值可能恰好在块边界被截断，需要确认后面还有字符
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+def iter_ops(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """从文件流中逐个读出 ops 数组里的 op，不会一次性载入整个文档"""
+    reader = _StreamReader(stream, chunk_size)
+    reader.expect("{")
+    found = False
+    
+    if reader.peek() == "}":
+        raise DeltaError("文档缺少 ops")
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+        if key == "ops":
+            found = True
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.decode()
+                    if reader.peek() == ",":
+                        reader.pos += 1
+                        continue
+                    reader.expect("]")
+                    break
+        else:
+            reader.decode()
+        
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        break
+    
+    if not found:
+        raise DeltaError("文档缺少 ops")
+
+def _ops_of(content: Union[str, Dict[str, Any]]) -> List[Any]:
+    """取出文档中的 ops 列表"""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise DeltaError(f"内容不是有效的JSON: {e}")
+    if not isinstance(content, dict) or not isinstance(content.get("ops"), list):
+        raise DeltaError("内容必须是包含 ops 列表的 Delta 文档")
+    return content["ops"]
+
+def normalize(content: Union[str, Dict[str, Any]]) -> NormalizedDelta:
+    """校验并合并 Delta 文档，返回紧凑的JSON字符串"""
+    if isinstance(content, NormalizedDelta):
+        return content
+    return NormalizedDelta("".join(iter_dump(merge_ops(_ops_of(content)))))
+
+def compact_stream(source: TextIO, target: TextIO, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """流式压缩 Delta 文档：边读边合并边写出，返回 op 数和字节数统计"""
+    counts = {"ops_in": 0, "ops_out": 0, "bytes_out": 0}
+    
+    def counted(ops):
+        for op in ops:
+            counts["ops_in"] += 1
+            yield op
+    
+    def merged():
+        for op in merge_ops(counted(iter_ops(source, chunk_size))):
+            counts["ops_out"] += 1
+            yield op
+    
+    for piece in iter_dump(merged(), chunk_size):
+        target.write(piece)
+        counts["bytes_out"] += len(piece.encode('utf-8'))
+    return counts
+
+def compact_file(source: Path, target: Optional[Path] = None) -> Dict[str, Any]:
+    """压缩 Delta 文件（target 为空时只统计不写出），返回压缩前后的对比"""
+    source = Path(source)
+    with open(source, 'r', encoding='utf-8') as src:
+        if target is None:
+            counts = compact_stream(src, io.StringIO())
+        else:
+            with open(target, 'w', encoding='utf-8') as dst:
+                counts = compact_stream(src, dst)
+    
+    bytes_in = source.stat().st_size
+    return {
+        "ops_in": counts["ops_in"],
+        "ops_out": counts["ops_out"],
+        "bytes_in": bytes_in,
+        "bytes_out": counts["bytes_out"],
+        "ops_saved_pct": round((1 - counts["ops_out"] / counts["ops_in"]) * 100, 1) if counts["ops_in"] else 0.0,
+        "bytes_saved_pct": round((1 - counts["bytes_out"] / bytes_in) * 100, 1) if bytes_in else 0.0,
+    }
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="校验并压缩 Quill Delta 文章内容")
+    parser.add_argument("input", help="Delta JSON 文件")
+    parser.add_argument("-o", "--output", help="输出文件，- 表示标准输出；不指定则只输出统计")
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        if args.output == "-":
+            with open(args.input, 'r', encoding='utf-8') as src:
+                compact_stream(src, sys.stdout)
+            sys.stdout.write("\n")
+            return 0
+        report = compact_file(args.input, args.output)
+    except (OSError, DeltaError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    
+    print(json.dumps(report, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
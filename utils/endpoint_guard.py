@@ -0,0 +1,284 @@
+# utils/endpoint_guard.py
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 熔断器状态（指标中以数值表示）
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# 拒绝原因
+REJECT_CIRCUIT = "circuit_open"
+REJECT_BULKHEAD = "bulkhead_full"
+
+class CircuitBreaker:
+    """
+    单个接口的熔断器（调用方持有锁）
+        closed    正常放行，连续失败达到阈值后打开
+        open      直接拒绝，冷却 reset_timeout 秒后转为半开
+        half_open 只放行 half_open_max 个探测请求，成功则关闭，失败则重新打开
+    每次打开（或手动重置）时 generation 加一，之前放行的尝试的结果不再计入
+    """
+    
+    __slots__ = (
+        "failure_threshold", "reset_timeout", "half_open_max",
+        "state", "failures", "opened_at", "probes", "opens", "rejected", "generation"
+    )
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, half_open_max)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.opens = 0
+        self.rejected = 0
+        self.generation = 0
+    
+    def is_open(self, now: float) -> bool:
+        """是否处于打开状态且仍在冷却中"""
+        return self.state == OPEN and now - self.opened_at < self.reset_timeout
+    
+    def allow(self, now: float) -> bool:
+        """是否放行一次请求（半开时占用一个探测名额）"""
+        if self.failure_threshold <= 0:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.probes = 0
+        if self.state == HALF_OPEN:
+            if self.probes >= self.half_open_max:
+                self.rejected += 1
+                return False
+            self.probes += 1
+        return True
+    
+    def record(self, success: bool, now: float, generation: Optional[int] = None) -> Optional[str]:
+        """
+        记录一次请求结果，状态变化时返回新状态
+        generation 为放行时的代数：熔断器之后打开过的（打开前就已发出的请求）不计入
+        """
+        if self.failure_threshold <= 0:
+            return None
+        if generation is not None and generation != self.generation:
+            return None
+        if success:
+            self.failures = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                return CLOSED
+            return None
+        
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = now
+            self.opens += 1
+            self.generation += 1
+            return OPEN
+        return None
+
+class Bulkhead:
+    """单个接口的并发上限（调用方持有锁）"""
+    
+    __slots__ = ("limit", "in_flight", "peak", "rejected")
+    
+    def __init__(self, limit: int):
+        self.limit = limit  # 0表示不限
+        self.in_flight = 0
+        self.peak = 0
+        self.rejected = 0
+    
+    def try_enter(self) -> bool:
+        if self.limit and self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        return True
+
+class EndpointGuard:
+    """
+    按接口的熔断和并发隔离（bulkhead）
+    一个接口持续失败时熔断快速失败，变慢时最多占用 limit 个并发，
+    不会拖住所有工作线程，其它接口的请求不受影响。
+    每次尝试（含重试）前调用 enter，结束后用 enter 返回的代数调用 exit；
+    放行后没有发出请求（如限速排队超时）时调用 cancel。
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = Config.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = Config.CIRCUIT_RESET_TIMEOUT,
+        half_open_max: int = Config.CIRCUIT_HALF_OPEN_MAX,
+        bulkhead_limits: Optional[Dict[str, int]] = None,
+        max_wait: float = Config.BULKHEAD_MAX_WAIT
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        if bulkhead_limits is None:
+            from apis.endpoints import bulkhead_limits as declared_limits
+            bulkhead_limits = declared_limits()
+        self.bulkhead_limits = {"/" + e.lstrip('/'): limit for e, limit in bulkhead_limits.items()}
+        self.max_wait = max_wait
+        
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._bulkheads: Dict[str, Bulkhead] = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+    
+    def _get(self, endpoint: str) -> Tuple[CircuitBreaker, Bulkhead]:
+        """接口的熔断器和并发上限（调用方持有锁，按需创建）"""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            threshold, reset_timeout = Config.CIRCUIT_BREAKERS.get(
+                endpoint, (self.failure_threshold, self.reset_timeout)
+            )
+            breaker = self._breakers[endpoint] = CircuitBreaker(threshold, reset_timeout, self.half_open_max)
+            self._bulkheads[endpoint] = Bulkhead(self.bulkhead_limits.get(endpoint, Config.BULKHEAD_DEFAULT_LIMIT))
+        return breaker, self._bulkheads[endpoint]
+    
+    def is_open(self, endpoint: str) -> bool:
+        """熔断中（不改变状态，用于排队前快速判断）"""
+        endpoint = "/" + endpoint.lstrip('/')
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            return breaker is not None and breaker.is_open(time.monotonic())
+    
+    def _admit(self, breaker: CircuitBreaker, bulkhead: Bulkhead) -> Tuple[Optional[str], int]:
+        """占用并发名额后检查熔断器（调用方持有锁），返回 (拒绝原因, 放行时的代数)"""
+        if not breaker.allow(time.monotonic()):
+            bulkhead.in_flight -= 1
+            self._cond.notify()
+            return REJECT_CIRCUIT, breaker.generation
+        return None, breaker.generation
+    
+    def enter(self, endpoint: str, timeout: Optional[float] = None) -> Tuple[Optional[str], int]:
+        """
+        开始一次尝试：并发已满时最多等待 timeout 秒（默认 max_wait），
+        返回 (拒绝原因, 代数)，拒绝原因为None表示放行，代数在 exit 时传回
+        """
+        endpoint = "/" + endpoint.lstrip('/')
+        timeout = self.max_wait if timeout is None else timeout
+        with self._cond:
+            breaker, bulkhead = self._get(endpoint)
+            if breaker.is_open(time.monotonic()):
+                breaker.rejected += 1
+                return REJECT_CIRCUIT, breaker.generation
+            deadline = time.monotonic() + timeout
+            while not bulkhead.try_enter():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    bulkhead.rejected += 1
+                    return REJECT_BULKHEAD, breaker.generation
+                self._cond.wait(remaining)
+            return self._admit(breaker, bulkhead)
+    
+    async def enter_async(self, endpoint: str, timeout: Optional[float] = None) -> Tuple[Optional[str], int]:
+        """开始一次尝试（异步，并发已满时轮询等待），返回值同 enter"""
+        import asyncio  # 只有异步请求用到
+        
+        endpoint = "/" + endpoint.lstrip('/')
+        timeout = self.max_wait if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                breaker, bulkhead = self._get(endpoint)
+                if breaker.is_open(time.monotonic()):
+                    breaker.rejected += 1
+                    return REJECT_CIRCUIT, breaker.generation
+                if bulkhead.try_enter():
+                    return self._admit(breaker, bulkhead)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    bulkhead.rejected += 1
+                    return REJECT_BULKHEAD, breaker.generation
+            await asyncio.sleep(min(remaining, Config.RATE_LIMIT_POLL_INTERVAL))
+    
+    def exit(self, endpoint: str, success: bool, generation: Optional[int] = None):
+        """
+        结束一次尝试：释放并发名额并记录结果（连接失败、超时和5xx算失败）
+        generation 为 enter 返回的代数，熔断器在此期间打开过时结果不计入
+        """
+        endpoint = "/" + endpoint.lstrip('/')
+        with self._cond:
+            breaker, bulkhead = self._get(endpoint)
+            bulkhead.in_flight -= 1
+            self._cond.notify()
+            changed = breaker.record(success, time.monotonic(), generation)
+        if changed == OPEN:
+            logger.warning(f"接口 {endpoint} 连续失败，熔断 {breaker.reset_timeout:g} 秒")
+        elif changed == CLOSED:
+            logger.info(f"接口 {endpoint} 已恢复，关闭熔断")
+    
+    def cancel(self, endpoint: str, generation: int):
+        """放行后没有发出请求：释放并发名额（和半开时的探测名额），不记录结果"""
+        endpoint = "/" + endpoint.lstrip('/')
+        with self._cond:
+            breaker, bulkhead = self._get(endpoint)
+            bulkhead.in_flight -= 1
+            self._cond.notify()
+            if breaker.state == HALF_OPEN and breaker.generation == generation and breaker.probes > 0:
+                breaker.probes -= 1
+    
+    def state(self, endpoint: str) -> str:
+        """熔断器状态"""
+        endpoint = "/" + endpoint.lstrip('/')
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                return CLOSED
+            if breaker.state == OPEN and not breaker.is_open(time.monotonic()):
+                return HALF_OPEN
+            return breaker.state
+    
+    def reset(self, endpoint: Optional[str] = None):
+        """手动关闭熔断（不指定接口时全部关闭）"""
+        with self._lock:
+            for name, breaker in self._breakers.items():
+                if endpoint is None or name == "/" + endpoint.lstrip('/'):
+                    breaker.state = CLOSED
+                    breaker.failures = 0
+                    breaker.generation += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """各接口的熔断状态（0=关闭 1=半开 2=打开）与并发统计"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, breaker in self._breakers.items():
+                bulkhead = self._bulkheads[endpoint]
+                endpoints[endpoint] = {
+                    "circuit_state": STATE_VALUES[breaker.state],
+                    "consecutive_failures": breaker.failures,
+                    "circuit_opens": breaker.opens,
+                    "rejected_circuit": breaker.rejected,
+                    "in_flight": bulkhead.in_flight,
+                    "peak_in_flight": bulkhead.peak,
+                    "concurrency_limit": bulkhead.limit,
+                    "rejected_bulkhead": bulkhead.rejected,
+                }
+        return {"endpoints": endpoints}
+
+_guard: Optional[EndpointGuard] = None
+_guard_lock = threading.Lock()
+
+def get_endpoint_guard() -> EndpointGuard:
+    """进程内共享的熔断/并发隔离（所有请求处理器共用）"""
+    global _guard
+    if _guard is None:
+        with _guard_lock:
+            if _guard is None:
+                _guard = EndpointGuard()
+    return _guard
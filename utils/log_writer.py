@@ -0,0 +1,250 @@
+# utils/log_writer.py
+import os
+import gzip
+import json
+import queue
+import atexit
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+from config import Config
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# 写入线程控制标记
+_STOP = object()
+
+class _FlushMarker:
+    """刷新标记，写入线程处理到此处时通知等待方"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+class LogWriter:
+    """后台日志写入器 - 从有界队列批量追加到滚动的JSONL分段文件"""
+    
+    def __init__(
+        self,
+        directory: Path = None,
+        prefix: str = "traffic",
+        max_queue: int = Config.LOG_QUEUE_SIZE,
+        batch_size: int = Config.LOG_BATCH_SIZE,
+        flush_interval: float = Config.LOG_FLUSH_INTERVAL,
+        segment_max_bytes: int = Config.LOG_SEGMENT_MAX_BYTES,
+        compress: bool = Config.LOG_COMPRESS,
+        full_policy: str = Config.LOG_QUEUE_FULL_POLICY
+    ):
+        if full_policy not in ("drop", "block"):
+            raise ValueError(f"未知的队列满策略: {full_policy}")
+        
+        self.directory = Path(directory or Config.RESPONSES_DIR)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_max_bytes = segment_max_bytes
+        self.compress = compress
+        self.full_policy = full_policy
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._segment_path: Optional[Path] = None
+        self._segment_bytes = 0
+        self._segment_seq = 0
+        self._closed = False
+        self._sinks: List[Callable[[List[Dict[str, Any]]], None]] = []
+        
+        self.written = 0
+        self.dropped = 0  # 生产线程和写入线程都会累加，用 _dropped_lock 保护
+        self.segments = 0
+        self._dropped_lock = threading.Lock()
+        
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def add_sink(self, sink: Callable[[List[Dict[str, Any]]], None]):
+        """添加批次消费者（在写入线程中调用，每批记录写入分段后调用一次）"""
+        self._sinks.append(sink)
+    
+    def write(self, record: Dict[str, Any]) -> bool:
+        """提交一条日志记录（不做磁盘I/O），队列满时按策略丢弃或阻塞"""
+        if self._closed:
+            return False
+        
+        try:
+            if self.full_policy == "block":
+                self._queue.put(record)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self._count_dropped(1)
+            return False
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的记录全部写入磁盘"""
+        if self._closed or not self._thread.is_alive():
+            return True
+        
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+    
+    def close(self):
+        """刷新剩余记录并停止写入线程"""
+        if self._closed:
+            return
+        
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+    
+    def _count_dropped(self, count: int):
+        """累计丢弃的记录数"""
+        with self._dropped_lock:
+            self.dropped += count
+    
+    def stats(self) -> Dict[str, Any]:
+        """写入统计"""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "segments": self.segments,
+            "segment": str(self._segment_path) if self._segment_path else None,
+        }
+    
+    def _run(self):
+        """写入线程主循环"""
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_file()
+                continue
+            
+            batch = []
+            markers = []
+            stop = False
+            
+            # 取到一条后尽量凑满一批再写
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    # 写入线程退出后之后的记录全部丢失，这里只丢弃这一批
+                    self._count_dropped(len(batch))
+                    logger.error(f"写入日志批次失败: {e}")
+                    self._close_segment()
+                self._run_sinks(batch)
+            if markers or stop:
+                self._flush_file()
+            for marker in markers:
+                marker.done.set()
+            
+            if stop:
+                self._close_segment()
+                return
+    
+    def _write_batch(self, batch):
+        """序列化并追加一批记录"""
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str))
+            except (TypeError, ValueError) as e:
+                logger.error(f"序列化日志记录失败: {e}")
+        if not lines:
+            return
+        
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        try:
+            if self._file is None or self._segment_bytes >= self.segment_max_bytes:
+                self._open_segment()
+            self._file.write(data)
+            self._segment_bytes += len(data)
+            self.written += len(lines)
+        except OSError as e:
+            self._count_dropped(len(lines))
+            logger.error(f"写入日志分段失败: {e}")
+    
+    def _flush_file(self):
+        """刷新当前分段，失败只记录日志"""
+        if not self._file:
+            return
+        try:
+            self._file.flush()
+        except Exception as e:
+            logger.error(f"刷新日志分段失败: {e}")
+    
+    def _run_sinks(self, batch):
+        """把批次交给所有sink，单个sink出错不影响写入"""
+        for sink in self._sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                logger.error(f"日志sink处理失败: {e}")
+    
+    def _open_segment(self):
+        """打开新的分段文件（滚动）"""
+        self._close_segment()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        self._segment_seq += 1
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        filename = (
+            f"{self.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            f"_{os.getpid()}_{self._segment_seq:04d}{suffix}"
+        )
+        self._segment_path = self.directory / filename
+        self._file = gzip.open(self._segment_path, 'ab') if self.compress else open(self._segment_path, 'ab')
+        self._segment_bytes = 0
+        self.segments += 1
+        logger.debug(f"日志分段: {self._segment_path}")
+    
+    def _close_segment(self):
+        """关闭当前分段文件"""
+        if self._file:
+            try:
+                self._file.close()
+            except Exception as e:
+                logger.error(f"关闭日志分段失败: {e}")
+            self._file = None
+
+_log_writer: Optional[LogWriter] = None
+_log_writer_lock = threading.Lock()
+
+def get_log_writer() -> LogWriter:
+    """获取进程内共享的日志写入器"""
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                writer = LogWriter()
+                if Config.CAPTURE_ENABLED:
+                    # 延迟导入，避免未启用历史存储时加载sqlite
+                    from services.capture_store import CaptureStore
+                    writer.add_sink(CaptureStore().ingest_batch)
+                if Config.METRICS_ENABLED:
+                    get_metrics().register_collector("log_writer", writer)
+                _log_writer = writer
+    return _log_writer
@@ -0,0 +1,354 @@
+# utils/metrics.py
+import re
+import json
+import math
+import time
+import bisect
+import logging
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "mfuns_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    """标签字典转换为可哈希的键"""
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """样本的p分位数（最近邻插值），无样本返回None"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class Histogram:
+    """直方图：累计分桶（导出用）+ 最近样本窗口（算分位数用）"""
+    
+    __slots__ = ("buckets", "counts", "count", "sum", "window")
+    
+    def __init__(self, buckets: Tuple[float, ...], window: int):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.window = deque(maxlen=window)
+    
+    def observe(self, value: float):
+        """记录一个样本"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.window.append(value)
+    
+    def summary(self) -> Dict[str, Any]:
+        """计数、均值和 p50/p95/p99"""
+        samples = list(self.window)
+        summary = {"count": self.count, "avg": round(self.sum / self.count, 2) if self.count else 0.0}
+        for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)):
+            value = percentile(samples, p)
+            summary[name] = round(value, 2) if value is not None else None
+        return summary
+
+class MetricsRegistry:
+    """
+    指标注册表 - 计数器、仪表和直方图，按标签区分序列
+    
+    各组件（缓存、重试策略、调度器、日志写入器等）通过 register_collector
+    登记，生成快照时调用其 stats() 拉取，不在请求路径上增加开销。
+    """
+    
+    def __init__(self, buckets: Tuple[float, ...] = Config.METRICS_BUCKETS_MS, window: int = Config.METRICS_WINDOW):
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._collectors: Dict[str, List[weakref.ref]] = {}
+        self._lock = threading.Lock()
+    
+    def _series(self, name: str, kind: str, help_text: str) -> Dict[Labels, Any]:
+        """获取指标的序列表（调用方持有锁）"""
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {"type": kind, "help": help_text, "series": {}}
+        return metric["series"]
+    
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1, help_text: str = ""):
+        """计数器累加"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._series(name, "counter", help_text)
+            series[key] = series.get(key, 0) + value
+    
+    def add(self, name: str, labels: Optional[Dict[str, Any]] = None, delta: float = 1, help_text: str = ""):
+        """仪表增减"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._series(name, "gauge", help_text)
+            series[key] = series.get(key, 0) + delta
+    
+    def set(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 0, help_text: str = ""):
+        """仪表设值"""
+        key = _labels(labels)
+        with self._lock:
+            self._series(name, "gauge", help_text)[key] = value
+    
+    def observe(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 0, help_text: str = ""):
+        """直方图记录样本"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._series(name, "histogram", help_text)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets, self.window)
+            histogram.observe(value)
+    
+    @contextmanager
+    def in_flight(self, name: str, labels: Optional[Dict[str, Any]] = None, help_text: str = ""):
+        """进行中请求数仪表（进入+1，退出-1）"""
+        self.add(name, labels, 1, help_text)
+        try:
+            yield
+        finally:
+            self.add(name, labels, -1, help_text)
+    
+    def register_collector(self, name: str, source: Any):
+        """登记提供 stats() 的组件（弱引用，同一对象只登记一次）"""
+        with self._lock:
+            refs = [ref for ref in self._collectors.get(name, []) if ref() is not None]
+            if not any(ref() is source for ref in refs):
+                refs.append(weakref.ref(source))
+            self._collectors[name] = refs
+    
+    def _collect(self) -> Dict[str, List[Dict[str, Any]]]:
+        """拉取各组件统计"""
+        with self._lock:
+            sources = {name: [ref() for ref in refs] for name, refs in self._collectors.items()}
+        
+        collected = {}
+        for name, objects in sources.items():
+            stats = []
+            for source in objects:
+                if source is None:
+                    continue
+                try:
+                    stats.append(source.stats())
+                except Exception as e:
+                    logger.warning(f"采集 {name} 统计失败: {e}")
+            if stats:
+                collected[name] = stats
+        return collected
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON快照：所有指标序列 + 各组件统计"""
+        metrics = {}
+        with self._lock:
+            for name, metric in self._metrics.items():
+                series = []
+                for key, value in metric["series"].items():
+                    entry = {"labels": dict(key)}
+                    if metric["type"] == "histogram":
+                        entry.update(value.summary())
+                    else:
+                        entry["value"] = value
+                    series.append(entry)
+                metrics[name] = {"type": metric["type"], "series": series}
+        
+        return {
+            "timestamp": time.time(),
+            "metrics": metrics,
+            "components": self._collect(),
+        }
+    
+    def render_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                full_name = PREFIX + name
+                if metric["help"]:
+                    lines.append(f"# HELP {full_name} {metric['help']}")
+                lines.append(f"# TYPE {full_name} {metric['type']}")
+                for key, value in metric["series"].items():
+                    if metric["type"] != "histogram":
+                        lines.append(f"{full_name}{_format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float("inf"),), value.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{full_name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {value.sum}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {value.count}")
+        
+        for component, stats_list in sorted(self._collect().items()):
+            samples: Dict[str, List[str]] = {}
+            for index, stats in enumerate(stats_list):
+                instance = (("instance", str(index)),) if len(stats_list) > 1 else ()
+                for metric_name, key, value in _flatten(component, stats):
+                    samples.setdefault(metric_name, []).append(
+                        f"{PREFIX}{metric_name}{_format_labels(instance + key)} {value}"
+                    )
+            for metric_name, metric_lines in sorted(samples.items()):
+                lines.append(f"# TYPE {PREFIX}{metric_name} gauge")
+                lines.extend(metric_lines)
+        
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key: Labels) -> str:
+    """格式化标签"""
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+def _metric_name(*parts: str) -> str:
+    """拼接为合法的指标名"""
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(parts))
+
+def _flatten(component: str, stats: Dict[str, Any]) -> List[Tuple[str, Labels, float]]:
+    """
+    把组件的 stats() 展开为指标样本:
+        {"hits": 1}                          -> <组件>_hits
+        {"queue_depth": {"bulk": 0}}         -> <组件>_queue_depth{key="bulk"}
+        {"endpoints": {"/a": {"retries": 1}}} -> <组件>_endpoints_retries{key="/a"}
+    非数值的字段会被忽略
+    """
+    samples = []
+    for name, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            samples.append((_metric_name(component, name), (), value))
+        elif isinstance(value, dict):
+            for key, inner in value.items():
+                labels = (("key", str(key)),)
+                if isinstance(inner, (int, float)) and not isinstance(inner, bool):
+                    samples.append((_metric_name(component, name), labels, inner))
+                elif isinstance(inner, dict):
+                    for field, leaf in inner.items():
+                        if isinstance(leaf, (int, float)) and not isinstance(leaf, bool):
+                            samples.append((_metric_name(component, name, field), labels, leaf))
+    return samples
+
+def observe_request(
+    registry: "MetricsRegistry",
+    endpoint: str,
+    method: str,
+    status_code: Optional[int],
+    elapsed_ms: float,
+    ttfb_ms: Optional[float] = None,
+    bytes_out: int = 0,
+    bytes_in: int = 0,
+    retries: int = 0,
+    api_code: Any = None
+):
+    """记录一次HTTP请求（含重试）的标准指标"""
+    labels = {"endpoint": endpoint}
+    status = str(status_code) if status_code is not None else "error"
+    
+    registry.inc("requests_total", {**labels, "method": method, "status": status}, help_text="请求数（按最终状态）")
+    if status_code != 200:
+        registry.inc("request_failures_total", labels, help_text="失败的请求数（网络错误或非200）")
+    elif api_code is not None and api_code != 1:
+        registry.inc("api_errors_total", {**labels, "code": api_code}, help_text="业务失败数（HTTP 200 但 code != 1）")
+    if retries:
+        registry.inc("retries_total", labels, retries, help_text="重试次数")
+    
+    registry.observe("request_duration_ms", labels, elapsed_ms, help_text="请求耗时（毫秒，含重试和排队）")
+    if ttfb_ms is not None:
+        registry.observe("ttfb_ms", labels, ttfb_ms, help_text="首字节时间（毫秒，最后一次尝试）")
+    if bytes_out:
+        registry.inc("request_bytes_total", labels, bytes_out, help_text="发送的请求体字节数")
+    if bytes_in:
+        registry.inc("response_bytes_total", labels, bytes_in, help_text="接收的响应体字节数")
+
+def api_code_of(data: Any) -> Any:
+    """取响应中的业务code"""
+    return data.get("code") if isinstance(data, dict) else None
+
+def _exporter_handler() -> type:
+    """指标导出的HTTP处理类（http.server 导入较慢，启动导出服务时才导入）"""
+    from http.server import BaseHTTPRequestHandler
+    
+    class _ExporterHandler(BaseHTTPRequestHandler):
+        """指标导出的HTTP处理"""
+        
+        def log_message(self, format, *args):
+            logger.debug("指标导出: " + format % args)
+        
+        def do_GET(self):
+            renderer = self.server.renderers.get(self.path.split("?")[0])
+            if renderer is None:
+                self.send_error(404)
+                return
+            content_type, render = renderer
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+    return _ExporterHandler
+
+class MetricsExporter:
+    """指标导出服务（后台线程），可通过 add_renderer 增加导出格式"""
+    
+    def __init__(self, registry: Optional[MetricsRegistry] = None, host: str = Config.METRICS_HOST, port: int = Config.METRICS_PORT):
+        self.registry = registry or get_metrics()
+        self.host = host
+        self.port = port
+        self.renderers: Dict[str, Tuple[str, Callable[[], str]]] = {
+            "/metrics": ("text/plain; version=0.0.4; charset=utf-8", self.registry.render_prometheus),
+            "/metrics.json": ("application/json", lambda: json.dumps(self.registry.snapshot(), ensure_ascii=False)),
+        }
+        self._server = None
+    
+    def add_renderer(self, path: str, content_type: str, render: Callable[[], str]):
+        """增加导出路径"""
+        self.renderers[path] = (content_type, render)
+    
+    def start(self) -> "MetricsExporter":
+        """启动导出服务"""
+        from http.server import ThreadingHTTPServer
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), _exporter_handler())
+        self._server.daemon_threads = True
+        self._server.renderers = self.renderers
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name="metrics-exporter", daemon=True).start()
+        logger.info(f"指标导出: http://{self.host}:{self.port}/metrics")
+        return self
+    
+    def stop(self):
+        """停止导出服务"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """进程内共享的指标注册表"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
@@ -0,0 +1,308 @@
+# utils/rate_limiter.py
+import time
+import heapq
+import hashlib
+import itertools
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Deque, Iterator, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 优先级通道：数字越小越优先
+LANES = {"interactive": 0, "bulk": 1}
+
+_current_lane: ContextVar[str] = ContextVar("request_lane", default="interactive")
+
+@contextmanager
+def request_lane(lane: str):
+    """在当前上下文（线程/协程）中使用指定的优先级通道发送请求"""
+    if lane not in LANES:
+        raise ValueError(f"未知的优先级通道: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+def current_lane() -> str:
+    """当前上下文的优先级通道"""
+    return _current_lane.get()
+
+class TokenBucket:
+    """令牌桶"""
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        """按流逝时间补充令牌"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def wait_time(self, now: float) -> float:
+        """距离有一个可用令牌还需等待的秒数"""
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+    
+    def take(self):
+        """消耗一个令牌（调用方已确认可用）"""
+        self._tokens -= 1
+
+class _Ticket:
+    """排队中的请求（done 表示已放行或放弃，从队列中延迟移除）"""
+    
+    __slots__ = ("priority", "seq", "lane", "endpoint", "keys", "enqueued_at", "done", "cond")
+    
+    def __init__(
+        self,
+        priority: int,
+        seq: int,
+        lane: str,
+        endpoint: str,
+        keys: Tuple[str, ...],
+        cond: Optional[threading.Condition] = None
+    ):
+        self.priority = priority
+        self.seq = seq
+        self.lane = lane
+        self.endpoint = endpoint
+        self.keys = keys
+        self.enqueued_at = time.monotonic()
+        self.done = False
+        self.cond = cond  # 同步等待方的条件变量（异步等待方轮询，为None）
+
+class RequestScheduler:
+    """
+    请求调度器 - 按接口和账号做令牌桶限速
+    
+    超出速率的请求排队等待而不是失败；同一令牌桶上的请求先按优先级通道、
+    再按到达顺序放行，不相关的接口互不阻塞。bulk 通道等待超过
+    RATE_LIMIT_AGING_SECONDS 后会提升优先级，避免被长期饿死。
+    
+    排在前面的请求只在它正卡在共用的令牌桶上（该桶是它等待最久的桶）时才挡住后面的请求，
+    卡在别的桶上时不占用共用桶的令牌（例如账号桶），不会造成队头阻塞。
+    每个令牌桶按通道各有一个先进先出队列，放行后只唤醒相关桶的队首。
+    """
+    
+    def __init__(
+        self,
+        endpoint_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        account_limit: Optional[Tuple[float, float]] = Config.ACCOUNT_RATE_LIMIT
+    ):
+        if endpoint_limits is None:
+            from apis.endpoints import rate_limits
+            endpoint_limits = rate_limits()
+        self.endpoint_limits = {"/" + e.lstrip('/'): limit for e, limit in endpoint_limits.items()}
+        self.account_limit = account_limit
+        
+        self._buckets: Dict[str, TokenBucket] = {}
+        # 令牌桶 -> 各通道的排队请求（按到达顺序）
+        self._queues: Dict[str, Tuple[Deque[_Ticket], ...]] = {}
+        self._depth = {lane: 0 for lane in LANES}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        
+        self._wait_stats: Dict[str, Dict[str, float]] = {}
+    
+    def _bucket_keys(self, endpoint: str, identity: Optional[str]) -> Tuple[str, ...]:
+        """请求需要的令牌桶（调用方持有锁，按需创建）"""
+        keys = []
+        if endpoint in self.endpoint_limits:
+            key = f"endpoint:{endpoint}"
+            if key not in self._buckets:
+                self._add_bucket(key, self.endpoint_limits[endpoint])
+            keys.append(key)
+        if identity and self.account_limit:
+            key = "account:" + hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+            if key not in self._buckets:
+                self._add_bucket(key, self.account_limit)
+            keys.append(key)
+        return tuple(keys)
+    
+    def _add_bucket(self, key: str, limit: Tuple[float, float]):
+        """创建令牌桶和它的排队队列（调用方持有锁）"""
+        self._buckets[key] = TokenBucket(*limit)
+        self._queues[key] = tuple(deque() for _ in LANES)
+    
+    def _enqueue(
+        self,
+        endpoint: str,
+        identity: Optional[str],
+        lane: Optional[str],
+        cond: Optional[threading.Condition] = None
+    ) -> Optional[_Ticket]:
+        """登记排队（调用方持有锁）；不受限速的请求返回None"""
+        endpoint = "/" + endpoint.lstrip('/')
+        keys = self._bucket_keys(endpoint, identity)
+        if not keys:
+            return None
+        
+        lane = lane or current_lane()
+        ticket = _Ticket(LANES[lane], next(self._seq), lane, endpoint, keys, cond)
+        for key in keys:
+            self._queues[key][ticket.priority].append(ticket)
+        self._depth[lane] += 1
+        return ticket
+    
+    def _effective_priority(self, ticket: _Ticket, now: float) -> Tuple[int, int]:
+        """考虑等待时间提升后的优先级"""
+        boost = int((now - ticket.enqueued_at) / Config.RATE_LIMIT_AGING_SECONDS)
+        return (max(0, ticket.priority - boost), ticket.seq)
+    
+    def _ahead(self, key: str, ticket: _Ticket, now: float) -> Iterator[_Ticket]:
+        """
+        令牌桶上排在 ticket 前面的请求（按提升后的优先级和到达顺序）
+        同一通道内越早到达提升越多，各通道队列本身有序，只需归并
+        """
+        mine = self._effective_priority(ticket, now)
+        lanes = [
+            (other for other in queue if not other.done and other is not ticket)
+            for queue in self._queues[key]
+        ]
+        for other in heapq.merge(*lanes, key=lambda t: self._effective_priority(t, now)):
+            if self._effective_priority(other, now) >= mine:
+                return
+            yield other
+    
+    def _wait_times(self, ticket: _Ticket, now: float) -> Dict[str, float]:
+        """ticket 在各个令牌桶上还需等待的秒数"""
+        return {key: self._buckets[key].wait_time(now) for key in ticket.keys}
+    
+    def _try_grant(self, ticket: _Ticket) -> Optional[float]:
+        """尝试放行（调用方持有锁），放行返回None，否则返回建议等待秒数"""
+        now = time.monotonic()
+        waits = self._wait_times(ticket, now)
+        
+        # 排在前面、且正卡在这个桶上（或马上就能放行）的请求优先
+        for key in ticket.keys:
+            for other in self._ahead(key, ticket, now):
+                other_waits = self._wait_times(other, now)
+                if other_waits[key] >= max(other_waits.values()):
+                    return max(waits[key], Config.RATE_LIMIT_POLL_INTERVAL)
+        
+        wait = max(waits.values())
+        if wait > 0:
+            return wait
+        
+        for key in ticket.keys:
+            self._buckets[key].take()
+        self._record_wait(ticket, now - ticket.enqueued_at)
+        self._finish(ticket)
+        return None
+    
+    def _finish(self, ticket: _Ticket):
+        """放行或放弃后出队，唤醒相关令牌桶的队首（调用方持有锁）"""
+        ticket.done = True
+        self._depth[ticket.lane] -= 1
+        for key in ticket.keys:
+            for queue in self._queues[key]:
+                while queue and queue[0].done:
+                    queue.popleft()
+                if queue and queue[0].cond is not None:
+                    queue[0].cond.notify()
+    
+    def _abandon(self, ticket: _Ticket):
+        """放弃排队（调用方持有锁）"""
+        if not ticket.done:
+            self._finish(ticket)
+    
+    def acquire(
+        self,
+        endpoint: str,
+        identity: Optional[str] = None,
+        lane: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[float]:
+        """阻塞直到允许发送请求，返回排队等待的秒数；超过 timeout 秒仍未放行时返回None"""
+        with self._lock:
+            ticket = self._enqueue(endpoint, identity, lane, threading.Condition(self._lock))
+            if ticket is None:
+                return 0.0
+            while True:
+                wait = self._try_grant(ticket)
+                if wait is None:
+                    return time.monotonic() - ticket.enqueued_at
+                if timeout is not None:
+                    remaining = ticket.enqueued_at + timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._abandon(ticket)
+                        return None
+                    wait = min(wait, remaining)
+                ticket.cond.wait(wait)
+    
+    async def acquire_async(
+        self,
+        endpoint: str,
+        identity: Optional[str] = None,
+        lane: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[float]:
+        """异步等待直到允许发送请求，返回值同 acquire"""
+        import asyncio  # 只有异步请求用到，不在模块加载时导入（导入较慢）
+        
+        with self._lock:
+            ticket = self._enqueue(endpoint, identity, lane)
+            if ticket is None:
+                return 0.0
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_grant(ticket)
+                    if wait is not None and timeout is not None:
+                        remaining = ticket.enqueued_at + timeout - time.monotonic()
+                        if remaining <= 0:
+                            self._abandon(ticket)
+                            return None
+                        wait = min(wait, remaining)
+                if wait is None:
+                    return time.monotonic() - ticket.enqueued_at
+                await asyncio.sleep(min(wait, Config.RATE_LIMIT_POLL_INTERVAL))
+        except asyncio.CancelledError:
+            with self._lock:
+                self._abandon(ticket)
+            raise
+    
+    def _record_wait(self, ticket: _Ticket, waited: float):
+        """累计等待时间统计（调用方持有锁）"""
+        for name in (f"lane:{ticket.lane}", f"endpoint:{ticket.endpoint}"):
+            stats = self._wait_stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += waited
+            stats["max"] = max(stats["max"], waited)
+    
+    def stats(self) -> Dict[str, Any]:
+        """排队深度与等待时间统计"""
+        with self._lock:
+            depth = dict(self._depth)
+            waits = {
+                name: {
+                    "count": int(s["count"]),
+                    "avg_wait_ms": round(s["total"] / s["count"] * 1000, 2) if s["count"] else 0.0,
+                    "max_wait_ms": round(s["max"] * 1000, 2),
+                }
+                for name, s in self._wait_stats.items()
+            }
+        return {"queue_depth": depth, "waits": waits}
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """进程内共享的请求调度器（所有请求处理器共用同一套限速）"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RequestScheduler()
+    return _scheduler
@@ -1,47 +1,338 @@
 # utils/request_handler.py
-import requests
-import json
 import time
+import uuid
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
 from datetime import datetime
 
 from config import Config
+from utils.body_encoder import BodyEncoder
+from utils.log_writer import get_log_writer
+from utils.metrics import MetricsRegistry, get_metrics, observe_request, api_code_of
+from utils.response_cache import ResponseCache
+from utils.retry_policy import RetryPolicy, parse_retry_after
+from utils.rate_limiter import RequestScheduler, get_scheduler
+from utils.endpoint_guard import EndpointGuard, REJECT_CIRCUIT, get_endpoint_guard
+from utils.single_flight import SingleFlight, get_single_flight
+from utils.response_body import ResponseTooLarge, read_body, decode_body, split_items
+from utils.deadline import remaining_time, cap_timeout
 
 logger = logging.getLogger(__name__)
 
+# requests 导入耗时较长，首次创建session时才导入（只列出API、读取token等场景用不到）
+requests = None
+
+def import_requests():
+    """导入 requests（首次调用时）"""
+    global requests
+    if requests is None:
+        import requests as module
+        requests = module
+    return requests
+
+def build_default_headers() -> Dict[str, str]:
+    """构建默认请求头（同步/异步处理器共用）"""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36 Edg/143.0.0.0",
+        "Accept": "application/json",
+        "Accept-Encoding": Config.MFUNS_ACCEPT_ENCODING,
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+        "Content-Type": "application/json",
+    }
+    
+    # 添加MFuns特定的请求头
+    headers.update(Config.MFUNS_HEADERS)
+    return headers
+
+def _submit_log(record_type: str, method: str, url: str, request_id: str, **fields):
+    """提交一条日志记录到后台写入器（不阻塞请求）"""
+    timestamp = time.time()
+    record = {
+        "type": record_type,
+        "request_id": request_id,
+        "timestamp": timestamp,
+        "datetime": datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'),
+        "method": method,
+        "url": url,
+    }
+    record.update(fields)
+    get_log_writer().write(record)
+
+def save_request_log(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    data: Any = None,
+    request_id: str = "",
+    encoded: Optional[Dict[str, Any]] = None
+):
+    """保存请求日志（encoded 为请求体编码结果，记录编码前后的字节数）"""
+    fields = {}
+    if encoded:
+        fields = {
+            "body_bytes": encoded["raw_bytes"],
+            "encoded_bytes": encoded["encoded_bytes"],
+            "content_encoding": encoded["encoding"],
+        }
+    _submit_log("request", method, url, request_id, headers=headers, data=data, **fields)
+
+def save_response_log(
+    method: str,
+    url: str,
+    status_code: int,
+    response_data: Any,
+    request_id: str = "",
+    endpoint: str = "",
+    elapsed_ms: Optional[float] = None
+):
+    """保存响应日志"""
+    _submit_log(
+        "response", method, url, request_id,
+        endpoint=endpoint, status_code=status_code, elapsed_ms=elapsed_ms, response=response_data
+    )
+
+def save_error_log(
+    method: str,
+    url: str,
+    error: str,
+    request_id: str = "",
+    endpoint: str = "",
+    elapsed_ms: Optional[float] = None
+):
+    """保存请求失败日志（重试耗尽仍未拿到响应）"""
+    _submit_log(
+        "error", method, url, request_id,
+        endpoint=endpoint, status_code=None, elapsed_ms=elapsed_ms, error=error
+    )
+
+def is_connect_error(error: "requests.exceptions.RequestException") -> bool:
+    """是否为连接建立阶段的失败（请求肯定没有送达服务器）"""
+    from urllib3.exceptions import NewConnectionError
+    
+    requests = import_requests()
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+def normalize_endpoint(endpoint: str) -> str:
+    """统一接口路径格式（以斜杠开头），用于日志和统计"""
+    return "/" + endpoint.lstrip('/')
+
+def is_auth_failure(result: Dict[str, Any]) -> bool:
+    """响应是否表示token无效（HTTP 401 或业务码属于 Config.AUTH_FAILURE_CODES）"""
+    if result.get("status_code") == 401:
+        return True
+    return result.get("status_code") == 200 and api_code_of(result.get("data")) in Config.AUTH_FAILURE_CODES
+
+def rejected_result(
+    metrics: Optional[MetricsRegistry],
+    method: str,
+    endpoint: str,
+    url: str,
+    reason: str
+) -> Dict[str, Any]:
+    """熔断或并发已满时不发送请求，直接返回失败（同步/异步处理器共用）"""
+    message = "接口熔断中" if reason == REJECT_CIRCUIT else "接口并发已满"
+    logger.warning(f"{message}，未发送请求: {method} {url}")
+    if metrics:
+        metrics.inc(
+            "requests_rejected_total", {"endpoint": normalize_endpoint(endpoint), "reason": reason},
+            help_text="被熔断或并发上限拒绝的请求数"
+        )
+    return {
+        "success": False,
+        "error": f"{message}: {normalize_endpoint(endpoint)}",
+        "rejected": reason,
+        "url": url
+    }
+
+def deadline_result(metrics: Optional[MetricsRegistry], method: str, endpoint: str, url: str) -> Dict[str, Any]:
+    """已超过请求总时限，不再发送或重试（同步/异步处理器共用）"""
+    logger.warning(f"超过请求时限，放弃: {method} {url}")
+    if metrics:
+        metrics.inc(
+            "requests_deadline_exceeded_total", {"endpoint": normalize_endpoint(endpoint)},
+            help_text="因超过总时限而放弃的请求数"
+        )
+    return {
+        "success": False,
+        "error": f"超过请求时限: {normalize_endpoint(endpoint)}",
+        "deadline_exceeded": True,
+        "url": url
+    }
+
+def fits_deadline(delay: Optional[float]) -> Optional[float]:
+    """重试退避超出剩余时间时返回None（不再重试）"""
+    remaining = remaining_time()
+    if delay is None or remaining is None:
+        return delay
+    return delay if delay < remaining else None
+
+def timeout_for(timeouts: Dict[str, Tuple[float, float]], endpoint: str) -> Tuple[float, float]:
+    """接口的 (连接超时, 读超时)，均不超过剩余时间（超时不能为0）"""
+    connect, read = timeouts.get(normalize_endpoint(endpoint), (Config.CONNECT_TIMEOUT, Config.DEFAULT_TIMEOUT))
+    return max(cap_timeout(connect), 0.001), max(cap_timeout(read), 0.001)
+
+def decode_response(body: bytes, stream_items: Optional[str] = None) -> Tuple[Any, Any]:
+    """
+    解码响应体，返回 (数据, 未解码的数组)（同步/异步处理器共用）
+    指定 stream_items（如 "data.list"）时该处的大数组不解码，元素按需逐个解码
+    """
+    if stream_items:
+        return split_items(body, stream_items)
+    return decode_body(body), None
+
+def logged_data(data: Any, items: Any) -> Any:
+    """写入响应日志的数据（未解码的数组只记录元素个数）"""
+    if items is None:
+        return data
+    return {"response": data, "stream_items": len(items)}
+
+def success_result(status_code: int, data: Any, url: str, items: Any = None) -> Dict[str, Any]:
+    """请求完成的结果（同步/异步处理器共用）"""
+    result = {
+        "success": status_code == 200,
+        "data": data,
+        "status_code": status_code,
+        "url": url
+    }
+    if items is not None:
+        result["items"] = items
+    return result
+
+def too_large_result(
+    metrics: Optional[MetricsRegistry],
+    method: str,
+    endpoint: str,
+    url: str,
+    status_code: int,
+    error: ResponseTooLarge
+) -> Dict[str, Any]:
+    """响应体超过上限，已放弃读取（同步/异步处理器共用，不重试）"""
+    logger.warning(f"{error}，放弃读取: {method} {url}")
+    if metrics:
+        metrics.inc(
+            "responses_too_large_total", {"endpoint": normalize_endpoint(endpoint)},
+            help_text="超过大小上限、放弃读取的响应数"
+        )
+    return {
+        "success": False,
+        "error": str(error),
+        "too_large": True,
+        "status_code": status_code,
+        "url": url
+    }
+
+def coalesce_key(
+    handler: Any,
+    method: str,
+    endpoint: str,
+    url: str,
+    kwargs: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None
+) -> Optional[str]:
+    """
+    请求合并键，不合并的请求返回None（同步/异步处理器共用）
+    未启用、非幂等和流式解码数组（stream_items）的请求不合并
+    """
+    if not handler.single_flight or not handler.retry_policy.is_idempotent(method, endpoint):
+        return None
+    if kwargs.get("stream_items"):
+        return None
+    identity = (headers or {}).get("Authorization", handler.headers.get("Authorization"))
+    return handler.single_flight.make_key(method, url, kwargs.get("params"), kwargs.get("json"), identity)
+
+def coalesced_result(
+    metrics: Optional[MetricsRegistry],
+    method: str,
+    endpoint: str,
+    url: str,
+    result: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """处理合并请求的结果：记录被合并数，等待超过时限时返回超时结果（同步/异步处理器共用）"""
+    if result is None:
+        return deadline_result(metrics, method, endpoint, url)
+    if metrics and result.get("coalesced"):
+        metrics.inc(
+            "requests_coalesced_total", {"endpoint": normalize_endpoint(endpoint)},
+            help_text="与进行中的相同请求合并、未单独发送的请求数"
+        )
+    return result
+
+def register_collectors(metrics: MetricsRegistry, handler: Any):
+    """把请求处理器的各组件登记到指标注册表（同步/异步处理器共用）"""
+    for name in ("cache", "retry_policy", "scheduler", "guard", "single_flight", "encoder"):
+        component = getattr(handler, name, None)
+        if component is not None:
+            metrics.register_collector(name, component)
+
 class RequestHandler:
     """基础请求处理器"""
     
-    def __init__(self, base_url: str = Config.MFUNS_BASE_URL):
+    def __init__(
+        self,
+        base_url: str = Config.MFUNS_BASE_URL,
+        cache: Optional[ResponseCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        encoder: Optional[BodyEncoder] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        guard: Optional[EndpointGuard] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
         self.base_url = base_url
-        self.session = requests.Session()
-        self._setup_session()
-    
-    def _setup_session(self):
-        """设置session基础配置"""
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36 Edg/143.0.0.0",
-            "Accept": "application/json",
-            "Accept-Encoding": Config.MFUNS_ACCEPT_ENCODING,
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
-            "Content-Type": "application/json",
-        }
-        
-        # 添加MFuns特定的请求头
-        headers.update(Config.MFUNS_HEADERS)
-        self.session.headers.update(headers)
+        # 默认请求头（含认证token），首次发请求时创建session并同步过去
+        self.headers: Dict[str, str] = build_default_headers()
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        # 限速调度器默认全进程共享，保证多个处理器合计不超速
+        self.scheduler = scheduler or (get_scheduler() if Config.RATE_LIMIT_ENABLED else None)
+        # GET响应缓存（POST等非幂等请求不经过缓存）
+        self.cache = cache if cache is not None else (ResponseCache() if Config.CACHE_ENABLED else None)
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 按接口的 (连接超时, 读超时)
+        from apis.endpoints import timeouts
+        self.timeouts = timeouts()
+        # 按接口熔断和限制并发，默认全进程共享
+        self.guard = guard or (get_endpoint_guard() if Config.ENDPOINT_GUARD_ENABLED else None)
+        # 合并相同的进行中幂等请求，默认全进程共享（按token区分账号）
+        self.single_flight = single_flight or (get_single_flight() if Config.SINGLE_FLIGHT_ENABLED else None)
+        # POST请求体编码（紧凑JSON + 可选压缩）
+        self.encoder = encoder or BodyEncoder()
+        self.metrics = metrics or (get_metrics() if Config.METRICS_ENABLED else None)
+        if self.metrics:
+            register_collectors(self.metrics, self)
+        # token失效时的刷新回调: (失效的token) -> 是否已换上新token，由 TokenLifecycle 设置
+        self.auth_refresher: Optional[Callable[[str], bool]] = None
+    
+    @property
+    def session(self) -> "requests.Session":
+        """requests session（首次使用时创建）"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = import_requests().Session()
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
     
     def set_auth_token(self, token: str):
         """设置认证token"""
         # MFuns API使用直接token，不加Bearer前缀
-        self.session.headers.update({"Authorization": token})
+        self.headers["Authorization"] = token
+        if self._session is not None:
+            self._session.headers["Authorization"] = token
         logger.debug(f"已设置认证token: {token[:30]}...")
     
     def remove_auth_token(self):
         """移除认证token"""
-        if "Authorization" in self.session.headers:
-            del self.session.headers["Authorization"]
+        if "Authorization" in self.headers:
+            del self.headers["Authorization"]
+            if self._session is not None:
+                self._session.headers.pop("Authorization", None)
             logger.debug("已移除认证token")
     
     def build_url(self, endpoint: str) -> str:
@@ -51,100 +342,263 @@ class RequestHandler:
         endpoint = endpoint.lstrip('/')
         return f"{base}/{endpoint}"
     
-    def _save_request_log(self, method: str, url: str, data: Any = None):
+    def _save_request_log(
+        self,
+        method: str,
+        url: str,
+        data: Any = None,
+        request_id: str = "",
+        encoded: Optional[Dict[str, Any]] = None
+    ):
         """保存请求日志"""
-        timestamp = int(time.time())
-        filename = f"request_{method}_{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = Config.RESPONSES_DIR / filename
-        
-        log_data = {
-            "timestamp": timestamp,
-            "datetime": datetime.fromtimestamp(timestamp).isoformat(),
-            "method": method,
-            "url": url,
-            "headers": dict(self.session.headers),
-            "data": data
-        }
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, ensure_ascii=False, indent=2, default=str)
-        except Exception as e:
-            logger.error(f"保存请求日志失败: {e}")
-    
-    def _save_response_log(self, method: str, url: str, response: requests.Response):
-        """保存响应日志"""
-        timestamp = int(time.time())
-        filename = f"response_{method}_{datetime.fromtimestamp(timestamp).strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = Config.RESPONSES_DIR / filename
-        
-        try:
-            response_data = response.json()
-        except json.JSONDecodeError:
-            response_data = {"raw_text": response.text[:1000]}
-        
-        log_data = {
-            "timestamp": timestamp,
-            "datetime": datetime.fromtimestamp(timestamp).isoformat(),
-            "method": method,
-            "url": url,
-            "status_code": response.status_code,
-            "response": response_data
-        }
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, ensure_ascii=False, indent=2, default=str)
-        except Exception as e:
-            logger.error(f"保存响应日志失败: {e}")
-        
-        return response_data
+        save_request_log(method, url, dict(self.headers), data, request_id, encoded)
+    
+    def _cache_key(self, method: str, endpoint: str, url: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        """获取缓存键，不可缓存的请求返回None"""
+        if not self.cache or method.upper() != "GET" or self.cache.ttl_for(endpoint) <= 0:
+            return None
+        return self.cache.make_key(method, url, kwargs.get("params"), self.headers.get("Authorization"))
+    
+    def _observe(
+        self,
+        method: str,
+        endpoint: str,
+        status_code: Optional[int],
+        elapsed_ms: float,
+        attempt: int,
+        sent_bytes: int,
+        response: Optional["requests.Response"] = None,
+        response_data: Any = None,
+        received_bytes: int = 0
+    ):
+        """记录请求指标（requests 无法拆分DNS/连接耗时，用 response.elapsed 作为首字节时间）"""
+        if not self.metrics:
+            return
+        observe_request(
+            self.metrics, normalize_endpoint(endpoint), method.upper(), status_code, elapsed_ms,
+            ttfb_ms=response.elapsed.total_seconds() * 1000 if response is not None else None,
+            bytes_out=sent_bytes,
+            bytes_in=received_bytes,
+            retries=attempt - 1,
+            api_code=api_code_of(response_data)
+        )
     
     def request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """发送请求"""
+        """发送请求（相同的进行中幂等请求只发一次，共享结果）"""
+        key = coalesce_key(self, method, endpoint, self.build_url(endpoint), kwargs, kwargs.get("headers"))
+        if key is None:
+            return self._request(method, endpoint, **kwargs)
+        result = self.single_flight.do(key, lambda: self._request(method, endpoint, **kwargs), cap_timeout(None))
+        return coalesced_result(self.metrics, method, endpoint, self.build_url(endpoint), result)
+    
+    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """发送请求（token失效时刷新token后重发一次）"""
+        token = self.headers.get("Authorization")
+        result = self._send(method, endpoint, **kwargs)
+        
+        # 显式指定了Authorization的请求（如登录）不触发刷新
+        if not token or not self.auth_refresher or "Authorization" in (kwargs.get("headers") or {}):
+            return result
+        if is_auth_failure(result) and self.auth_refresher(token):
+            logger.info(f"token已刷新，重发请求: {method} {endpoint}")
+            result = self._send(method, endpoint, **kwargs)
+        return result
+    
+    def probe(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """发送请求，不经过缓存、请求合并和token刷新（用于校验token）"""
+        return self._send(method, endpoint, use_cache=False, **kwargs)
+    
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        stream_items: Optional[str] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """发送请求（含缓存、限速和重试），stream_items 见 decode_response"""
         url = self.build_url(endpoint)
         
+        # 查询缓存：有效期内直接返回，过期但有验证器则发条件请求（流式解码数组的请求不缓存）
+        cache_key = None if stream_items or not use_cache else self._cache_key(method, endpoint, url, kwargs)
+        cached = None
+        if cache_key:
+            cached, fresh = self.cache.lookup(cache_key)
+            if fresh:
+                logger.info(f"缓存命中: {method} {url}")
+                return {
+                    "success": cached.status_code == 200,
+                    "data": cached.data,
+                    "status_code": cached.status_code,
+                    "url": url,
+                    "cached": True
+                }
+            if cached:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.validators()}
+        
         logger.info(f"请求: {method} {url}")
-        if 'json' in kwargs:
-            logger.debug(f"请求数据: {kwargs['json']}")
+        
+        # JSON请求体由编码器序列化（重试时复用同一份字节）
+        payload = kwargs.pop('json', None)
+        encoded = None
+        if payload is not None:
+            logger.debug(f"请求数据: {payload}")
+            encoded = self.encoder.encode(normalize_endpoint(endpoint), payload)
         
         # 保存请求日志
-        self._save_request_log(method, url, kwargs.get('json'))
+        request_id = uuid.uuid4().hex
+        self._save_request_log(method, url, payload, request_id, encoded)
         
-        for attempt in range(Config.MAX_RETRIES):
-            try:
-                response = self.session.request(
-                    method, url,
-                    timeout=Config.DEFAULT_TIMEOUT,
-                    **kwargs
-                )
+        self.retry_policy.record_request(endpoint)
+        if self.metrics:
+            self.metrics.add("in_flight_requests", {"endpoint": normalize_endpoint(endpoint)}, 1, help_text="进行中的请求数")
+        try:
+            start = time.perf_counter()
+            attempt = 0
+            sent_bytes = 0
+            while True:
+                attempt += 1
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    return deadline_result(self.metrics, method, endpoint, url)
+                # 先过熔断和并发上限再排队等待限速：被拒绝的请求不消耗限速令牌
+                generation = None
+                if self.guard:
+                    reason, generation = self.guard.enter(endpoint, cap_timeout(self.guard.max_wait))
+                    if reason:
+                        return rejected_result(self.metrics, method, endpoint, url, reason)
+                if self.scheduler:
+                    waited = None
+                    try:
+                        waited = self.scheduler.acquire(
+                            endpoint, self.headers.get("Authorization"), timeout=remaining_time()
+                        )
+                    finally:
+                        # 排队超时（或被中断）没有发出请求，归还并发名额
+                        if waited is None and self.guard:
+                            self.guard.cancel(endpoint, generation)
+                    if waited is None:
+                        return deadline_result(self.metrics, method, endpoint, url)
+                    if waited > 0:
+                        logger.debug(f"限速排队 {waited * 1000:.0f}ms: {endpoint}")
+                send_kwargs = kwargs
+                if encoded:
+                    send_kwargs = {
+                        **kwargs,
+                        "data": encoded["body"],
+                        "headers": {**(kwargs.get("headers") or {}), **encoded["headers"]},
+                    }
+                sent_bytes += encoded["encoded_bytes"] if encoded else 0
+                response = None
+                error = None
+                too_large = None
+                try:
+                    response = self.session.request(
+                        method, url,
+                        timeout=timeout_for(self.timeouts, endpoint),
+                        stream=True,
+                        **send_kwargs
+                    )
+                    # 分块读取，内存占用不超过 Config.MAX_RESPONSE_BYTES
+                    body = read_body(response)
+                except ResponseTooLarge as e:
+                    too_large = e
+                except requests.exceptions.RequestException as e:
+                    error = e
+                finally:
+                    # 连接失败、超时和5xx计入熔断
+                    if self.guard:
+                        self.guard.exit(endpoint, response is not None and response.status_code < 500, generation)
+                
+                if error is not None:
+                    self.retry_policy.record_attempt(endpoint, "error")
+                    delay = fits_deadline(self.retry_policy.next_delay(
+                        method, endpoint, attempt, connect_error=is_connect_error(error)
+                    ))
+                    if delay is None:
+                        logger.error(f"请求失败 (尝试 {attempt}/{self.retry_policy.max_attempts}): {error}")
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        save_error_log(method, url, str(error), request_id, normalize_endpoint(endpoint), elapsed_ms)
+                        self._observe(method, endpoint, None, elapsed_ms, attempt, sent_bytes)
+                        return {
+                            "success": False,
+                            "error": str(error),
+                            "url": url
+                        }
+                    logger.error(f"请求失败 (尝试 {attempt}/{self.retry_policy.max_attempts}): {error}，{delay:.2f}秒后重试")
+                    time.sleep(delay)
+                    continue
                 
                 logger.info(f"响应: {response.status_code}")
+                self.retry_policy.record_attempt(endpoint, str(response.status_code))
                 
-                # 保存响应日志
-                response_data = self._save_response_log(method, url, response)
+                if too_large is not None:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    save_error_log(method, url, str(too_large), request_id, normalize_endpoint(endpoint), elapsed_ms)
+                    self._observe(method, endpoint, response.status_code, elapsed_ms, attempt, sent_bytes, response)
+                    return too_large_result(self.metrics, method, endpoint, url, response.status_code, too_large)
                 
-                return {
-                    "success": response.status_code == 200,
-                    "data": response_data,
-                    "status_code": response.status_code,
-                    "url": url
-                }
+                # 服务器不接受压缩的请求体：改为不压缩立即重发
+                if response.status_code == 415 and encoded and encoded["encoding"]:
+                    self.encoder.mark_unsupported(normalize_endpoint(endpoint))
+                    encoded = self.encoder.encode(normalize_endpoint(endpoint), payload)
+                    continue
+                
+                # 429/5xx 按策略重试（非幂等请求只重试429）
+                delay = fits_deadline(self.retry_policy.next_delay(
+                    method, endpoint, attempt,
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                ))
+                if delay is not None:
+                    logger.warning(f"响应 {response.status_code} (尝试 {attempt}/{self.retry_policy.max_attempts})，{delay:.2f}秒后重试")
+                    time.sleep(delay)
+                    continue
                 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"请求失败 (尝试 {attempt + 1}/{Config.MAX_RETRIES}): {e}")
-                if attempt == Config.MAX_RETRIES - 1:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                
+                # 304: 缓存内容仍然有效
+                if cached and response.status_code == 304:
+                    self.cache.refresh(cache_key, endpoint)
+                    save_response_log(
+                        method, url, 304, None, request_id, normalize_endpoint(endpoint), elapsed_ms
+                    )
+                    self._observe(method, endpoint, 304, elapsed_ms, attempt, sent_bytes, response)
                     return {
-                        "success": False,
-                        "error": str(e),
-                        "url": url
+                        "success": cached.status_code == 200,
+                        "data": cached.data,
+                        "status_code": cached.status_code,
+                        "url": url,
+                        "cached": True
                     }
-                time.sleep(1)
+                
+                # 保存响应日志
+                response_data, items = decode_response(body, stream_items)
+                save_response_log(
+                    method, url, response.status_code, logged_data(response_data, items),
+                    request_id, normalize_endpoint(endpoint), elapsed_ms
+                )
+                self._observe(
+                    method, endpoint, response.status_code, elapsed_ms, attempt, sent_bytes,
+                    response, response_data, len(body)
+                )
+                
+                if cache_key and response.status_code == 200:
+                    self.cache.put(
+                        cache_key, endpoint, body, response.status_code,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified")
+                    )
+                
+                return success_result(response.status_code, response_data, url, items)
+        finally:
+            if self.metrics:
+                self.metrics.add("in_flight_requests", {"endpoint": normalize_endpoint(endpoint)}, -1)
     
-    def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+    def get(self, endpoint: str, params: Optional[Dict] = None, **kwargs) -> Dict:
         """GET请求"""
-        return self.request("GET", endpoint, params=params)
+        return self.request("GET", endpoint, params=params, **kwargs)
     
-    def post(self, endpoint: str, data: Optional[Dict] = None) -> Dict:
+    def post(self, endpoint: str, data: Optional[Dict] = None, **kwargs) -> Dict:
         """POST请求"""
-        return self.request("POST", endpoint, json=data)
\ No newline at end of file
+        return self.request("POST", endpoint, json=data, **kwargs)
\ No newline at end of file
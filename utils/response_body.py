@@ -0,0 +1,249 @@
+# utils/response_body.py
+import re
+import json
+import logging
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING_PATTERN = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_STRING = re.compile(_STRING_PATTERN, re.S)
+_SCALAR = re.compile(rb"[^,\]}\s]*")
+
+def _nested_pattern(levels: int, stop: bytes = b"") -> bytes:
+    """
+    跳过最多 levels 层括号嵌套的内容（不解码），遇到 stop 中的字符、
+    未配对的括号或更深的嵌套时停下。各分支首字符互不相同，不会回溯爆炸
+    """
+    inner = rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*'
+    for _ in range(levels - 1):
+        inner = (
+            rb'[^"\[\]{}]*(?:(?:' + _STRING_PATTERN + rb'|\[' + inner + rb'\]|\{' + inner + rb'\})[^"\[\]{}]*)*'
+        )
+    plain = rb'[^"\[\]{}' + stop + rb']*'
+    return plain + rb'(?:(?:' + _STRING_PATTERN + rb'|\[' + inner + rb'\]|\{' + inner + rb'\})' + plain + rb')*'
+
+# 括号内的内容 / 数组的一个元素（到 , 或 ] 为止），超过嵌套层数时由 _scan 逐层处理
+_NESTED = re.compile(_nested_pattern(4), re.S)
+_ELEMENT = re.compile(_nested_pattern(4, b","), re.S)
+
+_OPEN = frozenset(b"[{")
+_CLOSE = frozenset(b"]}")
+_COMMA = ord(",")
+_CLOSE_ARRAY = ord("]")
+
+class ResponseTooLarge(Exception):
+    """响应体超过 Config.MAX_RESPONSE_BYTES"""
+    
+    def __init__(self, size: int, limit: int):
+        self.size = size
+        self.limit = limit
+        super().__init__(f"响应体超过上限 {limit} 字节（已读取或声明 {size} 字节）")
+
+def _declared_length(headers: Any) -> Optional[int]:
+    """响应头声明的长度（压缩后），没有或无效时返回None"""
+    try:
+        return int(headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
+
+def read_body(response: Any, max_bytes: Optional[int] = None) -> bytes:
+    """
+    分块读取响应体（requests，stream=True），读完后连接放回连接池
+    超过上限（按解压后字节数）时关闭连接并抛出 ResponseTooLarge
+    """
+    limit = Config.MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+    declared = _declared_length(response.headers)
+    if limit and declared is not None and declared > limit:
+        response.close()
+        raise ResponseTooLarge(declared, limit)
+    
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(Config.RESPONSE_CHUNK_SIZE):
+        size += len(chunk)
+        if limit and size > limit:
+            response.close()
+            raise ResponseTooLarge(size, limit)
+        chunks.append(chunk)
+    response.close()
+    return b"".join(chunks)
+
+async def read_body_async(response: Any, max_bytes: Optional[int] = None) -> bytes:
+    """分块读取响应体（aiohttp），超过上限时关闭连接并抛出 ResponseTooLarge"""
+    limit = Config.MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+    declared = _declared_length(response.headers)
+    if limit and declared is not None and declared > limit:
+        response.close()
+        raise ResponseTooLarge(declared, limit)
+    
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(Config.RESPONSE_CHUNK_SIZE):
+        size += len(chunk)
+        if limit and size > limit:
+            response.close()
+            raise ResponseTooLarge(size, limit)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def loads(data: Any) -> Any:
+    """解码JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def raw_text(body: bytes) -> dict:
+    """非JSON响应只保留开头的文本（不解码整个响应体）"""
+    return {"raw_text": body[:Config.RAW_TEXT_LIMIT].decode('utf-8', errors='replace')}
+
+def decode_body(body: bytes) -> Any:
+    """解码响应体，不是JSON时（如HTML错误页）返回 raw_text"""
+    try:
+        return loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return raw_text(body)
+
+def _skip(body: bytes, pos: int) -> int:
+    """跳过空白"""
+    return _WHITESPACE.match(body, pos).end()
+
+def _scan(body: bytes, start: int) -> int:
+    """从 start 处的 [ 或 { 扫描到对应的右括号，返回其位置（不解码任何值）"""
+    depth = 1
+    pos = start + 1
+    while True:
+        pos = _NESTED.match(body, pos).end()
+        char = body[pos]
+        if char in _OPEN:
+            depth += 1
+        elif char in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return pos
+        else:
+            # 未闭合的字符串
+            raise ValueError(f"JSON格式错误（位置 {pos}）")
+        pos += 1
+
+def _separators(body: bytes, start: int) -> array:
+    """start 处数组的 [ 、第一层各个 , 和 ] 的位置（元素边界），元素不解码"""
+    separators = array("q", [start])
+    append = separators.append
+    match = _ELEMENT.match
+    pos = start + 1
+    while True:
+        pos = match(body, pos).end()
+        char = body[pos]
+        if char == _COMMA:
+            append(pos)
+        elif char == _CLOSE_ARRAY:
+            append(pos)
+            return separators
+        elif char in _OPEN:
+            # 元素嵌套超过正则的层数
+            pos = _scan(body, pos)
+        else:
+            raise ValueError(f"JSON格式错误（位置 {pos}）")
+        pos += 1
+
+def _skip_value(body: bytes, pos: int) -> int:
+    """跳过一个值，返回其后的位置"""
+    char = body[pos:pos + 1]
+    if char == b'"':
+        match = _STRING.match(body, pos)
+        if match is None:
+            raise ValueError(f"字符串未闭合（位置 {pos}）")
+        return match.end()
+    if char in (b"[", b"{"):
+        return _scan(body, pos) + 1
+    return _SCALAR.match(body, pos).end()
+
+class JSONArray(Sequence):
+    """
+    响应中未解码的JSON数组：保留响应体，只记录元素边界，
+    迭代或取下标时才解码对应的元素（每次访问解码一次，不缓存）
+    """
+    
+    __slots__ = ("_body", "_separators")
+    
+    def __init__(self, body: bytes, separators: array):
+        self._body = body
+        # "[" 、各个第一层 "," 和 "]" 的位置，第i个元素在 separators[i] 与 separators[i+1] 之间
+        self._separators = separators
+    
+    def _decode(self, index: int) -> Any:
+        return loads(self._body[self._separators[index] + 1:self._separators[index + 1]])
+    
+    def __len__(self) -> int:
+        separators = self._separators
+        if len(separators) == 2 and _skip(self._body, separators[0] + 1) == separators[1]:
+            return 0
+        return len(separators) - 1
+    
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self._decode(index)
+    
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("JSONArray 下标越界")
+        return self._decode(index)
+    
+    def __repr__(self) -> str:
+        return f"<JSONArray {len(self)} 项>"
+
+def _locate(body: bytes, keys: List[str]) -> Optional[int]:
+    """按键路径找到值的起始位置（只解码沿途的键，兄弟值直接跳过）"""
+    pos = _skip(body, 0)
+    for key in keys:
+        if body[pos:pos + 1] != b"{":
+            return None
+        pos = _skip(body, pos + 1)
+        while True:
+            match = _STRING.match(body, pos)
+            if match is None:
+                return None
+            name = loads(match.group())
+            pos = _skip(body, match.end())
+            if body[pos:pos + 1] != b":":
+                return None
+            pos = _skip(body, pos + 1)
+            if name == key:
+                break
+            pos = _skip(body, _skip_value(body, pos))
+            if body[pos:pos + 1] != b",":
+                return None
+            pos = _skip(body, pos + 1)
+    return pos
+
+def split_items(body: bytes, path: str) -> Tuple[Any, Optional[JSONArray]]:
+    """
+    解码响应体，但 path（如 "data.list"）处的数组不解码：
+    结果中该位置替换为空列表，元素由返回的 JSONArray 按需解码。
+    找不到该数组时与 decode_body 相同（第二个返回值为None）
+    """
+    try:
+        start = _locate(body, path.split("."))
+        if start is None or body[start:start + 1] != b"[":
+            return decode_body(body), None
+        separators = _separators(body, start)
+        # 只复制数组之外的部分
+        return loads(body[:start] + b"[]" + body[separators[-1] + 1:]), JSONArray(body, separators)
+    except (ValueError, IndexError):
+        return decode_body(body), None
@@ -0,0 +1,152 @@
+# utils/response_cache.py
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import Config
+from utils.response_body import decode_body
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    """缓存条目（保存响应体字节，每次命中重新解码，调用方修改结果不会影响缓存）"""
+    
+    __slots__ = ("body", "status_code", "expires_at", "etag", "last_modified")
+    
+    def __init__(self, body: bytes, status_code: int, expires_at: float,
+                 etag: Optional[str], last_modified: Optional[str]):
+        self.body = body
+        self.status_code = status_code
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+    
+    @property
+    def data(self) -> Any:
+        """解码后的响应数据（每次返回新对象）"""
+        return decode_body(self.body)
+    
+    @property
+    def size(self) -> int:
+        return len(self.body)
+    
+    def validators(self) -> Dict[str, str]:
+        """条件请求头（用于向服务器重新验证）"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """GET响应缓存 - 按接口配置TTL，按内存占用做LRU淘汰，支持ETag/Last-Modified重新验证"""
+    
+    def __init__(
+        self,
+        max_bytes: int = Config.CACHE_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = Config.CACHE_DEFAULT_TTL
+    ):
+        self.max_bytes = max_bytes
+        if ttls is None:
+            from apis.endpoints import cache_ttls
+            ttls = cache_ttls()
+        self.ttls = {"/" + e.lstrip('/'): ttl for e, ttl in ttls.items()}
+        self.default_ttl = default_ttl
+        
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+    
+    def ttl_for(self, endpoint: str) -> float:
+        """获取接口的缓存时间（秒），0表示不缓存"""
+        return self.ttls.get("/" + endpoint.lstrip('/'), self.default_ttl)
+    
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict] = None, identity: Optional[str] = None) -> str:
+        """缓存键：方法 + URL + 参数 + 认证身份（token摘要，不保存明文）"""
+        params_part = json.dumps(params or {}, sort_keys=True, default=str)
+        identity_part = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16] if identity else "-"
+        return f"{method.upper()} {url}?{params_part}#{identity_part}"
+    
+    def lookup(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """查找缓存，返回 (条目, 是否仍在有效期内)；过期条目保留用于重新验证"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            
+            self._entries.move_to_end(key)
+            if entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry, True
+            
+            self.misses += 1
+            if entry.etag or entry.last_modified:
+                return entry, False
+            
+            # 没有验证器的过期条目直接丢弃
+            self._remove(key)
+            return None, False
+    
+    def put(self, key: str, endpoint: str, body: bytes, status_code: int,
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """写入缓存（body 为原始响应体）"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0 or len(body) > self.max_bytes:
+            return
+        
+        entry = CacheEntry(body, status_code, time.monotonic() + ttl, etag, last_modified)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def refresh(self, key: str, endpoint: str):
+        """服务器返回304后延长条目有效期"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                entry.expires_at = time.monotonic() + self.ttl_for(endpoint)
+                self.revalidated += 1
+    
+    def invalidate(self, prefix: str = ""):
+        """清除缓存（可按键前缀，如 "GET https://api.mfuns.net/v1/user/info"）"""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+    
+    def _remove(self, key: str):
+        """删除条目（调用方持有锁）"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+    
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,193 @@
+# utils/retry_policy.py
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Iterable
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class RetryBudget:
+    """重试预算 - 每个请求存入一定比例的令牌，每次重试消耗一个，防止上游故障时重试风暴"""
+    
+    def __init__(
+        self,
+        ratio: float = Config.RETRY_BUDGET_RATIO,
+        min_per_second: float = Config.RETRY_BUDGET_MIN_PER_SECOND,
+        capacity: float = Config.RETRY_BUDGET_CAPACITY
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        """按时间补充保底令牌（调用方持有锁）"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+    
+    def deposit(self):
+        """记录一次请求"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        """申请一次重试，预算不足返回False"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+    
+    @property
+    def available(self) -> float:
+        """当前可用的重试令牌数"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+_shared_budget: Optional[RetryBudget] = None
+_shared_budget_lock = threading.Lock()
+
+def shared_retry_budget() -> RetryBudget:
+    """进程内所有请求处理器共享的重试预算"""
+    global _shared_budget
+    if _shared_budget is None:
+        with _shared_budget_lock:
+            if _shared_budget is None:
+                _shared_budget = RetryBudget()
+    return _shared_budget
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # HTTP日期格式很少见，用到时才导入
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RetryPolicy:
+    """重试策略 - 按接口幂等性决定是否重试，指数退避 + 全抖动，支持Retry-After和全局重试预算"""
+    
+    def __init__(
+        self,
+        max_attempts: int = Config.MAX_RETRIES,
+        base_delay: float = Config.RETRY_BASE_DELAY,
+        max_delay: float = Config.RETRY_MAX_DELAY,
+        retry_statuses: Iterable[int] = Config.RETRY_STATUS_CODES,
+        idempotent_endpoints: Optional[Iterable[str]] = None,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = set(retry_statuses)
+        if idempotent_endpoints is None:
+            from apis.endpoints import idempotent_paths
+            idempotent_endpoints = idempotent_paths()
+        self.idempotent_endpoints = {"/" + e.lstrip('/') for e in idempotent_endpoints}
+        self.budget = budget or shared_retry_budget()
+        
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+    
+    def is_idempotent(self, method: str, endpoint: str) -> bool:
+        """请求是否可以安全重复发送"""
+        if method.upper() in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"):
+            return True
+        return "/" + endpoint.lstrip('/') in self.idempotent_endpoints
+    
+    def record_request(self, endpoint: str):
+        """记录一次新请求（首次尝试）"""
+        self.budget.deposit()
+        self._count(endpoint, "requests")
+    
+    def record_attempt(self, endpoint: str, outcome: str):
+        """记录一次尝试的结果（outcome: HTTP状态码或 "error"）"""
+        self._count(endpoint, "attempts")
+        self._count(endpoint, f"attempt_{outcome}")
+    
+    def next_delay(
+        self,
+        method: str,
+        endpoint: str,
+        attempt: int,
+        status_code: Optional[int] = None,
+        connect_error: bool = False,
+        retry_after: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        判断第 attempt 次尝试失败后是否重试
+        
+        参数:
+            status_code: 响应状态码（传输层异常时为None）
+            connect_error: 是否为连接建立阶段的失败（请求肯定未送达服务器）
+            retry_after: 服务器要求的等待秒数
+        
+        返回:
+            需要等待的秒数，不重试时返回None
+        """
+        if status_code is not None:
+            if status_code not in self.retry_statuses:
+                return None
+            # 非幂等请求只在服务器明确拒绝（429）时重试
+            if status_code != 429 and not self.is_idempotent(method, endpoint):
+                self._count(endpoint, "not_retried_unsafe")
+                return None
+        elif not connect_error and not self.is_idempotent(method, endpoint):
+            # 请求可能已送达，非幂等请求不能盲目重发
+            self._count(endpoint, "not_retried_unsafe")
+            return None
+        
+        if attempt >= self.max_attempts:
+            self._count(endpoint, "exhausted")
+            return None
+        
+        if not self.budget.withdraw():
+            self._count(endpoint, "budget_denied")
+            logger.warning(f"重试预算不足，放弃重试: {endpoint}")
+            return None
+        
+        self._count(endpoint, "retries")
+        return self.backoff(attempt, retry_after)
+    
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """指数退避 + 全抖动；服务器给出Retry-After时取两者较大值"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, Config.RETRY_AFTER_MAX))
+        return delay
+    
+    def _count(self, endpoint: str, key: str):
+        """累加接口计数"""
+        endpoint = "/" + endpoint.lstrip('/')
+        with self._lock:
+            counters = self._stats.setdefault(endpoint, {})
+            counters[key] = counters.get(key, 0) + 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """重试统计"""
+        with self._lock:
+            by_endpoint = {endpoint: dict(counters) for endpoint, counters in self._stats.items()}
+        return {
+            "budget_available": round(self.budget.available, 2),
+            "endpoints": by_endpoint,
+        }
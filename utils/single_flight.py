@@ -0,0 +1,161 @@
+# utils/single_flight.py
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Callable, Awaitable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """一次进行中的请求（首个调用方执行，其余调用方等待结果）"""
+    
+    __slots__ = ("done", "result", "waiters")
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    合并相同的进行中请求（single-flight）
+    方法、URL、参数、请求体和认证身份都相同的幂等请求同时到达时，
+    只有第一个真正发出，其余等待并共享它的结果（结果带 coalesced 标记）
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], Any] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.peak_waiters = 0
+    
+    @staticmethod
+    def make_key(
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        body: Any = None,
+        identity: Optional[str] = None
+    ) -> str:
+        """合并键：方法 + URL + 参数 + 请求体摘要 + 认证身份（token摘要，不保存明文）"""
+        params_part = json.dumps(params or {}, sort_keys=True, default=str)
+        body_part = "-"
+        if body is not None:
+            body_part = hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+        identity_part = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16] if identity else "-"
+        return f"{method.upper()} {url}?{params_part}${body_part}#{identity_part}"
+    
+    def _shared(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """等待方拿到的结果（浅拷贝，data 与首个调用方共享）"""
+        return {**result, "coalesced": True}
+    
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Dict[str, Any]],
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        执行或加入进行中的同键请求
+        等待超过 timeout 秒返回None（首个调用方不受影响，继续完成请求）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.peak_waiters = max(self.peak_waiters, call.waiters)
+                leader = False
+        
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return None
+            return self._shared(call.result)
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            # 首个调用方异常时等待方得到失败结果，不重复发送
+            call.result = {"success": False, "error": str(e) or type(e).__name__}
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Dict[str, Any]]],
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """执行或加入进行中的同键请求（异步，只合并同一事件循环内的请求），返回值同 do"""
+        import asyncio  # 只有异步请求用到
+        
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            future = self._async_calls.get(loop_key)
+            if future is None:
+                future = self._async_calls[loop_key] = loop.create_future()
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        
+        if not leader:
+            try:
+                # shield: 等待方超时或被取消不影响首个调用方
+                return self._shared(await asyncio.wait_for(asyncio.shield(future), timeout))
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                return None
+        
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_result({"success": False, "error": str(e) or type(e).__name__})
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[loop_key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """合并统计"""
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._calls) + len(self._async_calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "wait_timeouts": self.timeouts,
+                "peak_waiters": self.peak_waiters,
+                "coalesce_rate": round(self.coalesced / total, 4) if total else 0.0,
+            }
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """进程内共享的请求合并器（所有请求处理器共用，按认证身份区分）"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight